@@ -0,0 +1,78 @@
+"""
+Offline benchmark of the cross-network balance scan against several in-process mock JSON-RPC nodes.
+
+Starts `--networks` mock nodes (the last one `--slow-factor` times slower), reads native and token balances of `--wallets`
+wallets on all of them with `scan_balances` and reports when each network finished, the total time and the time of
+scanning the networks one after another.
+
+Usage:
+    python benchmarks/balances.py --networks 15 --wallets 1000 --tokens 5 --timeout 5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import collections
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode
+from my_web3 import PROVIDERS, Network, Token, ETH, EIP_1559
+from my_web3.portfolio import scan_balances
+
+
+async def scan(networks, args: argparse.Namespace, addresses_wallets, tokens) -> dict:
+    time_start = time.perf_counter()
+    finished, counts, errors = {}, collections.Counter(), collections.Counter()
+    async for balance in scan_balances(addresses_wallets=addresses_wallets, networks=networks, tokens=tokens, timeout=args.timeout, concurrency=args.concurrency):
+        counts[balance.chain_id] += 1
+        errors[balance.chain_id] += balance.error is not None
+        finished[balance.chain_id] = time.perf_counter() - time_start
+    return {'time': time.perf_counter() - time_start, 'finished': finished, 'counts': counts, 'errors': errors}
+
+
+async def run(args: argparse.Namespace):
+    nodes = [
+        MockNode(chain_id=1000 + i, latency=args.latency * (args.slow_factor if i == args.networks - 1 else 1), block_time=3600)
+        for i in range(args.networks)
+    ]
+    networks = [
+        Network(name=f'Mock{i}', rpc=node.start(), coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+        for i, node in enumerate(nodes)
+    ]
+    tokens = [Token(name=f'T{i}', decimals=18, addresses={network: f'0x{i + 1:02x}' + '7a' * 19 for network in networks}) for i in range(args.tokens)]
+    addresses_wallets = [f'0x{i + 1:040x}' for i in range(args.wallets)]
+
+    result = await scan(networks, args, addresses_wallets, tokens)
+    for network in networks:
+        print(
+            f"{network.name:8} | finished {result['finished'].get(network.chain_id, 0):6.2f} s"
+            f" | balances {result['counts'][network.chain_id]} | errors {result['errors'][network.chain_id]}"
+        )
+    requests = sum(sum(node.get_counters()['calls'].values()) for node in nodes)
+    print(f"concurrent | {result['time']:.2f} s | {requests} requests | {sum(result['counts'].values())} balances | {sum(result['errors'].values())} errors")
+
+    time_start = time.perf_counter()
+    for network in networks:
+        await scan([network], args, addresses_wallets, tokens)
+    print(f'one network after another | {time.perf_counter() - time_start:.2f} s')
+    await PROVIDERS.close()
+    for node in nodes:
+        node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the cross-network balance scan against mock JSON-RPC nodes.')
+    parser.add_argument('--networks', type=int, default=15, help='number of mock networks')
+    parser.add_argument('--wallets', type=int, default=1000, help='number of wallets')
+    parser.add_argument('--tokens', type=int, default=5, help='number of tokens')
+    parser.add_argument('--latency', type=float, default=0.1, help='node response delay in seconds')
+    parser.add_argument('--slow-factor', type=float, default=10, help='latency multiplier of the last (slow) network')
+    parser.add_argument('--concurrency', type=int, default=4, help='chunks read concurrently per network')
+    parser.add_argument('--timeout', type=float, default=None, help='per-network timeout in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
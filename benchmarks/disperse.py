@@ -0,0 +1,78 @@
+"""
+Offline benchmark of batched payouts through the Disperse contract against the in-process mock JSON-RPC node.
+
+Pays `--recipients` recipients in the native coin and in an ERC20 token, once with one transaction per recipient
+(`send_transactions_many` of `transfer` calls) and once with `disperse_amounts` / `ERC20_disperse_amounts`, and reports the
+time, the number of transactions and JSON-RPC calls and the total gas limit of both. The mock prices Disperse with a fixed
+gas per recipient, so the gas figures show the model, not a measurement of the contract.
+
+Usage:
+    python benchmarks/disperse.py --recipients 2000 --latency 0.05
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559
+
+ADDRESS_TOKEN = '0x' + '7a' * 20
+PRIVATE_KEY = '0x' + '11' * 32
+
+
+async def measure(node: MockNode, operation) -> dict:
+    counters, time_start = node.get_counters(), time.perf_counter()
+    status, results = await operation()
+    assert status == 0, results
+    errors = sum(status != 0 for status, _ in results)
+    time_taken = time.perf_counter() - time_start
+    counters_end = node.get_counters()
+    return {
+        'time': time_taken,
+        'transactions': counters_end['calls'].get('eth_sendRawTransaction', 0) - counters['calls'].get('eth_sendRawTransaction', 0),
+        'requests': sum(counters_end['calls'].values()) - sum(counters['calls'].values()),
+        'gas': counters_end['gas_sent'] - counters['gas_sent'],
+        'errors': errors,
+    }
+
+
+async def run(args: argparse.Namespace):
+    node = MockNode(latency=args.latency, block_time=args.block_time)
+    url = node.start()
+    network = Network(name='Mock', rpc=url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    my_web3 = MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True)
+    recipients = [(f'0x{i + 1:040x}', 10 ** 15 + i) for i in range(args.recipients)]
+    contract = my_web3._get_contract_ERC20(ADDRESS_TOKEN)
+    operations = [
+        ('native | one transaction each', lambda: my_web3.send_transactions_many([{'address_to': address, 'value': amount} for address, amount in recipients])),
+        ('native | disperse', lambda: my_web3.disperse_amounts(recipients)),
+        ('token  | one transaction each', lambda: my_web3.send_transactions_many([
+            {'address_to': ADDRESS_TOKEN, 'data': contract.encodeABI(fn_name='transfer', args=(my_web3.w3.to_checksum_address(address), amount))}
+            for address, amount in recipients
+        ])),
+        ('token  | disperse (with approval)', lambda: my_web3.ERC20_disperse_amounts(ADDRESS_TOKEN, recipients)),
+    ]
+    for name, operation in operations:
+        result = await measure(node, operation)
+        print(
+            f"{name:34} | {result['time']:6.2f} s | {result['transactions']:5} transactions | {result['requests']:5} requests"
+            f" | gas {result['gas']:>12,} | errors {result['errors']}"
+        )
+    await PROVIDERS.close()
+    node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of batched payouts through the Disperse contract against a mock JSON-RPC node.')
+    parser.add_argument('--recipients', type=int, default=2000, help='number of recipients')
+    parser.add_argument('--latency', type=float, default=0.05, help='node response delay in seconds')
+    parser.add_argument('--block-time', type=float, default=0.5, help='time between blocks in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Import-time budget check of my_web3.
+
+Every scenario is imported in a fresh interpreter with `python -X importtime` (median of `--runs` runs):
+- `total` is the cumulative import time of the statement, including web3 and other dependencies;
+- `own` is the self time of the my_web3 modules only (the part this package controls).
+The check fails (exit code 1) when `own` or `total` exceeds its budget or a module that must be imported lazily is loaded.
+
+Usage: python benchmarks/import_time.py [--runs 5] [--factor 1.0]
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    {
+        'statement': 'import my_web3',
+        'budget_own_ms': 30,
+        'budget_total_ms': 100,
+        'forbidden': ['web3', 'aiohttp', 'eth_account', 'mnemonic', 'my_web3.myweb3'],
+    },
+    {
+        'statement': 'from my_web3 import MyWeb3',
+        'budget_own_ms': 60,
+        'budget_total_ms': None,  # Dominated by web3 itself.
+        'forbidden': ['mnemonic', 'my_web3.wallets', 'my_web3.signing', 'concurrent.futures.process'],
+    },
+]
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure(statement: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    own, total, modules = 0, 0, set()
+    for line in process.stderr.splitlines():
+        match = LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = int(match[1]), int(match[2]), match[3], match[4]
+        modules.add(module)
+        if module.split('.')[0] == 'my_web3':
+            own += self_us
+        if len(indent) == 1:
+            total += cumulative_us
+    return {'own_ms': own / 1000, 'total_ms': total / 1000, 'modules': modules}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreters per scenario')
+    parser.add_argument('--factor', type=float, default=1.0, help='multiplier applied to all budgets (e.g. for slow CI machines)')
+    args = parser.parse_args()
+
+    failed = False
+    for scenario in SCENARIOS:
+        measurements = [measure(scenario['statement']) for _ in range(args.runs)]
+        own = statistics.median(m['own_ms'] for m in measurements)
+        total = statistics.median(m['total_ms'] for m in measurements)
+        forbidden = sorted(module for module in scenario['forbidden'] if module in measurements[0]['modules'])
+        errors = []
+        if own > scenario['budget_own_ms'] * args.factor:
+            errors.append(f"own {own:.1f} ms > {scenario['budget_own_ms'] * args.factor:.1f} ms")
+        if (scenario['budget_total_ms'] is not None) and (total > scenario['budget_total_ms'] * args.factor):
+            errors.append(f"total {total:.1f} ms > {scenario['budget_total_ms'] * args.factor:.1f} ms")
+        if forbidden:
+            errors.append(f"imports {', '.join(forbidden)}")
+        print(f"{'FAIL' if errors else 'OK  '} | {scenario['statement']:<30} | own {own:7.1f} ms | total {total:8.1f} ms" + (f" | {'; '.join(errors)}" if errors else ''))
+        failed = failed or bool(errors)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Offline benchmark of the transaction journal and its fee-bump accelerator against the in-process mock JSON-RPC node.
+
+Sends `--transactions` transactions at the gas price of the node base fee after the base fee rose `--spike` times (as if
+the fees were taken just before a spike), so none of them can be included at its fees. Without a journal they stay pending until `--timeout`; with `TransactionJournal` they
+are replaced with higher fees after `--blocks` blocks. Reports the transactions included, the time to inclusion, the
+replacements sent and the events appended to the journal file.
+
+Usage:
+    python benchmarks/journal.py --transactions 50 --spike 3 --blocks 3 --block-time 0.5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode, BASE_FEE, PRIORITY_FEE
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559, TransactionJournal
+
+ADDRESS_RECIPIENT = '0x' + '3c' * 20
+PRIVATE_KEY = '0x' + '11' * 32
+
+
+async def measure(my_web3: MyWeb3, node: MockNode, args: argparse.Namespace) -> dict:
+    node.base_fee = int(BASE_FEE * args.spike)
+    time_start = time.perf_counter()
+    status, results = await my_web3.send_transactions_many([{'address_to': ADDRESS_RECIPIENT, 'value': 1, 'gas_price': BASE_FEE + PRIORITY_FEE}] * args.transactions)
+    assert status == 0, results
+    sent = node.get_counters()['calls'].get('eth_sendRawTransaction', 0)
+
+    async def wait(transaction_hash) -> float:
+        status, result = await my_web3.verify_transaction(transaction_hash)
+        return time.perf_counter() - time_start if (status == 0) and result else None
+
+    times = [t for t in await asyncio.gather(*[wait(result) for status, result in results]) if t is not None]
+    return {
+        'included': len(times),
+        'time_p50': statistics.median(times) if times else None,
+        'time_max': max(times) if times else None,
+        'replacements': node.get_counters()['calls'].get('eth_sendRawTransaction', 0) - sent,
+    }
+
+
+def format_result(name: str, result: dict, transactions: int) -> str:
+    times = f"p50 {result['time_p50']:5.2f} s | max {result['time_max']:5.2f} s" if result['included'] else 'no inclusion'
+    return f"{name:10} | included {result['included']}/{transactions} | {times} | {result['replacements']} replacements"
+
+
+async def run(args: argparse.Namespace):
+    node = MockNode(latency=args.latency, block_time=args.block_time)
+    url = node.start()
+    MyWeb3.timeout = args.timeout
+    network = Network(name='Mock', rpc=url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+
+    my_web3 = MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True, rpc_batch=True)
+    print(format_result('no journal', await measure(my_web3, node, args), args.transactions))
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = TransactionJournal(path=os.path.join(directory, 'journal.jsonl'), blocks=args.blocks, interval=args.block_time / 2)
+        my_web3 = MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True, rpc_batch=True, journal=journal)
+        await my_web3.resync_nonce()
+        print(format_result('journal', await measure(my_web3, node, args), args.transactions))
+        journal.close()
+        with open(journal.path) as file:
+            print(f'journal | {sum(1 for _ in file)} events | {os.path.getsize(journal.path) / 1024:.1f} KiB')
+    await PROVIDERS.close()
+    node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the transaction journal fee-bump accelerator against a mock JSON-RPC node.')
+    parser.add_argument('--transactions', type=int, default=50, help='number of transactions')
+    parser.add_argument('--spike', type=float, default=3, help='base fee multiplier applied after sending')
+    parser.add_argument('--blocks', type=int, default=3, help='blocks a transaction may stay pending before it is replaced')
+    parser.add_argument('--block-time', type=float, default=0.5, help='time between blocks in seconds')
+    parser.add_argument('--latency', type=float, default=0.02, help='node response delay in seconds')
+    parser.add_argument('--timeout', type=float, default=10, help='receipt timeout in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
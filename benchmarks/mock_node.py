@@ -0,0 +1,394 @@
+"""
+In-process mock JSON-RPC node for offline benchmarks.
+
+Serves the subset of the Ethereum JSON-RPC API used by MyWeb3 (balances, nonces, fees, gas estimation, ERC20 and Multicall3
+calls, raw transactions and receipts) over HTTP and WebSocket (with `newHeads` and `logs` subscriptions) from a background
+thread, with configurable latency, error injection and an HTTP 429 rate limit. Requests sent to the node as an HTTP proxy
+are answered as well, so proxied providers can be checked. Every JSON-RPC call and HTTP request is counted, so benchmarks
+can report RPCs per high-level operation.
+"""
+from eth_abi import encode, decode
+from eth_utils import keccak
+from aiohttp import web
+from typing import Any, Optional, Tuple, List, Dict
+
+import rlp
+import time
+import json
+import random
+import asyncio
+import threading
+import collections
+
+SELECTOR_BALANCE_OF = '70a08231'
+SELECTOR_ALLOWANCE = 'dd62ed3e'
+SELECTOR_DECIMALS = '313ce567'
+SELECTOR_NAME = '06fdde03'
+SELECTOR_SYMBOL = '95d89b41'
+SELECTOR_AGGREGATE3 = '82ad56cb'
+SELECTOR_GET_ETH_BALANCE = '4d2301cc'
+SELECTOR_GET_L1_FEE = '49948e0e'
+SELECTOR_GET_BLOCK_NUMBER = '42cbb15c'
+SELECTOR_DISPERSE_ETHER = 'e63d38ed'
+SELECTOR_DISPERSE_TOKEN = 'c73a2d60'
+
+BALANCE = 10 ** 24
+BASE_FEE = 10 ** 9
+PRIORITY_FEE = 10 ** 8
+GAS = 21000
+GAS_DISPERSE_ETHER = 10000
+GAS_DISPERSE_TOKEN = 29000
+L1_FEE = 10 ** 12
+TOPIC_TRANSFER = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
+
+def decode_calls(data: bytes) -> List[Tuple[str, bool, bytes]]:
+    """Decodes the (address, bool, bytes)[] argument of aggregate3 (eth_abi would make the node the bottleneck of large multicalls)."""
+    base = int.from_bytes(data[:32], 'big') + 32
+    calls = []
+    for i in range(int.from_bytes(data[base - 32:base], 'big')):
+        start = base + int.from_bytes(data[base + 32 * i:base + 32 * i + 32], 'big')
+        position = start + int.from_bytes(data[start + 64:start + 96], 'big')
+        length = int.from_bytes(data[position:position + 32], 'big')
+        calls.append(('0x' + data[start + 12:start + 32].hex(), data[start + 63] != 0, data[position + 32:position + 32 + length]))
+    return calls
+
+
+def encode_results(results: List[Tuple[bool, bytes]]) -> bytes:
+    """Encodes the (bool, bytes)[] result of aggregate3."""
+    heads, tails, offset = [], [], 32 * len(results)
+    for success, data in results:
+        tail = int(success).to_bytes(32, 'big') + (64).to_bytes(32, 'big') + len(data).to_bytes(32, 'big') + data + bytes(-len(data) % 32)
+        heads.append(offset.to_bytes(32, 'big'))
+        tails.append(tail)
+        offset += len(tail)
+    return (32).to_bytes(32, 'big') + len(results).to_bytes(32, 'big') + b''.join(heads) + b''.join(tails)
+
+
+class MockNode:
+    def __init__(
+            self,
+            chain_id: int = 8453,
+            latency: float = 0.,
+            jitter: float = 0.,
+            error_rate: float = 0.,
+            rate_limit: Optional[float] = None,
+            block_time: float = 0.1,
+            block_number: int = 1,
+            logs_per_block: float = 0.,
+            logs_range_max: Optional[int] = None,
+            logs_results_max: int = 10000,
+    ):
+        """
+        :param chain_id: Chain id returned by `eth_chainId`.
+        :param latency: Delay (in seconds) of every HTTP response.
+        :param jitter: Random extra delay (in seconds, uniform 0..jitter) of every HTTP response.
+        :param error_rate: Share of JSON-RPC calls answered with an internal error.
+        :param rate_limit: Maximum HTTP requests per second; requests above it get HTTP 429 with `Retry-After`.
+        :param block_time: Time (in seconds) between blocks; sent transactions get receipts in the next block whose base fee
+            (`base_fee`, change it to simulate a fee spike) their max fee covers.
+        :param block_number: Initial head block number.
+        :param logs_per_block: Average number of `Transfer` logs per block returned by `eth_getLogs` for any filter.
+        :param logs_range_max: Maximum block range of `eth_getLogs` (larger ranges are answered with an error).
+        :param logs_results_max: Maximum number of logs of `eth_getLogs` (larger results are answered with an error).
+        """
+        self.chain_id = chain_id
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.block_time = block_time
+        self.calls: Dict[str, int] = collections.Counter()
+        self.http_requests = 0
+        self.http_throttled = 0
+        self.gas_sent = 0
+        self.block_number = block_number
+        self.logs_per_block = logs_per_block
+        self.logs_range_max = logs_range_max
+        self.logs_results_max = logs_results_max
+        self.nonces: Dict[str, int] = collections.Counter()
+        self.base_fee = BASE_FEE
+        self.pending: Dict[str, int] = {}
+        self.receipts: Dict[str, dict] = {}
+        self.blocks: Dict[int, List[str]] = collections.defaultdict(list)
+        self.url: Optional[str] = None
+        self.ws_url: Optional[str] = None
+        self._websockets: Dict[web.WebSocketResponse, Dict[str, list]] = {}
+        self._subscription_ids = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._blocks_task: Optional[asyncio.Task] = None
+        self._window_start = 0.
+        self._window_requests = 0
+
+    def start(self) -> str:
+        """Starts the node on a free local port and returns its URL."""
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self.url
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def drop_websockets(self):
+        """Closes all WebSocket connections (their subscriptions are lost, as on a real node restart)."""
+        for ws in list(self._websockets):
+            asyncio.run_coroutine_threadsafe(ws.close(), self._loop)
+
+    def get_counters(self) -> Dict[str, Any]:
+        """Returns a copy of the call counters (JSON-RPC calls by method, HTTP requests, throttled HTTP requests and gas limits of sent transactions)."""
+        return {'calls': dict(self.calls), 'http_requests': self.http_requests, 'http_throttled': self.http_throttled, 'gas_sent': self.gas_sent}
+
+    async def _start(self):
+        app = web.Application(client_max_size=64 * 1024 ** 2, middlewares=[self._proxy_middleware])
+        app.router.add_post('/', self._handle)
+        app.router.add_get('/', self._handle_ws)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0, backlog=16384)
+        await site.start()
+        self.url = f'http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}'
+        self.ws_url = self.url.replace('http://', 'ws://')
+        self._blocks_task = asyncio.ensure_future(self._produce_blocks())
+
+    @web.middleware
+    async def _proxy_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        # Requests through a proxy carry the absolute target URL, which matches no route.
+        if (request.method == 'POST') and request.raw_path.startswith('http'):
+            return await self._handle(request)
+        return await handler(request)
+
+    async def _stop(self):
+        self._blocks_task.cancel()
+        for ws in list(self._websockets):
+            await ws.close()
+        await self._runner.cleanup()
+
+    async def _produce_blocks(self):
+        while True:
+            await asyncio.sleep(self.block_time)
+            self.block_number += 1
+            for transaction_hash, fee in list(self.pending.items()):
+                if fee >= self.base_fee:
+                    self._include(transaction_hash, block_number=self.block_number)
+            self._push_block()
+
+    def _push_block(self):
+        head = self._rpc_eth_getBlockByNumber('latest')
+        for ws, subscriptions in list(self._websockets.items()):
+            for subscription_id, params in subscriptions.items():
+                if params[0] == 'newHeads':
+                    results = [head]
+                else:
+                    number = hex(self.block_number)
+                    results = self._rpc_eth_getLogs({**(params[1] if len(params) > 1 else {}), 'fromBlock': number, 'toBlock': number})
+                for result in results:
+                    message = {'jsonrpc': '2.0', 'method': 'eth_subscription', 'params': {'subscription': subscription_id, 'result': result}}
+                    asyncio.ensure_future(ws.send_json(message))
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._websockets[ws] = {}
+        try:
+            async for message in ws:
+                if message.type == web.WSMsgType.TEXT:
+                    asyncio.ensure_future(self._handle_ws_message(ws, json.loads(message.data)))
+        finally:
+            self._websockets.pop(ws, None)
+        return ws
+
+    async def _handle_ws_message(self, ws: web.WebSocketResponse, body: dict):
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        method, params = body['method'], body.get('params') or []
+        if method == 'eth_subscribe':
+            self.calls[method] += 1
+            self._subscription_ids += 1
+            subscription_id = hex(self._subscription_ids)
+            self._websockets.setdefault(ws, {})[subscription_id] = params
+            response = {'jsonrpc': '2.0', 'id': body['id'], 'result': subscription_id}
+        elif method == 'eth_unsubscribe':
+            self.calls[method] += 1
+            response = {'jsonrpc': '2.0', 'id': body['id'], 'result': self._websockets.get(ws, {}).pop(params[0], None) is not None}
+        else:
+            response = self._call(body)
+        if not ws.closed:
+            await ws.send_json(response)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.http_requests += 1
+        if self.rate_limit is not None:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_requests = now, 0
+            self._window_requests += 1
+            if self._window_requests > self.rate_limit:
+                self.http_throttled += 1
+                retry_after = max(0.05, 1 - (now - self._window_start))
+                return web.Response(status=429, text='Too Many Requests', headers={'Retry-After': f'{retry_after:.2f}'})
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        body = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self._call(item) for item in body])
+        return web.json_response(self._call(body))
+
+    def _call(self, request: dict) -> dict:
+        method, params = request['method'], request.get('params') or []
+        self.calls[method] += 1
+        if (self.error_rate > 0) and (random.random() < self.error_rate):
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32603, 'message': 'injected internal error'}}
+        handler = getattr(self, f'_rpc_{method}', None)
+        if handler is None:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32601, 'message': f'method {method} not found'}}
+        try:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'result': handler(*params)}
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32000, 'message': str(e)}}
+
+    def _rpc_web3_clientVersion(self) -> str:
+        return 'MockNode/v1'
+
+    def _rpc_eth_chainId(self) -> str:
+        return hex(self.chain_id)
+
+    def _rpc_eth_blockNumber(self) -> str:
+        return hex(self.block_number)
+
+    def _rpc_eth_gasPrice(self) -> str:
+        return hex(self.base_fee + PRIORITY_FEE)
+
+    def _rpc_eth_maxPriorityFeePerGas(self) -> str:
+        return hex(PRIORITY_FEE)
+
+    def _rpc_eth_getBalance(self, address: str, block_identifier: Any = 'latest') -> str:
+        return hex(BALANCE)
+
+    def _rpc_eth_getTransactionCount(self, address: str, block_identifier: Any = 'latest') -> str:
+        return hex(self.nonces[address.lower()])
+
+    def _rpc_eth_estimateGas(self, tx: dict, block_identifier: Any = None) -> str:
+        data = tx.get('data') or tx.get('input') or '0x'
+        # Disperse costs a base transaction plus a call (or token transfer) per recipient; words = 4 (5) + 2 * recipients.
+        if data[2:10] == SELECTOR_DISPERSE_ETHER:
+            return hex(GAS + GAS_DISPERSE_ETHER * ((len(data) - 10) // 64 - 4) // 2)
+        if data[2:10] == SELECTOR_DISPERSE_TOKEN:
+            return hex(GAS + GAS_DISPERSE_TOKEN * ((len(data) - 10) // 64 - 5) // 2)
+        return hex(GAS if data == '0x' else 3 * GAS)
+
+    def _rpc_eth_getCode(self, address: str, block_identifier: Any = 'latest') -> str:
+        return '0x6080'
+
+    def _rpc_eth_feeHistory(self, block_count: Any, newest_block: Any, percentiles: List[float]) -> dict:
+        block_count = int(block_count, 16) if isinstance(block_count, str) else block_count
+        return {
+            'oldestBlock': hex(max(0, self.block_number - block_count + 1)),
+            'baseFeePerGas': [hex(self.base_fee)] * (block_count + 1),
+            'gasUsedRatio': [0.5] * block_count,
+            'reward': [[hex(PRIORITY_FEE * (i + 1)) for i in range(len(percentiles))] for _ in range(block_count)],
+        }
+
+    def _rpc_eth_getBlockByNumber(self, block_identifier: Any, full_transactions: bool = False) -> dict:
+        return {
+            'number': hex(self.block_number), 'hash': '0x' + '11' * 32, 'parentHash': '0x' + '22' * 32,
+            'timestamp': hex(int(time.time())), 'baseFeePerGas': hex(self.base_fee), 'gasLimit': hex(30_000_000),
+            'gasUsed': '0x0', 'miner': '0x' + '00' * 20, 'difficulty': '0x0', 'extraData': '0x',
+            'logsBloom': '0x' + '00' * 256, 'transactions': [],
+        }
+
+    def _rpc_eth_getLogs(self, params: dict) -> List[dict]:
+        # Logs are synthesized on the fly: log i lies in block i / logs_per_block and matches the filter topics.
+        start, end = int(params['fromBlock'], 16), int(params['toBlock'], 16)
+        if (self.logs_range_max is not None) and (end - start + 1 > self.logs_range_max):
+            raise Exception(f'block range is too large, max {self.logs_range_max} blocks')
+        first, last = int(start * self.logs_per_block), int((end + 1) * self.logs_per_block)
+        if last - first > self.logs_results_max:
+            raise Exception(f'query returned more than {self.logs_results_max} results')
+        addresses = params.get('address') or ['0x' + '7a' * 20]
+        addresses = [addresses] if isinstance(addresses, str) else addresses
+        if params.get('topics') and (params['topics'][0] != TOPIC_TRANSFER):
+            return []  # Only Transfer logs are synthesized.
+        topics = (params.get('topics') or []) + [None, None]
+        topics_from, topics_to = topics[1], topics[2]
+        direction = 1 if topics_from else 2
+        logs = []
+        for i in range(first, last):
+            logs.append({
+                'address': addresses[i % len(addresses)],
+                'topics': [
+                    TOPIC_TRANSFER,
+                    topics_from[i % len(topics_from)] if topics_from else '0x' + '00' * 12 + '5e' * 20,
+                    topics_to[i % len(topics_to)] if topics_to else '0x' + '00' * 12 + '5e' * 20,
+                ],
+                'data': '0x' + f'{i + 1:064x}',
+                'blockNumber': hex(min(end, max(start, int(i / self.logs_per_block)))),
+                'blockHash': '0x' + '11' * 32,
+                'transactionHash': '0x' + f'{i:063x}{direction}',
+                'transactionIndex': '0x0',
+                'logIndex': '0x0',
+                'removed': False,
+            })
+        return logs
+
+    def _rpc_eth_call(self, tx: dict, block_identifier: Any = 'latest') -> str:
+        return '0x' + self._execute_call(tx['to'], bytes.fromhex((tx.get('data') or tx.get('input') or '0x')[2:])).hex()
+
+    def _rpc_eth_sendRawTransaction(self, raw_transaction: str) -> str:
+        # Transactions are accepted without signature checks, which would make the node the bottleneck of the benchmark.
+        transaction_hash = '0x' + keccak(hexstr=raw_transaction).hex()
+        raw = bytes.fromhex(raw_transaction[2:])
+        # Fields: [chainId, nonce, maxPriorityFee, maxFee, gas, ...] (type 2), [chainId, nonce, gasPrice, gas, ...] (type 1)
+        # and [nonce, gasPrice, gas, ...] (legacy). Replaced transactions are not evicted: senders are not recovered.
+        fields = rlp.decode(raw[1:]) if raw[0] <= 0x7f else rlp.decode(raw)
+        fee_index, gas_index = {2: (3, 4), 1: (2, 3)}.get(raw[0], (1, 2))
+        self.gas_sent += int.from_bytes(fields[gas_index], 'big')
+        self.pending[transaction_hash] = int.from_bytes(fields[fee_index], 'big')
+        return transaction_hash
+
+    def _include(self, transaction_hash: str, block_number: int):
+        del self.pending[transaction_hash]
+        self.receipts[transaction_hash] = {
+            'transactionHash': transaction_hash, 'status': '0x1', 'blockNumber': hex(block_number),
+            'blockHash': '0x' + '11' * 32, 'transactionIndex': '0x0', 'gasUsed': hex(GAS), 'cumulativeGasUsed': hex(GAS),
+            'effectiveGasPrice': hex(self.base_fee + PRIORITY_FEE), 'from': '0x' + '00' * 20, 'to': '0x' + '00' * 20,
+            'contractAddress': None, 'logs': [], 'logsBloom': '0x' + '00' * 256, 'type': '0x2',
+        }
+        self.blocks[block_number].append(transaction_hash)
+
+    def _rpc_eth_getTransactionReceipt(self, transaction_hash: str) -> Optional[dict]:
+        receipt = self.receipts.get(transaction_hash.lower())
+        if (receipt is None) or (int(receipt['blockNumber'], 16) > self.block_number):
+            return None
+        return receipt
+
+    def _rpc_eth_getBlockReceipts(self, block_identifier: str) -> List[dict]:
+        return [self.receipts[transaction_hash] for transaction_hash in self.blocks.get(int(block_identifier, 16), [])]
+
+    def _execute_call(self, to: str, data: bytes) -> bytes:
+        selector, arguments = data[:4].hex(), data[4:]
+        if selector in (SELECTOR_BALANCE_OF, SELECTOR_GET_ETH_BALANCE):
+            return BALANCE.to_bytes(32, 'big')
+        if selector == SELECTOR_ALLOWANCE:
+            return bytes(32)
+        if selector == SELECTOR_DECIMALS:
+            return encode(['uint8'], [18])
+        if selector in (SELECTOR_NAME, SELECTOR_SYMBOL):
+            return encode(['string'], ['MOCK'])
+        if selector == SELECTOR_GET_BLOCK_NUMBER:
+            return self.block_number.to_bytes(32, 'big')
+        if selector == SELECTOR_GET_L1_FEE:
+            return L1_FEE.to_bytes(32, 'big')
+        if selector == SELECTOR_AGGREGATE3:
+            results = []
+            for target, allow_failure, call_data in decode_calls(arguments):
+                try:
+                    results.append((True, self._execute_call(target, call_data)))
+                except Exception:
+                    if not allow_failure:
+                        raise
+                    results.append((False, b''))
+            return encode_results(results)
+        raise Exception('execution reverted')
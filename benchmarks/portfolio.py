@@ -0,0 +1,72 @@
+"""
+Offline benchmark of the local portfolio index against the in-process mock JSON-RPC node.
+
+Seeds an index of `--wallets` wallets and `--tokens` tokens, advances the node by `--blocks` blocks of `Transfer` logs,
+syncs the index and reports the requests and time of both steps, the latency of local portfolio queries and the number of
+requests a polling refresh (one `get_balance` / `ERC20_get_balance` per wallet and token) would take instead.
+
+Usage:
+    python benchmarks/portfolio.py --wallets 10000 --tokens 5 --blocks 1000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode
+from my_web3 import PROVIDERS, Network, Token, ETH, EIP_1559
+from my_web3.portfolio import PortfolioIndex
+
+
+def get_requests(node: MockNode) -> int:
+    return sum(node.get_counters()['calls'].values())
+
+
+async def run(args: argparse.Namespace):
+    node = MockNode(block_number=1000000, block_time=3600, logs_per_block=args.logs_per_block, latency=args.latency)
+    url = node.start()
+    network = Network(name='Mock', rpc=url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    tokens = [Token(name=f'T{i}', decimals=18, addresses={network: f'0x{i + 1:02x}' + '7a' * 19}) for i in range(args.tokens)]
+    addresses_wallets = [f'0x{i + 1:040x}' for i in range(args.wallets)]
+    with tempfile.TemporaryDirectory() as directory:
+        index = PortfolioIndex(path=os.path.join(directory, 'portfolio.sqlite'), addresses_wallets=addresses_wallets, networks=[network], tokens=tokens)
+
+        requests, time_start = get_requests(node), time.perf_counter()
+        result = await index.sync()
+        print(f'seed | block {result[network.chain_id]} | {time.perf_counter() - time_start:.2f} s | {get_requests(node) - requests} requests')
+
+        node.block_number += args.blocks
+        requests, time_start = get_requests(node), time.perf_counter()
+        result = await index.sync()
+        n = index._connection.execute('SELECT COUNT(*) FROM transfers').fetchone()[0]
+        print(f'sync {args.blocks} blocks | block {result[network.chain_id]} | {n} transfers | {time.perf_counter() - time_start:.2f} s | {get_requests(node) - requests} requests')
+
+        time_start = time.perf_counter()
+        portfolio = index.get_portfolio()
+        print(f'get_portfolio (all wallets) | {len(portfolio)} wallets | {(time.perf_counter() - time_start) * 1000:.1f} ms')
+        time_start = time.perf_counter()
+        for address_wallet in addresses_wallets[:1000]:
+            index.get_portfolio(addresses_wallets=[address_wallet])
+        print(f'get_portfolio (one wallet) | {(time.perf_counter() - time_start) / min(1000, args.wallets) * 1000:.3f} ms')
+        print(f'polling refresh | {args.wallets * (args.tokens + 1)} requests')
+        index.close()
+    await PROVIDERS.close()
+    node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the local portfolio index against a mock JSON-RPC node.')
+    parser.add_argument('--wallets', type=int, default=10000, help='number of tracked wallets')
+    parser.add_argument('--tokens', type=int, default=5, help='number of tracked tokens')
+    parser.add_argument('--blocks', type=int, default=1000, help='number of blocks ingested by the sync')
+    parser.add_argument('--logs-per-block', type=float, default=5, help='average number of matching logs per block')
+    parser.add_argument('--latency', type=float, default=0.05, help='node response delay in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
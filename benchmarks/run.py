@@ -0,0 +1,210 @@
+"""
+Offline benchmark of MyWeb3 public methods against the in-process mock JSON-RPC node.
+
+For every method and concurrency level reports ops/sec, p50/p99 latency, JSON-RPC calls and HTTP requests per operation and
+the number of failed operations. Results can be saved as a baseline and compared with a later run; the comparison fails
+(exit code 1) when RPCs per operation grow or throughput drops by more than `--tolerance`.
+
+Usage:
+    python benchmarks/run.py --concurrency 1,10,100,1000,10000 --save benchmarks/baseline.json
+    python benchmarks/run.py --methods get_balance,ERC20_approve_smart --latency 0.05 --compare benchmarks/baseline.json
+    python benchmarks/run.py --rate-limit 200 --error-rate 0.01 --rpc-batch
+    python benchmarks/run.py --methods send_transaction --concurrency 100 --metrics
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559, InMemoryMetrics, set_metrics
+from my_web3.constants import ADDRESS_L1_FEE_ORACLE_OP_STACK
+
+ADDRESS_TOKEN = '0x' + '7a' * 20
+ADDRESS_SPENDER = '0x' + '5b' * 20
+ADDRESS_RECIPIENT = '0x' + '3c' * 20
+ADDRESSES = ['0x' + f'{i + 1:040x}' for i in range(100)]
+TRANSACTIONS_PREPARED = 100
+
+
+async def prepare_transactions(my_web3: MyWeb3) -> list:
+    status, results = await my_web3.send_transactions_many([{'address_to': ADDRESS_RECIPIENT, 'value': 1}] * TRANSACTIONS_PREPARED)
+    return [result for status, result in results if status == 0]
+
+
+# name -> (operation(my_web3, i, prepared), prepare(my_web3) or None)
+SCENARIOS = {
+    'is_connected': (lambda w, i, p: w.is_connected(), None),
+    'get_balance': (lambda w, i, p: w.get_balance(), None),
+    'get_balances_many[100]': (lambda w, i, p: w.get_balances_many(ADDRESSES), None),
+    'send_transaction': (lambda w, i, p: w.send_transaction(address_to=ADDRESS_RECIPIENT, value=1), None),
+    'send_transactions_many[10]': (lambda w, i, p: w.send_transactions_many([{'address_to': ADDRESS_RECIPIENT, 'value': 1}] * 10), None),
+    'resync_nonce': (lambda w, i, p: w.resync_nonce(), None),
+    'verify_transaction': (lambda w, i, p: w.verify_transaction(p[i % len(p)]), prepare_transactions),
+    'verify_transactions_many[10]': (lambda w, i, p: w.verify_transactions_many(p[:10]), prepare_transactions),
+    'get_transaction_receipt': (lambda w, i, p: w.get_transaction_receipt(p[i % len(p)]), prepare_transactions),
+    'transfer_amount': (lambda w, i, p: w.transfer_amount(address_recipient=ADDRESS_RECIPIENT, amount=1), None),
+    'transfer_percent[50]': (lambda w, i, p: w.transfer_percent(address_recipient=ADDRESS_RECIPIENT, percent=50), None),
+    'transfer_percent[100]': (lambda w, i, p: w.transfer_percent(address_recipient=ADDRESS_RECIPIENT, percent=100), None),
+    'ERC20_get_balance': (lambda w, i, p: w.ERC20_get_balance(address_token=ADDRESS_TOKEN), None),
+    'ERC20_get_allowance': (lambda w, i, p: w.ERC20_get_allowance(address_token=ADDRESS_TOKEN, address_spender=ADDRESS_SPENDER), None),
+    'ERC20_get_decimals': (lambda w, i, p: w.ERC20_get_decimals(address_token=ADDRESS_TOKEN), None),
+    'ERC20_get_decimals_smart': (lambda w, i, p: w.ERC20_get_decimals_smart(address_token=ADDRESS_TOKEN), None),
+    'ERC20_get_symbol': (lambda w, i, p: w.ERC20_get_symbol(address_token=ADDRESS_TOKEN), None),
+    'ERC20_get_symbol_smart': (lambda w, i, p: w.ERC20_get_symbol_smart(address_token=ADDRESS_TOKEN), None),
+    'ERC20_get_balances_many[100]': (lambda w, i, p: w.ERC20_get_balances_many([(ADDRESS_TOKEN, address) for address in ADDRESSES]), None),
+    'ERC20_get_allowances_many[100]': (lambda w, i, p: w.ERC20_get_allowances_many([(ADDRESS_TOKEN, ADDRESS_SPENDER, address) for address in ADDRESSES]), None),
+    'ERC20_get_decimals_many[100]': (lambda w, i, p: w.ERC20_get_decimals_many([ADDRESS_TOKEN] * 100), None),
+    'ERC20_get_symbols_many[100]': (lambda w, i, p: w.ERC20_get_symbols_many([ADDRESS_TOKEN] * 100), None),
+    'ERC20_approve': (lambda w, i, p: w.ERC20_approve(amount=1, address_token=ADDRESS_TOKEN, address_spender=ADDRESS_SPENDER), None),
+    'ERC20_approve_smart': (lambda w, i, p: w.ERC20_approve_smart(amount=1, address_token=ADDRESS_TOKEN, address_spender=ADDRESS_SPENDER), None),
+    'ERC20_transfer_amount': (lambda w, i, p: w.ERC20_transfer_amount(amount=1, address_token=ADDRESS_TOKEN, address_recipient=ADDRESS_RECIPIENT), None),
+    'ERC20_transfer_percent': (lambda w, i, p: w.ERC20_transfer_percent(percent=50, address_token=ADDRESS_TOKEN, address_recipient=ADDRESS_RECIPIENT), None),
+    'get_state_snapshot': (lambda w, i, p: w.get_state_snapshot(addresses_tokens=[ADDRESS_TOKEN], allowances=[(ADDRESS_TOKEN, ADDRESS_SPENDER)]), None),
+    'multicall[100]': (lambda w, i, p: w.multicall([(ADDRESS_TOKEN, '0x313ce567')] * 100), None),
+}
+
+
+def get_percentile(values: list, percentile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+async def run_level(node: MockNode, wallets: list, name: str, concurrency: int, ops: int, prepared: list) -> dict:
+    operation = SCENARIOS[name][0]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def run(i: int):
+        async with semaphore:
+            time_start = time.perf_counter()
+            status, result = await operation(wallets[i % len(wallets)], i, prepared)
+            latencies.append(time.perf_counter() - time_start)
+            if status != 0:
+                errors.append(result)
+
+    counters = node.get_counters()
+    time_start = time.perf_counter()
+    await asyncio.gather(*[run(i) for i in range(ops)])
+    duration = time.perf_counter() - time_start
+    counters_end = node.get_counters()
+    calls = sum(counters_end['calls'].values()) - sum(counters['calls'].values())
+    return {
+        'ops': ops,
+        'ops_per_sec': ops / duration,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': get_percentile(latencies, 99) * 1000,
+        'rpc_per_op': calls / ops,
+        'http_per_op': (counters_end['http_requests'] - counters['http_requests']) / ops,
+        'throttled': counters_end['http_throttled'] - counters['http_throttled'],
+        'errors': len(errors),
+        'error_example': str(errors[0])[:200] if errors else None,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    node = MockNode(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, rate_limit=args.rate_limit, block_time=args.block_time)
+    url = node.start()
+    network = Network(
+        name='Mock', rpc=url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559,
+        address_l1_fee_oracle=ADDRESS_L1_FEE_ORACLE_OP_STACK,
+    )
+    wallets = [
+        MyWeb3(network=network, private_key=f'0x{i + 1:064x}', async_provider=not args.sync_provider, rpc_batch=args.rpc_batch, nonce_manager=args.nonce_manager, gas_profiles=args.gas_profiles)
+        for i in range(args.wallets)
+    ]
+    results = {}
+    metrics = InMemoryMetrics() if args.metrics else None
+    set_metrics(metrics)
+    for name in args.methods:
+        operation, prepare = SCENARIOS[name]
+        prepared = await prepare(wallets[0]) if prepare is not None else []
+        results[name] = {}
+        for concurrency in args.concurrency:
+            result = results[name][str(concurrency)] = await run_level(
+                node=node, wallets=wallets, name=name, concurrency=concurrency, ops=max(args.ops, concurrency), prepared=prepared,
+            )
+            print(
+                f"{name:<32} | c={concurrency:<6} | {result['ops_per_sec']:9.1f} ops/s | p50 {result['p50_ms']:8.1f} ms"
+                f" | p99 {result['p99_ms']:8.1f} ms | rpc/op {result['rpc_per_op']:7.2f} | http/op {result['http_per_op']:6.2f}"
+                f" | 429 {result['throttled']:<5} | errors {result['errors']}" + (f" ({result['error_example']})" if result['errors'] else ''),
+                flush=True,
+            )
+        if metrics is not None:
+            print_metrics(metrics)
+            metrics.reset()
+    await PROVIDERS.close()
+    node.stop()
+    return results
+
+
+def print_metrics(metrics: InMemoryMetrics):
+    for kind, names in metrics.get_stats().items():
+        for name, stats in sorted(names.items(), key=lambda item: -item[1]['time']):
+            errors = ', '.join(f'{error}: {count}' for error, count in stats['errors'].items())
+            print(
+                f"    {kind:<8} | {name:<32} | calls {stats['count']:<7} | time {stats['time']:8.2f} s | mean {stats['mean'] * 1000:8.1f} ms"
+                f" | p99 <= {stats['p99'] * 1000:8.0f} ms" + (f' | errors {errors}' if errors else ''),
+            )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, levels in results.items():
+        for concurrency, result in levels.items():
+            base = baseline.get('results', {}).get(name, {}).get(concurrency)
+            if base is None:
+                continue
+            if result['rpc_per_op'] > base['rpc_per_op'] * (1 + tolerance) + 0.01:
+                regressions.append(f"{name} c={concurrency}: rpc/op {base['rpc_per_op']:.2f} -> {result['rpc_per_op']:.2f}")
+            if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+                regressions.append(f"{name} c={concurrency}: ops/s {base['ops_per_sec']:.1f} -> {result['ops_per_sec']:.1f}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Offline benchmark of MyWeb3 public methods against a mock JSON-RPC node.')
+    parser.add_argument('--methods', type=lambda s: s.split(','), default=list(SCENARIOS), help=f"comma-separated methods: {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', type=lambda s: [int(c) for c in s.split(',')], default=[1, 10, 100, 1000], help='comma-separated concurrency levels')
+    parser.add_argument('--ops', type=int, default=200, help='operations per level (at least the concurrency)')
+    parser.add_argument('--wallets', type=int, default=100, help='number of wallets the operations are spread over')
+    parser.add_argument('--latency', type=float, default=0., help='node response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0., help='random extra node delay in seconds')
+    parser.add_argument('--error-rate', type=float, default=0., help='share of JSON-RPC calls answered with an error')
+    parser.add_argument('--rate-limit', type=float, default=None, help='node HTTP requests per second before answering 429')
+    parser.add_argument('--block-time', type=float, default=0.1, help='node block time in seconds')
+    parser.add_argument('--rpc-batch', action='store_true', help='creates wallets with rpc_batch=True')
+    parser.add_argument('--nonce-manager', action=argparse.BooleanOptionalAction, default=True, help='creates wallets with nonce_manager=True (required by send_transactions_many)')
+    parser.add_argument('--gas-profiles', action='store_true', help='creates wallets with gas_profiles=True')
+    parser.add_argument('--sync-provider', action='store_true', help='creates wallets with async_provider=False')
+    parser.add_argument('--metrics', action='store_true', help='prints per-method, per-JSON-RPC-method and per-endpoint metrics of every scenario')
+    parser.add_argument('--save', help='saves the results as a baseline JSON file')
+    parser.add_argument('--compare', help='compares the results with a baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed relative regression when comparing')
+    args = parser.parse_args()
+    unknown = [name for name in args.methods if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown methods: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({'config': {key: value for key, value in vars(args).items() if key not in ('save', 'compare')}, 'results': results}, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results=results, baseline=json.load(file), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION | {regression}')
+        if regressions:
+            return 1
+        print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Offline benchmark of the Transfer log scanner against the in-process mock JSON-RPC node.
+
+Reports blocks and logs per second, `eth_getLogs` requests, failed (split) requests and peak memory of a scan
+over `--blocks` blocks with the node's block range and result limits.
+
+Usage:
+    python benchmarks/scan.py --blocks 5000000 --logs-per-block 0.05 --range-max 10000 --wallets 1000
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode
+from my_web3 import PROVIDERS, Network, ETH, EIP_1559
+from my_web3.transfers import TransferScanner
+
+ADDRESS_TOKEN = '0x' + '7a' * 20
+
+
+async def run(args: argparse.Namespace):
+    node = MockNode(block_number=args.blocks, logs_per_block=args.logs_per_block, logs_range_max=args.range_max, logs_results_max=args.results_max, latency=args.latency)
+    url = node.start()
+    network = Network(name='Mock', rpc=url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    addresses_wallets = [f'0x{i + 1:040x}' for i in range(args.wallets)] if args.wallets else None
+    scanner = TransferScanner(network=network, addresses_tokens=[ADDRESS_TOKEN], addresses_wallets=addresses_wallets, concurrency=args.concurrency)
+    n, block_last = 0, -1
+    time_start = time.perf_counter()
+    async for transfer in scanner.scan(block_start=0, block_end=args.blocks - 1):
+        if transfer.block_number < block_last:
+            raise Exception(f'transfers out of order: {transfer.block_number} < {block_last}')
+        block_last = transfer.block_number
+        n += 1
+    duration = time.perf_counter() - time_start
+    counters = node.get_counters()
+    print(
+        f"blocks {args.blocks} | logs {n} | {duration:.1f} s | {args.blocks / duration:,.0f} blocks/s | {n / duration:,.0f} logs/s"
+        f" | eth_getLogs {counters['calls'].get('eth_getLogs', 0)} | chunk size {scanner.chunk_size}"
+        f" | peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+    )
+    await PROVIDERS.close()
+    node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the Transfer log scanner against a mock JSON-RPC node.')
+    parser.add_argument('--blocks', type=int, default=1000000, help='number of scanned blocks')
+    parser.add_argument('--logs-per-block', type=float, default=0.05, help='average number of matching logs per block')
+    parser.add_argument('--range-max', type=int, default=10000, help='node eth_getLogs block range limit')
+    parser.add_argument('--results-max', type=int, default=10000, help='node eth_getLogs result limit')
+    parser.add_argument('--wallets', type=int, default=100, help='number of scanned wallets (0 scans all transfers)')
+    parser.add_argument('--concurrency', type=int, default=4, help='ranges requested concurrently')
+    parser.add_argument('--latency', type=float, default=0.05, help='node response delay in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
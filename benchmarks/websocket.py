@@ -0,0 +1,93 @@
+"""
+Offline benchmark of the WebSocket transport against the in-process mock JSON-RPC node.
+
+Sends `--transactions` transactions and waits for their receipts, once with the HTTP provider and the polling receipt
+tracker (`rpc_batch=True`) and once over WebSocket with pushed `newHeads` (`websocket=True`), and reports the receipt
+latency after the inclusion block and the JSON-RPC calls of both. Then drops the node's WebSocket connections and checks
+that the client reconnects, renews the subscription and keeps delivering heads and receipts.
+
+Usage:
+    python benchmarks/websocket.py --transactions 100 --block-time 2 --latency 0.05
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_node import MockNode
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559
+
+ADDRESS_RECIPIENT = '0x' + '3c' * 20
+PRIVATE_KEY = '0x' + '11' * 32
+
+
+def get_requests(node: MockNode) -> int:
+    return sum(node.get_counters()['calls'].values())
+
+
+async def measure(my_web3: MyWeb3, node: MockNode, transactions: int) -> dict:
+    status, results = await my_web3.send_transactions_many([{'address_to': ADDRESS_RECIPIENT, 'value': 1}] * transactions)
+    assert status == 0, results
+    hashes = [result for status, result in results if status == 0]
+    block_number = node.block_number + 1
+    blocks = {}
+
+    async def wait(transaction_hash) -> float:
+        status, result = await my_web3.verify_transaction(transaction_hash)
+        assert status == 0, result
+        return time.perf_counter()
+
+    async def watch_blocks():
+        while node.block_number < block_number:
+            await asyncio.sleep(0.001)
+        blocks[block_number] = time.perf_counter()
+
+    requests = get_requests(node)
+    watcher = asyncio.ensure_future(watch_blocks())
+    times = await asyncio.gather(*[wait(transaction_hash) for transaction_hash in hashes])
+    await watcher
+    delays = [(t - blocks[block_number]) * 1000 for t in times]
+    return {'delay_p50': statistics.median(delays), 'delay_max': max(delays), 'requests': get_requests(node) - requests}
+
+
+async def run(args: argparse.Namespace):
+    node = MockNode(latency=args.latency, block_time=args.block_time)
+    url = node.start()
+    network = Network(name='Mock', rpc=url, ws=node.ws_url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+
+    for name, kwargs in [('http polling', {'async_provider': True, 'rpc_batch': True}), ('websocket push', {'websocket': True})]:
+        my_web3 = MyWeb3(network=network, private_key=PRIVATE_KEY, nonce_manager=True, **kwargs)
+        await asyncio.sleep(args.block_time)  # The subscription is set up and the next block starts a fresh cycle.
+        result = await measure(my_web3, node, args.transactions)
+        print(f"{name:14} | receipt after block p50 {result['delay_p50']:7.1f} ms | max {result['delay_max']:7.1f} ms | {result['requests']} requests")
+
+    client = my_web3.engine.ws_client
+    heads = []
+    client.subscribe_new_heads(lambda head: heads.append(int(head['number'], 16)))
+    node.drop_websockets()
+    time_start = time.perf_counter()
+    while not heads or (client.reconnects == 0):
+        await asyncio.sleep(0.01)
+    print(f'reconnect | {client.reconnects} reconnects | first head after drop {time.perf_counter() - time_start:.2f} s | block {heads[0]}')
+    result = await measure(my_web3, node, args.transactions)
+    print(f"after reconnect | receipt after block p50 {result['delay_p50']:7.1f} ms | {result['requests']} requests")
+
+    await client.close()
+    await PROVIDERS.close()
+    node.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the WebSocket transport against a mock JSON-RPC node.')
+    parser.add_argument('--transactions', type=int, default=100, help='number of transactions per run')
+    parser.add_argument('--block-time', type=float, default=2, help='time between blocks in seconds')
+    parser.add_argument('--latency', type=float, default=0.05, help='node response delay in seconds')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,39 @@
-from .myweb3 import MyWeb3
 from .models.coin import *
 from .models.token import *
 from .models.txtype import *
+from .models.feestrategy import *
 from .models.network import *
+
+import types
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    'MyWeb3': '.myweb3',
+    'PROVIDERS': '.providers',
+    'ProviderRegistry': '.providers',
+    'SigningPool': '.signing',
+    'Metrics': '.metrics',
+    'InMemoryMetrics': '.metrics',
+    'PrometheusMetrics': '.metrics',
+    'OpenTelemetryMetrics': '.metrics',
+    'get_metrics': '.metrics',
+    'set_metrics': '.metrics',
+    'TransferScanner': '.transfers',
+    'scan_transfers': '.transfers',
+    'get_transfer_scanners': '.transfers',
+    'PortfolioIndex': '.portfolio',
+    'scan_balances': '.portfolio',
+    'WebSocketClient': '.websocket',
+    'get_ws_client': '.websocket',
+    'TransactionJournal': '.journal',
+}
+
+__all__ = [name for name, value in globals().items() if not (name.startswith('_') or isinstance(value, types.ModuleType))] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    # web3, aiohttp and the rest of the network stack are imported on first use, so importing models stays cheap.
+    if name in _LAZY_ATTRIBUTES:
+        value = globals()[name] = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
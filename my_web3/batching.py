@@ -0,0 +1,123 @@
+from .constants import *
+from .providers import PROVIDERS
+from .ratelimit import check_rate_limit
+from .metrics import KIND_RPC, get_metrics
+from .models.network import Network
+
+from typing import Any, Optional, Tuple, List, Dict
+
+import time
+import json
+import asyncio
+import itertools
+
+
+class RPCBatcher:
+    def __init__(
+            self,
+            network: Network,
+            proxy: Optional[str] = None,
+            window: float = RPC_BATCH_WINDOW,
+            max_size: int = RPC_BATCH_MAX_SIZE,
+    ):
+        """
+        Collects concurrent JSON-RPC requests and sends them to the network RPC as a single batch array.
+
+        A batch is flushed when `window` seconds passed since its first request or when it reaches `max_size` requests.
+        Each response is routed back to the awaiting caller by its request id.
+
+        :param network: Network of the requests (batches are routed over its RPC endpoints).
+        :param proxy: Proxy server address for redirecting API requests.
+        :param window: Time (in seconds) to wait for more requests before sending a batch.
+        :param max_size: Maximum number of requests in a single batch.
+        """
+        self.router = PROVIDERS.get_router(network=network)
+        self.proxy = PROVIDERS.get_proxy_url(proxy)
+        self.window = window
+        self.max_size = max_size
+        self._ids = itertools.count()
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def request(self, method: str, params: list) -> Any:
+        """Queues a JSON-RPC request and waits for its result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._reset(loop)
+        future = loop.create_future()
+        self._pending.append(({'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': params}, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _reset(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._pending = []
+        self._flush_handle = None
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._send(batch))
+
+    async def _send(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        futures = {payload['id']: future for payload, future in batch}
+        metrics = get_metrics()
+        time_start = time.perf_counter()
+        try:
+            request_data = json.dumps([payload for payload, _ in batch])
+            responses = json.loads(await self.router.request(lambda uri: self._post(uri=uri, request_data=request_data)))
+            if isinstance(responses, dict):
+                raise Exception(responses.get('error', responses))
+            for response in responses:
+                future = futures.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in response:
+                    future.set_exception(ValueError(response['error']))
+                else:
+                    future.set_result(response.get('result'))
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(Exception('missing response in batch'))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+        if metrics.enabled:
+            # Every request of the batch is observed with the duration of the whole batch.
+            duration = time.perf_counter() - time_start
+            for payload, future in batch:
+                error = None if future.cancelled() else future.exception()
+                if error is not None:
+                    error = 'JSONRPCError' if isinstance(error, ValueError) else type(error).__name__
+                metrics.observe(KIND_RPC, payload['method'], duration, error)
+
+    async def _post(self, uri: str, request_data: str) -> bytes:
+        async with PROVIDERS.get_async_session().post(
+                uri,
+                data=request_data,
+                headers={'Content-Type': 'application/json'},
+                proxy=self.proxy,
+        ) as response:
+            content = await response.read()
+            check_rate_limit(status=response.status, headers=response.headers, content=content)
+            response.raise_for_status()
+            return content
+
+
+_batchers: Dict[Tuple[Tuple[str, ...], Optional[str]], RPCBatcher] = {}
+
+
+def get_batcher(network: Network, proxy: Optional[str] = None) -> RPCBatcher:
+    """Returns the process-wide batcher of the network, so concurrent wallets share batches."""
+    key = (tuple(network.rpcs), proxy)
+    if key not in _batchers:
+        _batchers[key] = RPCBatcher(network=network, proxy=proxy)
+    return _batchers[key]
@@ -1,6 +1,118 @@
-FILENAME_ABI_ERC20 = 'my_web3/abis/ERC20.json'
+FILENAME_ABI_ERC20 = 'abis/ERC20.json'
+FILENAME_ABI_MULTICALL3 = 'abis/Multicall3.json'
+FILENAME_ABI_L1_FEE_ORACLE = 'abis/L1FeeOracle.json'
 AMOUNT_TOKENS_ALL = 115792089237316195423570985008687907853269984665640564039457584007913129639935
 ADDRESS_ZERO = '0x0000000000000000000000000000000000000000'
+ADDRESS_MULTICALL3 = '0xcA11bde05977b3631167028862bE2a173976CA11'
+ADDRESS_DISPERSE = '0xD152f549545093347A162Dce210e7293f1452150'
+ADDRESS_L1_FEE_ORACLE_OP_STACK = '0x420000000000000000000000000000000000000F'
+ADDRESS_L1_FEE_ORACLE_SCROLL = '0x5300000000000000000000000000000000000002'
 TIMEOUT = 1000
+MULTICALL_CHUNK_SIZE = 500
 ERROR_INSUFFICIENT_FUNDS = 'insufficient funds'
 ERROR_GAS_REQUIRED_EXCEEDS_ALLOWANCE = 'gas required exceeds allowance'
+STEP_WITHDRAW = 0.0000001
+RPC_BATCH_WINDOW = 0.01
+RPC_BATCH_MAX_SIZE = 100
+RECEIPT_POLL_LATENCY = 1
+PROVIDER_POOL_CONNECTIONS = 16
+PROVIDER_POOL_MAXSIZE = 32
+PROVIDER_KEEPALIVE_TIMEOUT = 60
+PROVIDER_REQUEST_TIMEOUT = 10
+NONCE_RETRIES = 3
+ERROR_NONCE_TOO_LOW = 'nonce too low'
+ERROR_REPLACEMENT_UNDERPRICED = 'replacement transaction underpriced'
+ERROR_INTRINSIC_GAS_TOO_LOW = 'intrinsic gas too low'
+ERROR_OUT_OF_GAS = 'out of gas'
+FEE_ORACLE_TTL = 2
+FEE_HISTORY_BLOCKS = 5
+FEE_HISTORY_PERCENTILES = [10, 25, 50, 75, 90]
+GAS_WATCHER_INTERVAL = 5
+SYNC_EXECUTOR_MAX_WORKERS = 64
+RECEIPT_TRACKER_INTERVAL = 1
+RECEIPT_TRACKER_BLOCK_RECEIPTS_MAX_BLOCKS = 3
+ROUTER_EWMA_ALPHA = 0.2
+ROUTER_ERROR_PENALTY = 10
+ROUTER_ERROR_THRESHOLD = 0.5
+ROUTER_COOLDOWN = 30
+ROUTER_HEDGE_DELAY_MIN = 0.2
+ROUTER_HEDGE_LATENCY_FACTOR = 3
+ROUTER_WRITE_METHODS = ['eth_sendRawTransaction', 'eth_sendTransaction']
+ERROR_ALREADY_KNOWN = 'already known'
+RATE_LIMIT_RATE = 50
+RATE_LIMIT_RATE_MIN = 1
+RATE_LIMIT_RATE_MAX = 1000
+RATE_LIMIT_RATE_INCREASE = 0.2
+RATE_LIMIT_CONCURRENCY = 16
+RATE_LIMIT_CONCURRENCY_MAX = 64
+RATE_LIMIT_CONCURRENCY_INCREASE = 1
+RATE_LIMIT_DECREASE = 0.7
+RATE_LIMIT_BACKOFF = 1
+RATE_LIMIT_WAIT_MAX = 0.1
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_ERROR_SIZE_MAX = 1024
+ERRORS_RATE_LIMIT = ['rate limit', 'too many requests', 'request limit', 'capacity exceeded', '-32005']
+SWEEP_L1_FEE_MULTIPLIER = 1.25
+SIGNING_CHUNK_SIZE = 64
+WALLETS_PATH_PARENT = "m/44'/60'/0'/0"
+WALLETS_CHUNK_SIZE = 256
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+GAS_PROFILE_MARGIN = 1.5
+GAS_PROFILE_MIN_SAMPLES = 2
+GAS_PROFILE_TTL = 600
+GAS_PROFILE_SENT_MAX = 10000
+GAS_PROFILE_CODES_MAX = 100000
+GAS_PROFILE_OUT_OF_GAS_RATIO = 0.98
+STATE_SNAPSHOT_TTL = 2
+TOPIC_TRANSFER = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+TOPIC_DEPOSIT = '0xe1fffcc4923d04b559f4d29a8bfc6cda04eb5b0d3c460751c2402c5c5cc9109c'
+TOPIC_WITHDRAWAL = '0x7fcf532c15f0a6db0bd6d0e038bea71d30d808c7d98cb3bf7268a95bf5081b65'
+LOGS_CHUNK_SIZE = 2000
+LOGS_CHUNK_SIZE_MIN = 1
+LOGS_CHUNK_SIZE_MAX = 100000
+LOGS_CHUNK_SIZE_PROBE = 0.05
+LOGS_RESULTS_TARGET = 5000
+LOGS_CONCURRENCY = 4
+LOGS_ADDRESSES_CHUNK_SIZE = 500
+LOGS_RETRIES = 3
+LOGS_RETRY_DELAY = 0.5
+ERRORS_LOGS_RANGE = [
+    'query returned more than',  # geth, Infura
+    'block range',  # "block range is too wide", "exceed maximum block range"
+    'range is too large',
+    'range too large',
+    'response size exceeded',  # Alchemy
+    'eth_getlogs is limited to',  # QuickNode
+    'query exceeds max results',  # op-geth
+    'logs matched by query exceeds limit',  # Erigon
+]
+ERROR_CODES_LOGS_RANGE = (-32005, )
+STREAMS_QUEUE_SIZE = 1000
+PORTFOLIO_CONFIRMATIONS = 12
+PORTFOLIO_SYNC_INTERVAL = 10
+PORTFOLIO_COMMIT_SIZE = 10000
+PORTFOLIO_QUERY_CHUNK_SIZE = 500
+PORTFOLIO_BLOCKS_CONCURRENCY = 8
+PORTFOLIO_RECONCILE_INTERVAL = 3600
+SELECTOR_AGGREGATE3 = '0x82ad56cb'
+SELECTOR_BALANCE_OF = '0x70a08231'
+SELECTOR_GET_ETH_BALANCE = '0x4d2301cc'
+SELECTOR_GET_BLOCK_NUMBER = '0x42cbb15c'
+PORTFOLIO_SCAN_CONCURRENCY = 4
+PORTFOLIO_SCAN_TIMEOUT = 30
+WS_RECONNECT_DELAY = 0.5
+WS_RECONNECT_DELAY_MAX = 30
+WS_HEARTBEAT = 20
+WS_FALLBACK_INTERVAL = 10
+SELECTOR_DISPERSE_ETHER = '0xe63d38ed'
+SELECTOR_DISPERSE_TOKEN = '0xc73a2d60'
+DISPERSE_CHUNK_SIZE = 500
+DISPERSE_BLOCK_GAS_SHARE = 0.3
+DISPERSE_GAS_MAX = 16777216
+JOURNAL_PENDING = 'pending'
+JOURNAL_INCLUDED = 'included'
+JOURNAL_DROPPED = 'dropped'
+JOURNAL_BUMP_BLOCKS = 3
+JOURNAL_FEE_BUMP = 0.125
+JOURNAL_FEE_BUMP_MIN = 0.1
+JOURNAL_INTERVAL = 1
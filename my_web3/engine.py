@@ -0,0 +1,132 @@
+from .constants import *
+from .providers import PROVIDERS
+from .batching import RPCBatcher, get_batcher
+from .receipts import ReceiptTracker, get_receipt_tracker
+from .fees import FeeOracle, get_fee_oracle
+from .gaswatcher import GasWatcher, get_gas_watcher
+from .gasprofiles import GasProfileCache
+from .websocket import WebSocketClient, Subscription, get_ws_client
+from .utils import afh
+from .models.network import Network
+
+from typing import Optional, Tuple, List, Dict
+from web3.eth import Contract
+
+import copy
+import asyncio
+import threading
+
+from web3 import Web3
+
+
+class Engine:
+    def __init__(
+            self,
+            network: Network,
+            proxy: Optional[str] = None,
+            async_provider: Optional[bool] = False,
+            rpc_batch: Optional[bool] = False,
+            websocket: Optional[bool] = False,
+    ):
+        """
+        Per-network state shared by all wallets: `Web3` instances, contract objects, batcher, receipt tracker, fee oracle and gas profiles.
+
+        Wallet handles (`MyWeb3`) only keep their key and settings, so thousands of wallets on one network cost
+        one provider stack and one contract object per (ABI, address).
+
+        :param network: Network of the engine.
+        :param proxy: Proxy server address for redirecting API requests.
+        :param async_provider: Uses the async provider.
+        :param rpc_batch: Uses the shared JSON-RPC batcher and receipt tracker.
+        :param websocket: Sends requests over the network WebSocket connection and tracks receipts with the shared receipt tracker.
+        """
+        self.network = network
+        self.proxy = proxy
+        self.async_provider = async_provider or websocket
+        self.rpc_batch = rpc_batch
+        self.websocket = websocket
+        self.w3 = PROVIDERS.get_w3(network=network, proxy=proxy, async_provider=async_provider, websocket=websocket)
+        self.w3_poa = PROVIDERS.get_w3(network=network, proxy=proxy, async_provider=async_provider, poa_middleware=True, websocket=websocket)
+        self.batcher: Optional[RPCBatcher] = get_batcher(network=network, proxy=proxy) if rpc_batch else None
+        self.receipt_tracker: Optional[ReceiptTracker] = get_receipt_tracker(network=network, proxy=proxy) if (rpc_batch or websocket) else None
+        self.ws_client: Optional[WebSocketClient] = get_ws_client(network=network, proxy=proxy) if websocket else None
+        self.gas_watcher: Optional[GasWatcher] = get_gas_watcher(network=network, proxy=proxy) if websocket else None
+        self._heads: Optional[Subscription] = None
+        self.fee_oracle: FeeOracle = get_fee_oracle(network=network)
+        self.gas_profile_cache = GasProfileCache()
+        self.block_number: Optional[int] = None
+        self._contracts: Dict[Tuple[int, str], Contract] = {}
+
+    def on_new_block(self, block_number: int):
+        """Reports a new head block: expires cached fees and state snapshots and wakes up the receipt tracker and the gas watcher."""
+        if (self.block_number is None) or (block_number > self.block_number):
+            self.block_number = block_number
+        self.fee_oracle.on_new_block(block_number)
+        if self.receipt_tracker is not None:
+            self.receipt_tracker.on_new_block(block_number)
+        if self.gas_watcher is not None:
+            self.gas_watcher.on_new_block(block_number)
+
+    def watch_heads(self) -> bool:
+        """
+        Subscribes to `newHeads` of the network WebSocket connection (once, in a running event loop), so new blocks
+        expire caches and wake up the receipt tracker as soon as they are pushed. Returns whether the heads are watched.
+        """
+        if self.ws_client is None:
+            return False
+        if self._heads is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return False
+            self._heads = self.ws_client.subscribe_new_heads(self._on_head)
+            self.receipt_tracker.pushed = True
+            self.gas_watcher.pushed = True
+        return True
+
+    def _on_head(self, head: dict):
+        self.on_new_block(int(head['number'], 16))
+
+    async def request(self, method: str, params: list):
+        """Sends a raw JSON-RPC request and returns its unformatted result (web3 result formatters are skipped)."""
+        response = await afh(self.w3.provider.make_request, self.async_provider, method, params)
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response['result']
+
+    def with_w3(self, w3: Web3) -> 'Engine':
+        """Returns a private copy of the engine whose provider calls and contracts use `w3` (batched requests still go to the network RPC)."""
+        engine = copy.copy(self)
+        engine.w3 = engine.w3_poa = w3
+        engine._contracts = {}
+        return engine
+
+    def get_contract(self, address: str, abi: List[dict]) -> Contract:
+        """Returns the shared contract object of the address (ABI processing is done once per ABI and address)."""
+        key = (id(abi), address.lower())
+        contract = self._contracts.get(key)
+        if contract is None:
+            contract = self._contracts[key] = self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+        return contract
+
+
+_engines: Dict[Tuple[Tuple[str, ...], int, Optional[str], bool, bool, bool], Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(
+        network: Network,
+        proxy: Optional[str] = None,
+        async_provider: Optional[bool] = False,
+        rpc_batch: Optional[bool] = False,
+        websocket: Optional[bool] = False,
+) -> Engine:
+    """Returns the process-wide engine of the network."""
+    key = (tuple(network.rpcs), network.chain_id, proxy, bool(async_provider) or bool(websocket), bool(rpc_batch), bool(websocket))
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = Engine(network=network, proxy=proxy, async_provider=async_provider, rpc_batch=rpc_batch, websocket=websocket)
+    return engine
@@ -0,0 +1,123 @@
+from .constants import *
+from .utils import afh, aah, LoopLock
+from .models.network import Network
+from .models.feestrategy import FeeStrategy
+
+from typing import Optional, Tuple, List, Dict
+
+import time
+
+from web3 import Web3
+
+
+class FeeData:
+    def __init__(self, block_number: int, base_fee: int, priority_fees: Dict[float, int]):
+        self.block_number = block_number
+        self.base_fee = base_fee
+        self.priority_fees = priority_fees
+
+
+class FeeOracle:
+    def __init__(
+            self,
+            network: Network,
+            ttl: float = FEE_ORACLE_TTL,
+            blocks: int = FEE_HISTORY_BLOCKS,
+            percentiles: Optional[List[float]] = None,
+    ):
+        """
+        Per-network fee cache shared by all wallets sending on the chain.
+
+        EIP-1559 fees are read with a single `eth_feeHistory` call (base fee of the next block and priority-fee percentiles
+        of the last `blocks` blocks) and reused until a new block arrives or `ttl` seconds pass. Legacy gas price is cached the same way.
+
+        :param network: Network of the oracle.
+        :param ttl: Time (in seconds) fees are cached when no new block was reported.
+        :param blocks: Number of blocks requested from `eth_feeHistory`.
+        :param percentiles: Priority-fee percentiles requested from `eth_feeHistory`.
+        """
+        self.network = network
+        self.ttl = ttl
+        self.blocks = blocks
+        self.percentiles = sorted(percentiles or FEE_HISTORY_PERCENTILES)
+        self._fee_data: Optional[FeeData] = None
+        self._fee_data_time = 0.
+        self._gas_price: Optional[int] = None
+        self._gas_price_time = 0.
+        self._lock = LoopLock()
+
+    async def get_EIP_1559_fees(self, w3: Web3, asynchrony: bool, strategy: FeeStrategy) -> Tuple[int, int]:
+        """Returns (max_priority_fee_per_gas, max_fee_per_gas) for the strategy."""
+        fee_data = await self.get_fee_data(w3=w3, asynchrony=asynchrony, percentile=strategy.percentile)
+        max_priority_fee_per_gas = fee_data.priority_fees[strategy.percentile]
+        max_fee_per_gas = max_priority_fee_per_gas + int(fee_data.base_fee * strategy.base_fee_multiplier)
+        return max_priority_fee_per_gas, max_fee_per_gas
+
+    async def get_fee_data(self, w3: Web3, asynchrony: bool, percentile: Optional[float] = None) -> FeeData:
+        """Returns cached fee data, fetching it once per block."""
+        if (percentile is not None) and (percentile not in self.percentiles):
+            self.percentiles = sorted(self.percentiles + [percentile])
+            self._fee_data = None
+        if self._is_fee_data_usable(percentile):
+            return self._fee_data
+        async with self._lock.get():
+            # A fetch running while the percentile was added returned fee data without it, so it is fetched again.
+            if not self._is_fee_data_usable(percentile):
+                self._fee_data = await self._fetch_fee_data(w3=w3, asynchrony=asynchrony)
+                self._fee_data_time = time.monotonic()
+            return self._fee_data
+
+    async def get_gas_price(self, w3: Web3, asynchrony: bool) -> int:
+        """Returns cached legacy gas price, fetching it once per block."""
+        if self._is_fresh(self._gas_price, self._gas_price_time):
+            return self._gas_price
+        async with self._lock.get():
+            if not self._is_fresh(self._gas_price, self._gas_price_time):
+                self._gas_price = int(await aah(w3.eth, 'gas_price', asynchrony))
+                self._gas_price_time = time.monotonic()
+            return self._gas_price
+
+    def on_new_block(self, block_number: int):
+        """Expires cached fees when a block newer than the cached one is reported."""
+        if (self._fee_data is None) or (block_number > self._fee_data.block_number):
+            self._fee_data_time = 0.
+            self._gas_price_time = 0.
+
+    def _is_fresh(self, value, value_time: float) -> bool:
+        return (value is not None) and (time.monotonic() - value_time < self.ttl)
+
+    def _is_fee_data_usable(self, percentile: Optional[float]) -> bool:
+        return self._is_fresh(self._fee_data, self._fee_data_time) and ((percentile is None) or (percentile in self._fee_data.priority_fees))
+
+    async def _fetch_fee_data(self, w3: Web3, asynchrony: bool) -> FeeData:
+        percentiles = list(self.percentiles)
+        try:
+            history = await afh(w3.eth.fee_history, asynchrony, self.blocks, 'latest', percentiles)
+            block_number = history['oldestBlock'] + len(history['gasUsedRatio']) - 1
+            base_fee = int(history['baseFeePerGas'][-1])
+            priority_fees = {}
+            for i, percentile in enumerate(percentiles):
+                rewards = sorted(int(reward[i]) for reward in history.get('reward', []) if int(reward[i]) > 0)
+                if rewards:
+                    priority_fees[percentile] = rewards[len(rewards) // 2]
+            if len(priority_fees) < len(percentiles):
+                max_priority_fee = int(await aah(w3.eth, 'max_priority_fee', asynchrony))
+                for percentile in percentiles:
+                    priority_fees.setdefault(percentile, max_priority_fee)
+        except Exception:
+            block = await afh(w3.eth.get_block, asynchrony, 'latest')
+            block_number = block['number']
+            base_fee = int(block['baseFeePerGas'])
+            max_priority_fee = int(await aah(w3.eth, 'max_priority_fee', asynchrony))
+            priority_fees = {percentile: max_priority_fee for percentile in percentiles}
+        return FeeData(block_number=block_number, base_fee=base_fee, priority_fees=priority_fees)
+
+
+_fee_oracles: Dict[int, FeeOracle] = {}
+
+
+def get_fee_oracle(network: Network) -> FeeOracle:
+    """Returns the process-wide fee oracle of the network."""
+    if network.chain_id not in _fee_oracles:
+        _fee_oracles[network.chain_id] = FeeOracle(network=network)
+    return _fee_oracles[network.chain_id]
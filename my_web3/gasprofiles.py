@@ -0,0 +1,111 @@
+from .constants import *
+
+from typing import Optional, Tuple, Dict
+
+import time
+import collections
+
+from web3 import Web3
+
+GasProfileKey = Tuple[str, str]
+
+
+class GasProfile:
+    def __init__(self):
+        self.gas = 0
+        self.samples = 0
+        self.time_updated = 0.
+
+
+class GasProfileCache:
+    def __init__(
+            self,
+            margin: float = GAS_PROFILE_MARGIN,
+            min_samples: int = GAS_PROFILE_MIN_SAMPLES,
+            ttl: float = GAS_PROFILE_TTL,
+            sent_max: int = GAS_PROFILE_SENT_MAX,
+    ):
+        """
+        Per-network gas limits learned for repetitive transactions, keyed by (target address, function selector).
+        Plain transfers (without data) to accounts without code share one profile whatever the recipient, so payouts to many
+        addresses are learned too; a plain transfer to a recipient with code runs its fallback and is keyed by the recipient.
+        Whether a recipient has code is looked up once (`set_code`) before its first profiled transfer.
+
+        Each profile keeps the maximum gas seen in `eth_estimateGas` results and in receipts of sent transactions; once it has
+        `min_samples` observations, `margin` times that maximum is used as the gas limit instead of estimating. Profiles older
+        than `ttl` seconds are refreshed by the next estimate, and a transaction that ran out of gas invalidates its profile.
+
+        Skipping the estimate also skips its revert check: a transaction that would revert is sent anyway, is included
+        with a failed status and pays for the gas it used.
+
+        :param margin: Multiplier applied to the maximum observed gas.
+        :param min_samples: Number of observations required before the profile is used.
+        :param ttl: Time (in seconds) a profile is used without a new observation.
+        :param sent_max: Maximum number of sent transactions remembered until their receipts are observed.
+        """
+        self.margin = margin
+        self.min_samples = min_samples
+        self.ttl = ttl
+        self.sent_max = sent_max
+        self._profiles: Dict[GasProfileKey, GasProfile] = {}
+        self._sent: 'collections.OrderedDict[str, Tuple[GasProfileKey, int]]' = collections.OrderedDict()
+        self._codes: 'collections.OrderedDict[str, bool]' = collections.OrderedDict()
+
+    def get_key(self, tx: dict) -> GasProfileKey:
+        data = tx.get('data')
+        if not data:
+            # A recipient whose code is unknown is keyed as a contract, so it never raises the shared transfer profile.
+            address = tx['to'].lower()
+            return ('', '') if self._codes.get(address) is False else (address, '')
+        selector = data[:10] if isinstance(data, str) else Web3.to_hex(data[:4])
+        return tx['to'].lower(), selector.lower()
+
+    def get_gas(self, tx: dict) -> Optional[int]:
+        """Returns the learned gas limit of the transaction, or None if it has to be estimated."""
+        profile = self._profiles.get(self.get_key(tx))
+        if (profile is None) or (profile.samples < self.min_samples) or (time.monotonic() - profile.time_updated > self.ttl):
+            return None
+        return int(profile.gas * self.margin)
+
+    def is_code_known(self, tx: dict) -> bool:
+        """Returns False for a plain transfer to a recipient whose code has not been looked up yet."""
+        return bool(tx.get('data')) or (tx['to'].lower() in self._codes)
+
+    def set_code(self, address: str, code: bool):
+        """Records whether the address has code (a contract or a delegated account)."""
+        self._codes[address.lower()] = code
+        while len(self._codes) > GAS_PROFILE_CODES_MAX:
+            self._codes.popitem(last=False)
+
+    def observe(self, tx: dict, gas: int):
+        """Records the estimated or used gas of the transaction."""
+        self._observe(key=self.get_key(tx), gas=gas)
+
+    def invalidate(self, tx: dict):
+        self._profiles.pop(self.get_key(tx), None)
+
+    def track(self, transaction_hash: str, tx: dict):
+        """Remembers a sent transaction, so its receipt is attributed to its profile."""
+        self._sent[transaction_hash.lower()] = (self.get_key(tx), tx['gas'])
+        while len(self._sent) > self.sent_max:
+            self._sent.popitem(last=False)
+
+    def observe_receipt(self, transaction_hash: str, status: int, gas_used: int):
+        """Learns from the receipt of a tracked transaction."""
+        sent = self._sent.pop(transaction_hash.lower(), None)
+        if sent is None:
+            return
+        key, gas_limit = sent
+        if status == 1:
+            self._observe(key=key, gas=gas_used)
+        elif gas_used >= gas_limit * GAS_PROFILE_OUT_OF_GAS_RATIO:
+            # A failed transaction which used (almost) all of its gas ran out of it: the profile is too low.
+            self._profiles.pop(key, None)
+
+    def _observe(self, key: GasProfileKey, gas: int):
+        profile = self._profiles.get(key)
+        if profile is None:
+            profile = self._profiles[key] = GasProfile()
+        profile.gas = max(profile.gas, int(gas))
+        profile.samples += 1
+        profile.time_updated = time.monotonic()
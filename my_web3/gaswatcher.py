@@ -0,0 +1,101 @@
+from .constants import *
+from .providers import PROVIDERS
+from .fees import get_fee_oracle
+from .models.network import Network
+
+from typing import Optional, Tuple, List, Dict
+
+import time
+import asyncio
+
+from web3 import Web3
+
+
+class GasWatcher:
+    def __init__(self, network: Network, proxy: Optional[str] = None, interval: float = GAS_WATCHER_INTERVAL):
+        """
+        Single background watcher of the network gas price shared by all waiting transactions.
+
+        The price is polled once per `interval` while there are waiters; every waiter whose limit is reached
+        is released at the same moment. When heads are pushed (`pushed`, e.g. by a `newHeads` subscription), it is
+        polled once per new block instead (and once per `WS_FALLBACK_INTERVAL` as a fallback).
+
+        :param network: Network whose gas price is watched.
+        :param proxy: Proxy server address for redirecting API requests.
+        :param interval: Time (in seconds) between gas price polls.
+        """
+        self.network = network
+        self.proxy = proxy
+        self.interval = interval
+        self.gas_price_gwei: Optional[int] = None
+        self._gas_price_time = 0.
+        self.pushed = False
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._new_block = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def wait_below(self, gas_gwei_max: int) -> int:
+        """Waits until the gas price (in Gwei) is not greater than `gas_gwei_max` and returns it."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = []
+            self._new_block = asyncio.Event()
+            self._task = None
+        if (self.gas_price_gwei is not None) and (time.monotonic() - self._gas_price_time < self.interval) and (self.gas_price_gwei <= gas_gwei_max):
+            return self.gas_price_gwei
+        future = loop.create_future()
+        self._waiters.append((gas_gwei_max, future))
+        if (self._task is None) or self._task.done():
+            self._task = loop.create_task(self._run())
+        return await future
+
+    def on_gas_price(self, gas_price_gwei: int):
+        """Updates the gas price and releases the waiters whose limit is reached."""
+        self.gas_price_gwei = gas_price_gwei
+        self._gas_price_time = time.monotonic()
+        waiters = []
+        for gas_gwei_max, future in self._waiters:
+            if future.done():
+                continue
+            if gas_price_gwei <= gas_gwei_max:
+                future.set_result(gas_price_gwei)
+            else:
+                waiters.append((gas_gwei_max, future))
+        self._waiters = waiters
+
+    def on_new_block(self, block_number: int):
+        """Reports a new head block, so the price is polled without waiting for the interval."""
+        self._new_block.set()
+
+    async def _run(self):
+        w3 = PROVIDERS.get_w3(network=self.network, proxy=self.proxy, async_provider=True)
+        fee_oracle = get_fee_oracle(network=self.network)
+        while self._waiters:
+            try:
+                gas_price = await fee_oracle.get_gas_price(w3=w3, asynchrony=True)
+            except Exception as e:
+                waiters, self._waiters = self._waiters, []
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.on_gas_price(int(Web3.from_wei(gas_price, 'gwei')))
+            if self._waiters:
+                self._new_block.clear()
+                try:
+                    await asyncio.wait_for(self._new_block.wait(), timeout=WS_FALLBACK_INTERVAL if self.pushed else self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+
+_gas_watchers: Dict[Tuple[int, Optional[str]], GasWatcher] = {}
+
+
+def get_gas_watcher(network: Network, proxy: Optional[str] = None) -> GasWatcher:
+    """Returns the process-wide gas watcher of the network."""
+    key = (network.chain_id, proxy)
+    if key not in _gas_watchers:
+        _gas_watchers[key] = GasWatcher(network=network, proxy=proxy)
+    return _gas_watchers[key]
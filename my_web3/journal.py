@@ -0,0 +1,316 @@
+from .constants import *
+from .utils import afh
+from .batching import get_batcher
+from .models.receipt import Receipt
+from .models.journal import JournalEntry
+
+from typing import Optional, Tuple, List, Dict, TYPE_CHECKING
+from web3.exceptions import TimeExhausted
+
+import os
+import json
+import math
+import time
+import asyncio
+
+from web3 import Web3
+
+if TYPE_CHECKING:
+    from .myweb3 import MyWeb3
+
+
+class TransactionJournal:
+    def __init__(
+            self,
+            path: str,
+            blocks: int = JOURNAL_BUMP_BLOCKS,
+            fee_bump: float = JOURNAL_FEE_BUMP,
+            fee_max: Optional[int] = None,
+            interval: float = JOURNAL_INTERVAL,
+            fsync: bool = False,
+    ):
+        """
+        Append-only journal (JSON lines) of sent transactions with a background accelerator of stuck ones.
+
+        Every transaction sent by a `MyWeb3(journal=...)` wallet is appended with its nonce, fee parameters and raw payload;
+        replacements, inclusions and dropped nonces are appended as further events, and the state is restored from the file
+        on start. While transactions are pending, the accelerator checks them on every new block: a transaction not included
+        after `blocks` blocks is re-signed with the same nonce and fees raised by `fee_bump` (and at least to the current
+        network fees), so its time to inclusion stays bounded when fees spike. Transactions of wallets without a private key
+        in this process (e.g. restored from the file) are rebroadcast unchanged. `MyWeb3.verify_transaction` follows the
+        replacements and returns the status of the included version.
+
+        :param path: Path of the journal file (created if missing).
+        :param blocks: Number of blocks a transaction may stay pending before it is replaced.
+        :param fee_bump: Relative fee increase of a replacement (nodes accept replacements raising fees by at least 10%).
+        :param fee_max: Maximum gas price / max fee per gas (in wei) of replacements; a transaction at the limit is only rebroadcast.
+        :param interval: Time (in seconds) between head block polls.
+        :param fsync: Forces every appended event to disk (otherwise it is flushed to the OS).
+        """
+        if fee_bump < JOURNAL_FEE_BUMP_MIN:
+            raise ValueError(f'fee_bump must be at least {JOURNAL_FEE_BUMP_MIN}: nodes reject smaller replacement bumps')
+        self.path = path
+        self.blocks = blocks
+        self.fee_bump = fee_bump
+        self.fee_max = fee_max
+        self.interval = interval
+        self.fsync = fsync
+        self.entries: Dict[Tuple[int, str, int], JournalEntry] = {}
+        self._hashes: Dict[str, JournalEntry] = {}
+        self._signers: Dict[Tuple[int, str], 'MyWeb3'] = {}
+        self._networks: Dict[int, 'MyWeb3'] = {}
+        self._block_numbers: Dict[int, int] = {}
+        self._waiters: Dict[Tuple[int, str, int], List[asyncio.Future]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._load()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def close(self):
+        self._file.close()
+
+    def get_pending(self, chain_id: Optional[int] = None) -> List[JournalEntry]:
+        """Returns the pending transactions (of one network)."""
+        return [
+            entry for entry in self.entries.values()
+            if (entry.status == JOURNAL_PENDING) and ((chain_id is None) or (entry.chain_id == chain_id))
+        ]
+
+    def get_entry(self, transaction_hash: str) -> Optional[JournalEntry]:
+        """Returns the entry of a transaction by the hash of any of its versions."""
+        return self._hashes.get(transaction_hash.lower())
+
+    def attach(self, my_web3: 'MyWeb3'):
+        """Lets the accelerator query the wallet network and re-sign the wallet transactions (including ones restored from the file)."""
+        self._networks.setdefault(my_web3.network.chain_id, my_web3)
+        if my_web3.private_key is not None:
+            self._signers[(my_web3.network.chain_id, my_web3.address.lower())] = my_web3
+
+    def record_sent(self, my_web3: 'MyWeb3', tx: dict, raw_transaction: bytes, transaction_hash: bytes, sweep: bool = False):
+        """Appends a transaction sent by the wallet and starts the accelerator (`sweep`: the transaction sends the whole balance)."""
+        chain_id, address = my_web3.network.chain_id, tx['from'].lower()
+        if (my_web3.private_key is not None) and ((chain_id, address) not in self._signers):
+            self._signers[(chain_id, address)] = my_web3
+        self._networks.setdefault(chain_id, my_web3)
+        tx, raw_transaction, transaction_hash = self._to_json(tx), Web3.to_hex(raw_transaction), Web3.to_hex(transaction_hash).lower()
+        entry = self.entries.get((chain_id, address, tx['nonce']))
+        if (entry is None) or (entry.status != JOURNAL_PENDING):
+            # A new transaction, or a nonce reused after the previous one was dropped.
+            entry = self.entries[(chain_id, address, tx['nonce'])] = JournalEntry(
+                chain_id=chain_id, address=address, nonce=tx['nonce'], tx=tx, raw_transaction=raw_transaction, transaction_hash=transaction_hash, sweep=sweep,
+            )
+            event = 'sent'
+        else:
+            entry.replace(tx=tx, raw_transaction=raw_transaction, transaction_hash=transaction_hash)
+            event = 'replaced'
+        self._hashes[transaction_hash] = entry
+        self._append({
+            'event': event, 'chain_id': chain_id, 'address': address, 'nonce': entry.nonce, 'hash': transaction_hash, 'tx': tx, 'raw': raw_transaction,
+            'sweep': entry.sweep,
+        })
+        self._start()
+
+    async def track(self, transaction_hash: str, timeout: float = TIMEOUT) -> Receipt:
+        """Waits until any version of the transaction is included and returns its receipt."""
+        entry = self.get_entry(transaction_hash)
+        if entry is None:
+            raise ValueError(f'Transaction {transaction_hash} is not in the journal')
+        self._start()
+        if entry.status == JOURNAL_DROPPED:
+            raise Exception(f'nonce {entry.nonce} of {entry.address} was used by a transaction outside the journal')
+        future = self._loop.create_future()
+        self._waiters.setdefault(entry.key, []).append(future)
+        if entry.status == JOURNAL_INCLUDED:
+            # The receipt is not kept in the journal, so it is fetched once more.
+            self._loop.create_task(self._resolve_included(entry))
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(f'Transaction {transaction_hash} is not in the chain after {timeout} seconds')
+
+    def _start(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = {}
+            self._task = None
+        if (self._task is None) or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            chain_ids = {entry.chain_id for entry in self.get_pending() if entry.chain_id in self._networks}
+            if not chain_ids:
+                return
+            await asyncio.gather(*[self._check_network(chain_id) for chain_id in chain_ids], return_exceptions=True)
+            await asyncio.sleep(self.interval)
+
+    async def _check_network(self, chain_id: int):
+        batcher = self._get_batcher(chain_id)
+        block_number = int(await batcher.request('eth_blockNumber', []), 16)
+        if self._block_numbers.get(chain_id) == block_number:
+            return
+        self._block_numbers[chain_id] = block_number
+        entries = self.get_pending(chain_id)
+        await asyncio.gather(*[self._check_receipts(entry) for entry in entries])
+        stuck = []
+        for entry in entries:
+            if entry.status != JOURNAL_PENDING:
+                continue
+            if entry.block_number is None:
+                entry.block_number = block_number
+            elif block_number - entry.block_number >= self.blocks:
+                stuck.append(entry)
+        await asyncio.gather(*[self._accelerate(entry, block_number=block_number) for entry in stuck], return_exceptions=True)
+
+    async def _check_receipts(self, entry: JournalEntry) -> bool:
+        receipts = await asyncio.gather(*[
+            self._get_batcher(entry.chain_id).request('eth_getTransactionReceipt', [transaction_hash]) for transaction_hash in entry.hashes
+        ], return_exceptions=True)
+        for receipt in receipts:
+            if isinstance(receipt, dict):
+                self._on_included(entry, receipt)
+                return True
+        return False
+
+    async def _accelerate(self, entry: JournalEntry, block_number: int):
+        batcher = self._get_batcher(entry.chain_id)
+        nonce = int(await batcher.request('eth_getTransactionCount', [entry.address, 'latest']), 16)
+        if nonce > entry.nonce:
+            # The nonce is used: by a version whose receipt was not visible a moment ago, or by another transaction.
+            if not await self._check_receipts(entry):
+                self._on_dropped(entry)
+            return
+        my_web3 = self._signers.get((entry.chain_id, entry.address))
+        tx = None
+        if my_web3 is not None:
+            status, result = await my_web3.get_fees()
+            if status != 0:
+                return  # Retried on the next block.
+            tx = self._get_tx_bumped(entry.tx, result, sweep=entry.sweep)
+        entry.block_number = block_number
+        if tx is None:
+            # Without the key, above the fee limit or with a sweep whose balance does not cover higher fees, the transaction
+            # can only be rebroadcast, in case the node dropped it.
+            try:
+                await batcher.request('eth_sendRawTransaction', [entry.raw_transaction])
+            except Exception:
+                pass
+            return
+        sign = my_web3.w3.eth.account.sign_transaction(tx, my_web3.private_key)
+        try:
+            transaction_hash = await afh(my_web3.w3.eth.send_raw_transaction, my_web3.async_provider, sign.rawTransaction)
+        except Exception as e:
+            if ERROR_REPLACEMENT_UNDERPRICED in str(e):
+                entry.tx = tx  # The next replacement is bumped from these fees.
+            return
+        self.record_sent(my_web3=my_web3, tx=tx, raw_transaction=sign.rawTransaction, transaction_hash=transaction_hash)
+        entry.block_number = block_number
+
+    def _get_tx_bumped(self, tx: dict, fees: dict, sweep: bool = False) -> Optional[dict]:
+        """
+        Returns the transaction with fees raised by `fee_bump` (and at least to `fees`), or None if `fee_max` does not allow a valid bump.
+
+        The value of a sweep is lowered by the increase of its maximum fee (gas * fee), so the balance still covers it; None if nothing is left.
+        """
+        fee_total = tx['gas'] * tx.get('maxFeePerGas', tx.get('gasPrice', 0))
+        tx = dict(tx)
+        if 'gasPrice' in tx:
+            fields = {'gasPrice': fees.get('gasPrice', fees.get('maxFeePerGas', 0))}
+        else:
+            fields = {
+                'maxPriorityFeePerGas': fees.get('maxPriorityFeePerGas', fees.get('gasPrice', 0)),
+                'maxFeePerGas': fees.get('maxFeePerGas', fees.get('gasPrice', 0)),
+            }
+        for field, fee in fields.items():
+            fee_bumped = max(math.ceil(tx[field] * (1 + self.fee_bump)), fee)
+            if self.fee_max is not None:
+                fee_bumped = min(fee_bumped, self.fee_max)
+                if fee_bumped < math.ceil(tx[field] * (1 + JOURNAL_FEE_BUMP_MIN)):
+                    return None
+            tx[field] = fee_bumped
+        if 'maxFeePerGas' in tx:
+            tx['maxFeePerGas'] = max(tx['maxFeePerGas'], tx['maxPriorityFeePerGas'])
+        if sweep:
+            tx['value'] = tx.get('value', 0) - (tx['gas'] * tx.get('maxFeePerGas', tx.get('gasPrice', 0)) - fee_total)
+            if tx['value'] <= 0:
+                return None
+        return tx
+
+    def _on_included(self, entry: JournalEntry, receipt: dict):
+        entry.status = JOURNAL_INCLUDED
+        entry.transaction_hash = receipt['transactionHash'].lower()
+        entry.receipt_status = int(receipt.get('status', '0x0'), 16)
+        self._append({
+            'event': JOURNAL_INCLUDED, 'chain_id': entry.chain_id, 'address': entry.address, 'nonce': entry.nonce,
+            'hash': entry.transaction_hash, 'status': entry.receipt_status, 'block_number': int(receipt['blockNumber'], 16),
+        })
+        self._resolve(entry, receipt)
+
+    def _resolve(self, entry: JournalEntry, receipt: dict):
+        for future in self._waiters.pop(entry.key, []):
+            if not future.done():
+                future.set_result(Receipt.from_rpc(receipt))
+
+    def _on_dropped(self, entry: JournalEntry):
+        entry.status = JOURNAL_DROPPED
+        self._append({'event': JOURNAL_DROPPED, 'chain_id': entry.chain_id, 'address': entry.address, 'nonce': entry.nonce})
+        for future in self._waiters.pop(entry.key, []):
+            if not future.done():
+                future.set_exception(Exception(f'nonce {entry.nonce} of {entry.address} was used by a transaction outside the journal'))
+
+    async def _resolve_included(self, entry: JournalEntry):
+        try:
+            receipt = await self._get_batcher(entry.chain_id).request('eth_getTransactionReceipt', [entry.transaction_hash])
+        except Exception:
+            receipt = None
+        if receipt is not None:
+            self._resolve(entry, receipt)
+
+    def _get_batcher(self, chain_id: int):
+        my_web3 = self._networks[chain_id]
+        return get_batcher(network=my_web3.network, proxy=my_web3.proxy)
+
+    def _append(self, event: dict):
+        event['time'] = time.time()
+        self._file.write(json.dumps(event, separators=(',', ':')) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # A line cut by a crash while it was written.
+                key = (event['chain_id'], event['address'], event['nonce'])
+                entry = self.entries.get(key)
+                if event['event'] == 'sent':
+                    entry = self.entries[key] = JournalEntry(
+                        chain_id=event['chain_id'], address=event['address'], nonce=event['nonce'],
+                        tx=event['tx'], raw_transaction=event['raw'], transaction_hash=event['hash'], sweep=event.get('sweep', False),
+                    )
+                    self._hashes[event['hash']] = entry
+                elif entry is None:
+                    continue
+                elif event['event'] == 'replaced':
+                    entry.replace(tx=event['tx'], raw_transaction=event['raw'], transaction_hash=event['hash'])
+                    self._hashes[event['hash']] = entry
+                elif event['event'] == JOURNAL_INCLUDED:
+                    entry.status = JOURNAL_INCLUDED
+                    entry.transaction_hash = event['hash']
+                    entry.receipt_status = event['status']
+                elif event['event'] == JOURNAL_DROPPED:
+                    entry.status = JOURNAL_DROPPED
+
+    @staticmethod
+    def _to_json(tx: dict) -> dict:
+        return {key: Web3.to_hex(value) if isinstance(value, (bytes, bytearray)) else value for key, value in tx.items()}
+
+    def __repr__(self) -> str:
+        return f'TransactionJournal({self.path}, {len(self.get_pending())} pending)'
+
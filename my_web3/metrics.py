@@ -0,0 +1,265 @@
+from .constants import METRICS_BUCKETS
+
+from typing import Any, Optional, Tuple, List, Dict, Callable, Awaitable
+
+import time
+import bisect
+import functools
+import threading
+
+KIND_METHOD = 'method'
+KIND_RPC = 'rpc'
+KIND_ENDPOINT = 'endpoint'
+KIND_TASK = 'task'
+
+
+class Metrics:
+    enabled = False
+
+    def __init__(self):
+        """
+        Metrics and tracing sink. The base class is the no-op default; subclasses override the hooks they need.
+
+        Every observation has a kind and a name:
+        - `method`: public `MyWeb3` method (name is the method name),
+        - `rpc`: JSON-RPC method (name is e.g. `eth_getBalance`; batched requests are observed one by one),
+        - `endpoint`: HTTP request to an RPC endpoint (name is the endpoint host).
+        - `task`: cycle of a background task (name is e.g. `ReceiptTracker`), so its failures are not lost.
+
+        Hooks are called only when `enabled` is True, so the default costs a single attribute check per call.
+        """
+
+    def observe(self, kind: str, name: str, duration: float, error: Optional[str] = None):
+        """Records a finished call: its duration (in seconds) and the error class name if it failed."""
+
+    def start_span(self, kind: str, name: str) -> Any:
+        """Starts a tracing span and returns it (or any object passed back to `end_span`)."""
+
+    def end_span(self, span: Any, error: Optional[str] = None):
+        """Ends a span returned by `start_span`."""
+
+
+class InMemoryMetrics(Metrics):
+    enabled = True
+
+    def __init__(self, buckets: Tuple[float, ...] = METRICS_BUCKETS):
+        """
+        Keeps call counts, error counts by class and latency histograms in memory.
+
+        :param buckets: Upper bounds (in seconds) of the latency histogram buckets.
+        """
+        super().__init__()
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], dict] = {}
+
+    def observe(self, kind: str, name: str, duration: float, error: Optional[str] = None):
+        with self._lock:
+            stats = self._stats.get((kind, name))
+            if stats is None:
+                stats = self._stats[(kind, name)] = {'count': 0, 'time': 0., 'errors': {}, 'histogram': [0] * (len(self.buckets) + 1)}
+            stats['count'] += 1
+            stats['time'] += duration
+            stats['histogram'][bisect.bisect_left(self.buckets, duration)] += 1
+            if error is not None:
+                stats['errors'][error] = stats['errors'].get(error, 0) + 1
+
+    def get_stats(self, kind: Optional[str] = None) -> Dict[str, Dict[str, dict]]:
+        """
+        Returns {kind: {name: stats}} where stats hold `count`, `errors` (by class), `time` (total seconds), `mean`,
+        `p50` and `p99` (upper bounds of the histogram buckets, `inf` above the last one) and the raw `histogram`.
+        """
+        result = {}
+        with self._lock:
+            for (kind_stats, name), stats in self._stats.items():
+                if (kind is not None) and (kind_stats != kind):
+                    continue
+                result.setdefault(kind_stats, {})[name] = {
+                    'count': stats['count'],
+                    'errors': dict(stats['errors']),
+                    'time': stats['time'],
+                    'mean': stats['time'] / stats['count'],
+                    'p50': self._get_percentile(stats['histogram'], stats['count'], 50),
+                    'p99': self._get_percentile(stats['histogram'], stats['count'], 99),
+                    'histogram': list(stats['histogram']),
+                }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def _get_percentile(self, histogram: List[int], count: int, percentile: float) -> float:
+        rank, total = count * percentile / 100, 0
+        for i, n in enumerate(histogram):
+            total += n
+            if total >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+class PrometheusMetrics(Metrics):
+    enabled = True
+
+    def __init__(self, registry: Any = None, prefix: str = 'my_web3', buckets: Tuple[float, ...] = METRICS_BUCKETS):
+        """
+        Exports metrics with `prometheus_client` (optional dependency): histogram `<prefix>_call_duration_seconds`
+        and counter `<prefix>_call_errors_total`, both labelled by `kind` and `name` (plus `error` for the counter).
+
+        :param registry: `prometheus_client.CollectorRegistry` (the default registry if None).
+        :param prefix: Prefix of the metric names.
+        :param buckets: Upper bounds (in seconds) of the latency histogram buckets.
+        """
+        super().__init__()
+        try:
+            import prometheus_client
+        except ImportError as e:
+            raise ImportError('PrometheusMetrics requires prometheus_client (pip install prometheus-client)') from e
+        registry = registry or prometheus_client.REGISTRY
+        self._duration = prometheus_client.Histogram(
+            f'{prefix}_call_duration_seconds', 'Duration of my_web3 calls', ['kind', 'name'], registry=registry, buckets=buckets,
+        )
+        self._errors = prometheus_client.Counter(
+            f'{prefix}_call_errors', 'Failed my_web3 calls', ['kind', 'name', 'error'], registry=registry,
+        )
+
+    def observe(self, kind: str, name: str, duration: float, error: Optional[str] = None):
+        self._duration.labels(kind, name).observe(duration)
+        if error is not None:
+            self._errors.labels(kind, name, error).inc()
+
+
+class OpenTelemetryMetrics(Metrics):
+    enabled = True
+
+    def __init__(self, meter_provider: Any = None, tracer_provider: Any = None, traces: bool = True):
+        """
+        Exports metrics and traces with `opentelemetry-api` (optional dependency): histogram `my_web3.call.duration` (seconds)
+        with `kind`, `name` and `error` attributes and, with `traces=True`, one span per call nested under the current span
+        (public method -> JSON-RPC method -> endpoint request).
+
+        :param meter_provider: Meter provider (the global one if None).
+        :param tracer_provider: Tracer provider (the global one if None).
+        :param traces: Records spans.
+        """
+        super().__init__()
+        try:
+            from opentelemetry import metrics, trace, context
+        except ImportError as e:
+            raise ImportError('OpenTelemetryMetrics requires opentelemetry-api (pip install opentelemetry-api)') from e
+        self._trace = trace
+        self._context = context
+        self._duration = metrics.get_meter('my_web3', meter_provider=meter_provider).create_histogram(
+            'my_web3.call.duration', unit='s', description='Duration of my_web3 calls',
+        )
+        self._tracer = trace.get_tracer('my_web3', tracer_provider=tracer_provider) if traces else None
+
+    def observe(self, kind: str, name: str, duration: float, error: Optional[str] = None):
+        attributes = {'kind': kind, 'name': name}
+        if error is not None:
+            attributes['error'] = error
+        self._duration.record(duration, attributes=attributes)
+
+    def start_span(self, kind: str, name: str) -> Any:
+        if self._tracer is None:
+            return None
+        span = self._tracer.start_span(f'{kind} {name}', attributes={'my_web3.kind': kind})
+        return span, self._context.attach(self._trace.set_span_in_context(span))
+
+    def end_span(self, span: Any, error: Optional[str] = None):
+        if span is None:
+            return
+        span, token = span
+        if error is not None:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, error))
+        try:
+            self._context.detach(token)
+        except Exception:
+            pass  # The span ended in another context (e.g. a cancelled task); it is closed anyway.
+        span.end()
+
+
+_metrics: Metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Returns the process-wide metrics sink."""
+    return _metrics
+
+
+def set_metrics(metrics: Optional[Metrics] = None):
+    """Sets the process-wide metrics sink (None restores the no-op default)."""
+    global _metrics
+    _metrics = metrics if metrics is not None else Metrics()
+
+
+def get_error_class(error: Optional[BaseException]) -> Optional[str]:
+    """Returns the class name of the root cause of the error (errors of public methods chain their cause)."""
+    if error is None:
+        return None
+    while error.__cause__ is not None:
+        error = error.__cause__
+    return type(error).__name__
+
+
+async def observe(metrics: Metrics, kind: str, name: str, awaitable: Awaitable, get_error: Optional[Callable[[Any], Optional[str]]] = None) -> Any:
+    """Awaits the awaitable inside a span and observes its duration and error (`get_error(result)` classifies failed results)."""
+    span = metrics.start_span(kind, name)
+    time_start = time.perf_counter()
+    error = None
+    try:
+        result = await awaitable
+        if get_error is not None:
+            error = get_error(result)
+        return result
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        metrics.end_span(span, error)
+        metrics.observe(kind, name, time.perf_counter() - time_start, error)
+
+
+def observe_sync(metrics: Metrics, kind: str, name: str, func: Callable[[], Any], get_error: Optional[Callable[[Any], Optional[str]]] = None) -> Any:
+    """Sync version of `observe` calling `func()`."""
+    span = metrics.start_span(kind, name)
+    time_start = time.perf_counter()
+    error = None
+    try:
+        result = func()
+        if get_error is not None:
+            error = get_error(result)
+        return result
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        metrics.end_span(span, error)
+        metrics.observe(kind, name, time.perf_counter() - time_start, error)
+
+
+def instrument(func: Callable[..., Awaitable[Tuple[int, Any]]]) -> Callable[..., Awaitable[Tuple[int, Any]]]:
+    """Decorates a public async method returning `(status, result)`: observes its duration and the class of the returned error."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        metrics = _metrics
+        if not metrics.enabled:
+            return await func(*args, **kwargs)
+        span = metrics.start_span(KIND_METHOD, name)
+        time_start = time.perf_counter()
+        error = None
+        try:
+            result = await func(*args, **kwargs)
+            if result[0] != 0:
+                error = get_error_class(result[1]) if isinstance(result[1], BaseException) else 'Exception'
+            return result
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            metrics.end_span(span, error)
+            metrics.observe(KIND_METHOD, name, time.perf_counter() - time_start, error)
+
+    return wrapper
@@ -0,0 +1,27 @@
+from typing import Optional
+
+
+class Balance:
+    def __init__(
+            self,
+            chain_id: int,
+            address_wallet: str,
+            address_token: str,
+            amount: Optional[int],
+            block_number: Optional[int] = None,
+            error: Optional[Exception] = None,
+    ):
+        """
+        Balance of a wallet in a token (ADDRESS_ZERO for the native coin) on a network, or the error of reading it
+        (`amount` is None then). `block_number` is the block it was read at, if known.
+        """
+        self.chain_id = chain_id
+        self.address_wallet = address_wallet
+        self.address_token = address_token
+        self.amount = amount
+        self.block_number = block_number
+        self.error = error
+
+    def __repr__(self) -> str:
+        amount = self.amount if self.error is None else f'error {self.error!r}'
+        return f'Balance({self.chain_id}, {self.address_wallet}, {self.address_token}, {amount})'
@@ -0,0 +1,29 @@
+class FeeStrategy:
+    def __init__(self, name: str, percentile: float, base_fee_multiplier: float):
+        self.name = name
+        self.percentile = percentile
+        self.base_fee_multiplier = base_fee_multiplier
+
+
+SLOW = FeeStrategy(
+    name='Slow',
+    percentile=10,
+    base_fee_multiplier=1.0,
+)
+NORMAL = FeeStrategy(
+    name='Normal',
+    percentile=50,
+    base_fee_multiplier=1.25,
+)
+FAST = FeeStrategy(
+    name='Fast',
+    percentile=90,
+    base_fee_multiplier=2.0,
+)
+FEE_STRATEGIES_DICT = {
+    SLOW.name: SLOW,
+    NORMAL.name: NORMAL,
+    FAST.name: FAST,
+}
+FEE_STRATEGIES_LIST = list(FEE_STRATEGIES_DICT.values())
+FEE_STRATEGIES_NAMES_LIST = list(FEE_STRATEGIES_DICT.keys())
@@ -0,0 +1,42 @@
+from ..constants import JOURNAL_PENDING
+
+from typing import Optional, List
+
+
+class JournalEntry:
+    def __init__(self, chain_id: int, address: str, nonce: int, tx: dict, raw_transaction: str, transaction_hash: str, sweep: bool = False):
+        """
+        Transaction of a wallet nonce in the journal: its current version (`tx`, `raw_transaction`) and the hashes of all
+        versions sent with this nonce (the original and its fee-bumped replacements), any of which may be included.
+
+        `status` is `pending`, `included` (`transaction_hash` is the included version, `receipt_status` its status)
+        or `dropped` (the nonce was used by a transaction outside the journal). `block_number` is the block the current
+        version was first seen pending at (None until the accelerator checks it). `sweep` marks a transaction sending the whole
+        balance, whose value is lowered by the fee increase of every replacement.
+        """
+        self.chain_id = chain_id
+        self.address = address
+        self.nonce = nonce
+        self.tx = tx
+        self.raw_transaction = raw_transaction
+        self.transaction_hash = transaction_hash
+        self.sweep = sweep
+        self.hashes: List[str] = [transaction_hash]
+        self.status = JOURNAL_PENDING
+        self.receipt_status: Optional[int] = None
+        self.block_number: Optional[int] = None
+
+    @property
+    def key(self) -> tuple:
+        return self.chain_id, self.address, self.nonce
+
+    def replace(self, tx: dict, raw_transaction: str, transaction_hash: str, block_number: Optional[int] = None):
+        self.tx = tx
+        self.raw_transaction = raw_transaction
+        self.transaction_hash = transaction_hash
+        if transaction_hash not in self.hashes:
+            self.hashes.append(transaction_hash)
+        self.block_number = block_number
+
+    def __repr__(self) -> str:
+        return f'JournalEntry({self.chain_id}, {self.address}, nonce {self.nonce}, {self.status}, {self.transaction_hash})'
@@ -1,25 +1,43 @@
 from .coin import *
 from .txtype import *
+from ..constants import ADDRESS_MULTICALL3, ADDRESS_DISPERSE, ADDRESS_L1_FEE_ORACLE_OP_STACK, ADDRESS_L1_FEE_ORACLE_SCROLL, STEP_WITHDRAW
+
+from typing import Union, Optional, List
 
 import random
+import warnings
 
 
 class Network:
     def __init__(
             self,
-            name: str, rpc: str,
+            name: str, rpc: Union[str, List[str]],
             coin: Coin, chain_id: int, tx_type: TxType,
-            step_withdraw_min: float, step_withdraw_max: float,
+            step_withdraw_min: Optional[float] = None, step_withdraw_max: Optional[float] = None,
+            address_multicall3: str = ADDRESS_MULTICALL3,
+            address_l1_fee_oracle: Optional[str] = None,
+            address_disperse: Optional[str] = ADDRESS_DISPERSE,
+            ws: Optional[Union[str, List[str]]] = None,
     ):
+        """`step_withdraw_min` / `step_withdraw_max` are deprecated: full-balance transfers compute the sendable value exactly."""
+        if (step_withdraw_min is not None) or (step_withdraw_max is not None):
+            warnings.warn('step_withdraw_min / step_withdraw_max are deprecated and not used by MyWeb3', DeprecationWarning, stacklevel=2)
         self.name = name
-        self.rpc = rpc
+        self.rpcs = [rpc] if isinstance(rpc, str) else list(rpc)
+        self.rpc = self.rpcs[0]
+        self.ws_rpcs = [] if ws is None else [ws] if isinstance(ws, str) else list(ws)
+        self.ws_rpc = self.ws_rpcs[0] if self.ws_rpcs else None
         self.coin = coin
         self.tx_type = tx_type
         self.chain_id = chain_id
-        self.step_withdraw_min = step_withdraw_min
-        self.step_withdraw_max = step_withdraw_max
+        self.step_withdraw_min = step_withdraw_min if step_withdraw_min is not None else STEP_WITHDRAW
+        self.step_withdraw_max = step_withdraw_max if step_withdraw_max is not None else STEP_WITHDRAW
+        self.address_multicall3 = address_multicall3
+        self.address_l1_fee_oracle = address_l1_fee_oracle
+        self.address_disperse = address_disperse
 
     def get_step_withdraw(self, ) -> int:
+        warnings.warn('get_step_withdraw is deprecated: full-balance transfers compute the sendable value exactly', DeprecationWarning, stacklevel=2)
         scale = 10 ** self.coin.n_decimals
         return random.randint(int(self.step_withdraw_min * scale), int(self.step_withdraw_max * scale))
 
@@ -30,8 +48,6 @@ ARBITRUM = Network(
     coin=ETH,
     chain_id=42161,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 AVALANCHE = Network(
     name='Avalanche',
@@ -39,8 +55,6 @@ AVALANCHE = Network(
     coin=AVAX,
     chain_id=43114,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 BASE = Network(
     name='Base',
@@ -48,8 +62,7 @@ BASE = Network(
     coin=ETH,
     chain_id=8453,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
+    address_l1_fee_oracle=ADDRESS_L1_FEE_ORACLE_OP_STACK,
 )
 BSC = Network(
     name='BSC',
@@ -57,8 +70,6 @@ BSC = Network(
     coin=BNB,
     chain_id=56,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 CELO = Network(
     name='Celo',
@@ -66,8 +77,6 @@ CELO = Network(
     coin=CELO,
     chain_id=42220,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 ETHEREUM = Network(
     name='Ethereum',
@@ -75,8 +84,6 @@ ETHEREUM = Network(
     coin=ETH,
     chain_id=1,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 FANTOM = Network(
     name='Fantom',
@@ -84,8 +91,6 @@ FANTOM = Network(
     coin=FTM,
     chain_id=250,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 LINEA = Network(
     name='Linea',
@@ -93,8 +98,6 @@ LINEA = Network(
     coin=ETH,
     chain_id=59144,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 MOONBEAM = Network(
     name='Moonbeam',
@@ -102,8 +105,6 @@ MOONBEAM = Network(
     coin=GLMR,
     chain_id=1284,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 MOONRIVER = Network(
     name='Moonriver',
@@ -111,8 +112,6 @@ MOONRIVER = Network(
     coin=MOVR,
     chain_id=1285,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 OPTIMISM = Network(
     name='Optimism',
@@ -120,8 +119,7 @@ OPTIMISM = Network(
     coin=ETH,
     chain_id=10,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
+    address_l1_fee_oracle=ADDRESS_L1_FEE_ORACLE_OP_STACK,
 )
 POLYGON = Network(
     name='Polygon',
@@ -129,8 +127,6 @@ POLYGON = Network(
     coin=MATIC,
     chain_id=137,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 POLYGON_ZKEVM = Network(
     name='Polygon_zkEVM',
@@ -138,8 +134,6 @@ POLYGON_ZKEVM = Network(
     coin=ETH,
     chain_id=1101,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
 )
 SCROLL = Network(
     name='Scroll',
@@ -147,8 +141,7 @@ SCROLL = Network(
     coin=ETH,
     chain_id=534352,
     tx_type=EIP_1559,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
+    address_l1_fee_oracle=ADDRESS_L1_FEE_ORACLE_SCROLL,
 )
 ZKSYNC = Network(
     name='zkSync',
@@ -156,8 +149,7 @@ ZKSYNC = Network(
     coin=ETH,
     chain_id=324,
     tx_type=LEGACY,
-    step_withdraw_min=0.0000001,
-    step_withdraw_max=0.0000001,
+    address_multicall3='0xF9cda624FBC7e059355ce98a31693d299FACd963',
 )
 NETWORKS_DICT = {
     ARBITRUM.name: ARBITRUM,
@@ -0,0 +1,20 @@
+from typing import Optional
+
+
+class Receipt:
+    def __init__(self, transaction_hash: str, status: int, gas_used: int, effective_gas_price: Optional[int], block_number: int):
+        self.transaction_hash = transaction_hash
+        self.status = status
+        self.gas_used = gas_used
+        self.effective_gas_price = effective_gas_price
+        self.block_number = block_number
+
+    @classmethod
+    def from_rpc(cls, receipt: dict) -> 'Receipt':
+        return cls(
+            transaction_hash=receipt['transactionHash'],
+            status=int(receipt.get('status', '0x0'), 16),
+            gas_used=int(receipt['gasUsed'], 16),
+            effective_gas_price=int(receipt['effectiveGasPrice'], 16) if receipt.get('effectiveGasPrice') else None,
+            block_number=int(receipt['blockNumber'], 16),
+        )
@@ -0,0 +1,41 @@
+from typing import Optional, Tuple, Iterable, Dict
+
+
+class StateSnapshot:
+    def __init__(
+            self,
+            address: str,
+            block_number: Optional[int],
+            balance: int,
+            nonce: Optional[int],
+            token_balances: Dict[str, int],
+            allowances: Dict[Tuple[str, str], int],
+            fees: Dict[str, int],
+            time_taken: float,
+    ):
+        """
+        Account state read at one block: native balance, token balances and allowances (one Multicall3 call),
+        transaction count (None with `nonce_manager=True`) and fee parameters of a new transaction.
+        Without Multicall3 the balances and allowances are read with individual calls (`block_number` None, no fees).
+        """
+        self.address = address
+        self.block_number = block_number
+        self.balance = balance
+        self.nonce = nonce
+        self.token_balances = token_balances
+        self.allowances = allowances
+        self.fees = fees
+        self.time_taken = time_taken
+
+    def get_token_balance(self, address_token: str) -> int:
+        return self.token_balances[address_token.lower()]
+
+    def get_allowance(self, address_token: str, address_spender: str) -> int:
+        return self.allowances[(address_token.lower(), address_spender.lower())]
+
+    def covers(self, addresses_tokens: Iterable[str] = (), allowances: Iterable[Tuple[str, str]] = ()) -> bool:
+        """Checks that the snapshot holds the balances and allowances of the tokens."""
+        return (
+            all(address_token.lower() in self.token_balances for address_token in addresses_tokens)
+            and all((address_token.lower(), address_spender.lower()) in self.allowances for address_token, address_spender in allowances)
+        )
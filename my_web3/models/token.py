@@ -2,10 +2,12 @@ from .network import *
 
 
 class Token:
-    def __init__(self, name: str, decimals: int, addresses: dict[Network, str]):
+    def __init__(self, name: str, decimals: int, addresses: dict[Network, str], wrapped: bool = False):
+        """`wrapped` marks a wrapped native coin (WETH9-style) minting and burning with `Deposit`/`Withdrawal` events instead of `Transfer`."""
         self.name = name
         self.decimals = decimals
         self.addresses = addresses
+        self.wrapped = wrapped
 
 
 DAI = Token(
@@ -111,7 +113,8 @@ WETH = Token(
         POLYGON_ZKEVM: '0x4f9a0e7fd2bf6067db6994cf12e4495df938e6e9',
         SCROLL: '0x5300000000000000000000000000000000000004',
         ZKSYNC: '0x5aea5775959fbc2557cc8789bc1bf90a239d9a91',
-    }
+    },
+    wrapped=True,
 )
 
 TOKENS_DICT = {
@@ -0,0 +1,47 @@
+from ..constants import ADDRESS_ZERO, TOPIC_DEPOSIT, TOPIC_WITHDRAWAL
+
+
+class Transfer:
+    def __init__(
+            self,
+            chain_id: int,
+            address_token: str,
+            address_from: str,
+            address_to: str,
+            amount: int,
+            block_number: int,
+            transaction_hash: str,
+            log_index: int,
+    ):
+        self.chain_id = chain_id
+        self.address_token = address_token
+        self.address_from = address_from
+        self.address_to = address_to
+        self.amount = amount
+        self.block_number = block_number
+        self.transaction_hash = transaction_hash
+        self.log_index = log_index
+
+    @classmethod
+    def from_rpc(cls, log: dict, chain_id: int) -> 'Transfer':
+        # Addresses are kept lowercase: checksumming millions of logs would cost a keccak hash per address.
+        topics = log['topics']
+        if topics[0] == TOPIC_DEPOSIT:  # Wrapped native coin mint.
+            address_from, address_to = ADDRESS_ZERO, '0x' + topics[1][-40:].lower()
+        elif topics[0] == TOPIC_WITHDRAWAL:  # Wrapped native coin burn.
+            address_from, address_to = '0x' + topics[1][-40:].lower(), ADDRESS_ZERO
+        else:
+            address_from, address_to = '0x' + topics[1][-40:].lower(), '0x' + topics[2][-40:].lower()
+        return cls(
+            chain_id=chain_id,
+            address_token=log['address'].lower(),
+            address_from=address_from,
+            address_to=address_to,
+            amount=int(log['data'], 16) if log['data'] not in ('0x', '') else 0,
+            block_number=int(log['blockNumber'], 16),
+            transaction_hash=log['transactionHash'],
+            log_index=int(log['logIndex'], 16),
+        )
+
+    def __repr__(self) -> str:
+        return f'Transfer({self.chain_id}, {self.block_number}, {self.address_token}, {self.address_from} -> {self.address_to}, {self.amount})'
@@ -1,5 +1,9 @@
+from typing import Optional
+
+
 class Wallet:
-    def __init__(self, seed_phrase: str, private_key: str, address: str):
+    def __init__(self, seed_phrase: str, private_key: str, address: str, path: Optional[str] = None):
         self.seed_phrase = seed_phrase
         self.private_key = private_key
         self.address = address
+        self.path = path
@@ -1,33 +1,61 @@
 from . import utils
 from .utils import afh
+from .metrics import instrument
+from .engine import get_engine
+from .nonces import NONCES
+from .gaswatcher import get_gas_watcher
+from .receipts import get_receipt_tracker
 from .constants import *
 from .models.token import *
 from .models.wallet import *
+from .models.feestrategy import *
+from .models.receipt import *
+from .models.snapshot import *
 
 from eth_account import Account
-from mnemonic import Mnemonic
-from typing import Union, Optional, Tuple
-from web3.eth import Contract, AsyncEth
+from typing import Union, Optional, Tuple, List, Dict, TYPE_CHECKING
+from web3.eth import Contract
 from web3.types import HexBytes, ChecksumAddress
+from web3.exceptions import TransactionNotFound, TimeExhausted
 
-import random
+import time
 import asyncio
-import inspect
 
 from web3 import Web3
-from web3.middleware import geth_poa_middleware
+
+if TYPE_CHECKING:
+    from .signing import SigningPool
+    from .journal import TransactionJournal
 
 
 class MyWeb3:
     timeout = TIMEOUT
     tx_type = EIP_1559
     amount_tokens_all = AMOUNT_TOKENS_ALL
-    insufficient_fund_errors_list = [
-        ERROR_INSUFFICIENT_FUNDS,
-        ERROR_GAS_REQUIRED_EXCEEDS_ALLOWANCE,
+    insufficient_fund_errors_list = utils.Deprecated(
+        [ERROR_INSUFFICIENT_FUNDS, ERROR_GAS_REQUIRED_EXCEEDS_ALLOWANCE],
+        'insufficient_fund_errors_list is deprecated: transfer_percent(100) no longer retries with smaller amounts',
+    )
+    nonce_errors_list = [
+        ERROR_NONCE_TOO_LOW,
+        ERROR_REPLACEMENT_UNDERPRICED,
+    ]
+    nonce_retries = NONCE_RETRIES
+    gas_errors_list = [
+        ERROR_INTRINSIC_GAS_TOO_LOW,
+        ERROR_OUT_OF_GAS,
     ]
-    abi_ERC20 = utils.read_json_from_file(FILENAME_ABI_ERC20)
+    abi_ERC20 = utils.LazyJSON(FILENAME_ABI_ERC20)
+    abi_multicall3 = utils.LazyJSON(FILENAME_ABI_MULTICALL3)
+    abi_l1_fee_oracle = utils.LazyJSON(FILENAME_ABI_L1_FEE_ORACLE)
     address_zero = ADDRESS_ZERO
+    multicall_chunk_size = MULTICALL_CHUNK_SIZE
+    disperse_chunk_size = DISPERSE_CHUNK_SIZE
+    # `__dict__` is created only for handles whose class-level settings (e.g. `timeout`) are overridden per instance.
+    __slots__ = (
+        'engine', 'private_key', 'nonce_manager', 'fee_strategy',
+        'max_eth_gwei', 'gas_increase_gas', 'gas_increase_base', 'gas_profiles', 'journal', '_address', '_snapshot', '__dict__',
+    )
 
     def __init__(
             self,
@@ -38,6 +66,12 @@ class MyWeb3:
             gas_eth_max: Optional[int] = None,
             gas_increase_gas: Optional[float] = None,
             gas_increase_base: Optional[float] = None,
+            rpc_batch: Optional[bool] = False,
+            nonce_manager: Optional[bool] = False,
+            fee_strategy: Optional[FeeStrategy] = None,
+            gas_profiles: Optional[bool] = False,
+            websocket: Optional[bool] = False,
+            journal: Optional['TransactionJournal'] = None,
     ):
         """
         MyWeb3 is a convenient library for interacting with EVM blockchains via Python.
@@ -49,28 +83,98 @@ class MyWeb3:
 
         :param network: Instance of the `Network` class (from `my_web3/models/network.py`), specifying the target blockchain (e.g., ETHEREUM, BSC, BASE).
         :param private_key: Wallet's private key (used for signing transactions).
-        :param async_provider: Enables asynchronous operations.
-        :param proxy: Proxy server address for redirecting API requests. Note: incompatible with `async_provider=True`.
+        :param async_provider: Enables asynchronous operations. Without it, blocking provider calls run in a thread pool, so the event loop is never blocked.
+        :param proxy: Proxy server address for redirecting API requests.
         :param gas_eth_max: Maximum gas price (in Gwei) for Ethereum transactions. If the network gas price exceeds this value, the code will wait.
         :param gas_increase_gas: Multiplier applied to the estimated gas for transaction execution.
-        :param gas_increase_base: Multiplier applied base_fee_per_gas value while estimating EIP-1559 transactions gas.
+        :param gas_increase_base: Multiplier applied base_fee_per_gas value while estimating EIP-1559 transactions gas. Ignored if `fee_strategy` is set.
+        :param rpc_batch: Sends balance and nonce lookups through a shared JSON-RPC batch transport and tracks receipts with a shared per-block receipt tracker.
+        :param nonce_manager: Hands out nonces locally (shared per network and address), so several transactions can be sent without waiting for each other.
+        :param fee_strategy: Instance of the `FeeStrategy` class (from `my_web3/models/feestrategy.py`), specifying priority-fee percentile and base fee multiplier of EIP-1559 transactions (e.g., SLOW, NORMAL, FAST).
+        :param gas_profiles: Uses gas limits learned per (contract, function selector) from estimates and receipts instead of `eth_estimateGas` for repetitive transactions (plain transfers to accounts without code share one profile); learned limits carry the profile margin, so `gas_increase_gas` is not applied to them. Without the estimation nothing checks that a transaction would revert: such transactions are sent, fail on-chain and still pay for their gas.
+        :param websocket: Sends requests over a persistent WebSocket connection of the network (`Network(ws=...)`, implies `async_provider`); pushed `newHeads` expire cached fees and wake up receipt and gas waiters instead of polling.
+        :param journal: Instance of the `TransactionJournal` class (from `my_web3/journal.py`): sent transactions are appended to it and replaced with higher fees while they are stuck; `verify_transaction` and `get_transaction_receipt` follow the replacements.
         """
+        self.engine = get_engine(network=network, proxy=proxy, async_provider=async_provider, rpc_batch=rpc_batch, websocket=websocket)
+        self.engine.watch_heads()
         self.private_key = private_key
-        self.network = network
-        self.async_provider = async_provider
-        self.proxy = proxy
         self.max_eth_gwei = gas_eth_max
         self.gas_increase_gas = gas_increase_gas
         self.gas_increase_base = gas_increase_base
-        self.w3 = self._get_w3(network=self.network, proxy=self.proxy, async_provider=self.async_provider)
-        if self.private_key is not None:
-            self.address = Web3.to_checksum_address(self.w3.eth.account.from_key(private_key=private_key).address)
-        else:
-            self.address = Web3.to_checksum_address(self.address_zero)
+        self.nonce_manager = nonce_manager
+        self.fee_strategy = fee_strategy or FeeStrategy(name='Custom', percentile=50, base_fee_multiplier=gas_increase_base or 1.0)
+        self.gas_profiles = gas_profiles
+        self.journal = journal
+        self._address: Optional[ChecksumAddress] = None
+        self._snapshot: Optional[StateSnapshot] = None
+
+    @property
+    def network(self) -> Network:
+        return self.engine.network
+
+    @network.setter
+    def network(self, network: Network):
+        self._set_engine(network=network)
+
+    @property
+    def proxy(self) -> Optional[str]:
+        return self.engine.proxy
+
+    @proxy.setter
+    def proxy(self, proxy: Optional[str]):
+        self._set_engine(proxy=proxy)
+
+    @property
+    def async_provider(self) -> bool:
+        return self.engine.async_provider
+
+    @async_provider.setter
+    def async_provider(self, async_provider: bool):
+        self._set_engine(async_provider=async_provider)
+
+    @property
+    def w3(self) -> Web3:
+        return self.engine.w3
 
+    @w3.setter
+    def w3(self, w3: Web3):
+        # A custom Web3 instance is not shared: the handle gets a private copy of the engine.
+        self.engine = self.engine.with_w3(w3)
+
+    @property
+    def batcher(self):
+        return self.engine.batcher
+
+    @property
+    def receipt_tracker(self):
+        return self.engine.receipt_tracker
+
+    @property
+    def fee_oracle(self):
+        return self.engine.fee_oracle
+
+    @property
+    def gas_profile_cache(self):
+        return self.engine.gas_profile_cache
+
+    @property
+    def address(self) -> ChecksumAddress:
+        # Derived on first use: it costs an elliptic curve multiplication, which adds up for large fleets of wallets.
+        if self._address is None:
+            if self.private_key is not None:
+                self._address = Web3.to_checksum_address(Account.from_key(self.private_key).address)
+            else:
+                self._address = Web3.to_checksum_address(self.address_zero)
+        return self._address
+
+    @address.setter
+    def address(self, address: str):
+        self._address = Web3.to_checksum_address(address)
+
+    @instrument
     async def is_connected(self, ) -> Tuple[int, Union[bool, Exception]]:
         """Checks the connection to the network RPC."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'is_connected'
         try:
             connection = await afh(self.w3.is_connected, self.async_provider)
             if connection:
@@ -78,199 +182,510 @@ class MyWeb3:
             else:
                 return 0, False
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def get_balance(self, address_wallet: Optional[str] = None) -> Tuple[int, Union[int, Exception]]:
         """Gets the balance of wallet address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'get_balance'
         try:
             address_wallet = self._get_address_wallet(address_wallet=address_wallet)
+            if self.batcher is not None:
+                return 0, int(await self.batcher.request('eth_getBalance', [address_wallet, 'latest']), 16)
             return 0, int(await afh(self.w3.eth.get_balance, self.async_provider, address_wallet))
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
+    async def get_balances_many(self, addresses_wallets: List[str]) -> Tuple[int, Union[List[Tuple[int, Union[int, Exception]]], Exception]]:
+        """Gets the balances of many wallet addresses concurrently (batched with `rpc_batch=True`)."""
+        log_process = 'get_balances_many'
+        try:
+            return 0, list(await asyncio.gather(*[self.get_balance(address_wallet=address_wallet) for address_wallet in addresses_wallets]))
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
     async def send_transaction(
             self,
             address_to: str,
             address_from: Optional[str] = None,
-            data=None, value=None, gas_price=None, gas=None,
+            data=None, value=None, gas_price=None, gas=None, nonce=None, sweep=False,
     ) -> Tuple[int, Union[HexBytes, Exception]]:
-        """Sends transactions on the blockchain"""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        """Sends transactions on the blockchain (with `sweep=True` the value is the whole balance minus the maximum fee)"""
+        log_process = 'send_transaction'
         try:
             if (self.network.coin == ETH) and (self.max_eth_gwei is not None):
+                try:
+                    await self._get_gas_watcher().wait_below(self.max_eth_gwei)
+                except Exception as e:
+                    return -1, utils.get_exception(f'{log_process} | eth', e)
+            # A snapshot of this block (taken by a composite method) provides the nonce and the balance once; any send expires it.
+            snapshot = self._pop_state_snapshot()
+            nonce_managed = (nonce is None) and self.nonce_manager
+            if nonce_managed:
+                nonce = await NONCES.get_nonce(network=self.network, address=self.address, fetch=self._get_transaction_count_pending)
+            elif nonce is None:
+                nonce = snapshot.nonce if (snapshot is not None) and (snapshot.nonce is not None) else await self._get_transaction_count()
+            tx = {'nonce': nonce}
+            try:
+                tx = await self._build_transaction(
+                    nonce=nonce,
+                    address_to=address_to, address_from=address_from,
+                    data=data, value=value, gas_price=gas_price, gas=gas, sweep=sweep,
+                    balance=snapshot.balance if (snapshot is not None) and (address_from is None) else None,
+                )
+                transaction_hash, raw_transaction = await self._sign_and_send_transaction(tx=tx, nonce_managed=nonce_managed, gas_profiled=self.gas_profiles and not gas)
+            except Exception:
+                # Only a nonce that was never broadcast is released: the bookkeeping below may fail after the broadcast.
+                if nonce_managed:
+                    NONCES.release(network=self.network, address=self.address, nonce=tx['nonce'])
+                raise
+            self._record_sent(tx=tx, raw_transaction=raw_transaction, transaction_hash=transaction_hash, sweep=sweep)
+            return 0, transaction_hash
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def send_transactions_many(self, transactions: List[dict]) -> Tuple[int, Union[List[Tuple[int, Union[HexBytes, Exception]]], Exception]]:
+        """Sends many transactions (dicts of `send_transaction` arguments) concurrently. Requires `nonce_manager=True`."""
+        log_process = 'send_transactions_many'
+        try:
+            if not self.nonce_manager:
+                return -1, Exception(f'{log_process} | nonce_manager is disabled')
+            return 0, list(await asyncio.gather(*[self.send_transaction(**transaction) for transaction in transactions]))
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def send_transactions_bulk(self, transactions: List[dict], signing_pool: 'SigningPool') -> Tuple[int, Union[List[Tuple[int, Union[HexBytes, Exception]]], Exception]]:
+        """
+        Builds many transactions (dicts of `send_transaction` arguments), signs them in a process pool and sends them as they are signed.
+
+        Nonces are reserved for the whole batch up front; "nonce too low" errors are retried with a new nonce. A transaction that fails
+        to sign or send leaves its nonce unused, which holds the later transactions of the batch in the mempool until the next
+        transaction of the wallet takes it (the local nonce is resynced with the node for that).
+        """
+        log_process = 'send_transactions_bulk'
+        try:
+            if self.address.lower() not in signing_pool.addresses:
+                return -1, Exception(f'{log_process} | no private key for {self.address} in signing_pool')
+            self._snapshot = None
+            if (self.network.coin == ETH) and (self.max_eth_gwei is not None):
+                try:
+                    await self._get_gas_watcher().wait_below(self.max_eth_gwei)
+                except Exception as e:
+                    return -1, utils.get_exception(f'{log_process} | eth', e)
+            if self.nonce_manager:
+                nonces = [
+                    await NONCES.get_nonce(network=self.network, address=self.address, fetch=self._get_transaction_count_pending)
+                    for _ in transactions
+                ]
+            else:
+                nonce = await self._get_transaction_count_pending()
+                nonces = list(range(nonce, nonce + len(transactions)))
+            txs = await asyncio.gather(*[
+                self._build_transaction(nonce=nonce, **transaction)
+                for nonce, transaction in zip(nonces, transactions)
+            ], return_exceptions=True)
+            results: List[Tuple[int, Union[HexBytes, Exception]]] = [
+                (-1, utils.get_exception(log_process, tx)) if isinstance(tx, Exception) else None
+                for tx in txs
+            ]
+            # Transactions that failed to build leave no gaps: the built ones take the lowest reserved nonces.
+            indexes = [i for i, tx in enumerate(txs) if not isinstance(tx, Exception)]
+            for i, nonce in zip(indexes, nonces):
+                txs[i]['nonce'] = nonce
+            if self.nonce_manager:
+                for nonce in reversed(nonces[len(indexes):]):
+                    NONCES.release(network=self.network, address=self.address, nonce=nonce)
+
+            gaps = []
+
+            async def send(i: int, raw_transaction: Union[HexBytes, Exception]):
+                retries = 0
                 while True:
-                    status, result = await self._get_eth_gas_price_gwei(self.proxy)
-                    if status == 0:
-                        if result > self.max_eth_gwei:
-                            await asyncio.sleep(random.randint(10, 20))
+                    try:
+                        if isinstance(raw_transaction, Exception):
+                            raise raw_transaction
+                        transaction_hash = await afh(self.w3.eth.send_raw_transaction, self.async_provider, raw_transaction)
+                        break
+                    except Exception as e:
+                        if self.nonce_manager and (retries < self.nonce_retries) and any(error in str(e) for error in self.nonce_errors_list):
+                            txs[i]['nonce'] = await NONCES.recover(network=self.network, address=self.address, fetch=self._get_transaction_count_pending)
+                            raw_transaction = (await signing_pool.sign_many([(self.address, txs[i])]))[0]
+                            retries += 1
                         else:
-                            break
-                    else:
-                        return -1, Exception(f'{log_process} | eth |{result}')
-            nonce = await afh(self.w3.eth.get_transaction_count, self.async_provider, self.address)
-            chain_id = await self.w3.eth.chain_id if self.async_provider else self.w3.eth.chain_id
-            tx = {
-                'from': self._get_address_wallet(address_wallet=address_from),
-                'nonce': nonce,
-                'to': Web3.to_checksum_address(address_to),
-                'chainId': chain_id,
-            }
-            if data:
-                tx['data'] = data
-            if value:
-                tx['value'] = value
-            if gas_price:
-                tx['gasPrice'] = gas_price
+                            gaps.append(txs[i]['nonce'])
+                            results[i] = (-1, utils.get_exception(log_process, e))
+                            return
+                try:
+                    self._record_sent(tx=txs[i], raw_transaction=raw_transaction, transaction_hash=transaction_hash, sweep=transactions[i].get('sweep', False))
+                    results[i] = (0, transaction_hash)
+                except Exception as e:
+                    results[i] = (-1, utils.get_exception(log_process, e))
+
+            sends = []
+            async for index, raw_transaction in signing_pool.sign_stream([(self.address, txs[i]) for i in indexes]):
+                sends.append(asyncio.ensure_future(send(indexes[index], raw_transaction)))
+            await asyncio.gather(*sends)
+            if gaps and self.nonce_manager:
+                # The nonces of transactions that were not broadcast hold the later ones back in the mempool: the local nonce
+                # is reset to the pending transaction count (the first gap), so the next transaction of the wallet fills it.
+                await NONCES.resync(network=self.network, address=self.address, fetch=self._get_transaction_count_pending)
+            return 0, results
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def resync_nonce(self, ) -> Tuple[int, Union[int, Exception]]:
+        """Resets the locally managed nonce of the wallet to its pending transaction count."""
+        log_process = 'resync_nonce'
+        try:
+            return 0, await NONCES.resync(network=self.network, address=self.address, fetch=self._get_transaction_count_pending)
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def get_fees(self, ) -> Tuple[int, Union[Dict[str, int], Exception]]:
+        """Gets the fee fields of a new transaction: `gasPrice` on legacy networks, `maxPriorityFeePerGas` and `maxFeePerGas` otherwise."""
+        log_process = 'get_fees'
+        try:
+            return 0, await self._get_fees()
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    async def _build_transaction(
+            self,
+            nonce: int,
+            address_to: str,
+            address_from: Optional[str] = None,
+            data=None, value=None, gas_price=None, gas=None, sweep=False, balance=None,
+    ) -> dict:
+        tx = {
+            'from': self._get_address_wallet(address_wallet=address_from),
+            'nonce': nonce,
+            'to': Web3.to_checksum_address(address_to),
+            'chainId': self.network.chain_id,
+        }
+        if data:
+            tx['data'] = data
+        if value and not sweep:
+            tx['value'] = value
+        if gas_price:
+            tx['gasPrice'] = gas_price
+        else:
+            tx.update(await self._get_fees())
+        if sweep and (balance is None):
+            balance = await self._get_balance_sweep(address_wallet=tx['from'])
+        try:
+            if gas:
+                tx['gas'] = int(gas)
+            elif sweep:
+                # The value is only known after the fee, so the gas is estimated with the whole balance as the value
+                # and without the fee fields (with them the node would reject the estimate for insufficient funds).
+                tx_estimate = {key: value for key, value in tx.items() if key not in ('gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas')}
+                tx['gas'] = await self._estimate_gas(tx={**tx_estimate, 'value': balance})
             else:
-                if (self.tx_type == LEGACY) or (self.network.tx_type == LEGACY):
-                    tx['gasPrice'] = self.w3.eth.gas_price
-                else:
-                    maxPriorityFeePerGas, maxFeePerGas = await self._get_EIP_1559_gas_price_parameters(self.gas_increase_base)
-                    tx['maxPriorityFeePerGas'] = maxPriorityFeePerGas
-                    tx['maxFeePerGas'] = maxFeePerGas
+                gas_learned = await self._get_gas_learned(tx=tx) if self.gas_profiles else None
+                tx['gas'] = await self._estimate_gas(tx=tx, gas_learned=gas_learned)
+        except Exception as e:
+            raise Exception(f'gas | {e}') from e
+        if sweep:
+            tx['value'] = await self._get_value_sweep(tx=tx, balance=balance)
+        return tx
+
+    def _get_gas_watcher(self):
+        if (self.engine.ws_client is not None) and ETHEREUM.ws_rpcs:
+            get_engine(network=ETHEREUM, proxy=self.proxy, websocket=True).watch_heads()
+        return get_gas_watcher(network=ETHEREUM, proxy=self.proxy)
+
+    async def _get_fees(self) -> dict:
+        self.engine.watch_heads()
+        if (self.tx_type == LEGACY) or (self.network.tx_type == LEGACY):
+            return {'gasPrice': await self.fee_oracle.get_gas_price(w3=self.w3, asynchrony=self.async_provider)}
+        maxPriorityFeePerGas, maxFeePerGas = await self._get_EIP_1559_gas_price_parameters()
+        return {'maxPriorityFeePerGas': maxPriorityFeePerGas, 'maxFeePerGas': maxFeePerGas}
+
+    async def _get_balance_sweep(self, address_wallet: str) -> int:
+        status, result = await self.get_balance(address_wallet=address_wallet)
+        if status != 0:
+            raise utils.get_exception('balance', result)
+        return result
+
+    async def _get_value_sweep(self, tx: dict, balance: Optional[int] = None) -> int:
+        # The node accepts a transaction only if the balance covers value + gas * max fee (+ L1 data fee on rollups),
+        # so the maximum value is computed from them in one pass instead of retrying with smaller amounts.
+        if balance is None:
+            balance = await self._get_balance_sweep(address_wallet=tx['from'])
+        fee = tx['gas'] * tx.get('maxFeePerGas', tx.get('gasPrice', 0))
+        if self.network.address_l1_fee_oracle is not None:
+            fee += int(await self._get_l1_fee(tx={**tx, 'value': balance}) * SWEEP_L1_FEE_MULTIPLIER)
+        if balance <= fee:
+            raise Exception(f'value | balance {balance} <= fee {fee}')
+        return balance - fee
+
+    async def _get_gas_learned(self, tx: dict) -> Optional[int]:
+        if not self.gas_profile_cache.is_code_known(tx):
+            code = await afh(self.w3.eth.get_code, self.async_provider, tx['to'])
+            self.gas_profile_cache.set_code(address=tx['to'], code=bool(code))
+        return self.gas_profile_cache.get_gas(tx)
+
+    async def _estimate_gas(self, tx: dict, gas_learned: Optional[int] = None) -> int:
+        if gas_learned is not None:
+            return gas_learned  # Already includes the profile margin.
+        gas_estimated = await afh(self.w3.eth.estimate_gas, self.async_provider, {key: value for key, value in tx.items() if key != 'gas'})
+        if self.gas_profiles:
+            self.gas_profile_cache.observe(tx=tx, gas=gas_estimated)
+        if self.gas_increase_gas:
+            gas_estimated *= self.gas_increase_gas
+        return int(gas_estimated)
+
+    async def _sign_and_send_transaction(self, tx: dict, nonce_managed: Optional[bool] = False, gas_profiled: Optional[bool] = False) -> Tuple[HexBytes, HexBytes]:
+        retries = 0
+        while True:
+            sign = self.w3.eth.account.sign_transaction(tx, self.private_key)
             try:
-                if gas:
-                    gas_estimated = gas
-                else:
-                    gas_estimated = await afh(self.w3.eth.estimate_gas, self.async_provider, tx)
-                    if self.gas_increase_gas:
-                        gas_estimated *= self.gas_increase_gas
-                tx['gas'] = int(gas_estimated)
+                return await afh(self.w3.eth.send_raw_transaction, self.async_provider, sign.rawTransaction), sign.rawTransaction
             except Exception as e:
-                return -1, Exception(f'{log_process} | gas | {e}')
-            sign = self.w3.eth.account.sign_transaction(tx, self.private_key)
-            transaction_hash = await afh(self.w3.eth.send_raw_transaction, self.async_provider, sign.rawTransaction)
-            return 0, transaction_hash
-        except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+                if nonce_managed and (retries < self.nonce_retries) and any(error in str(e) for error in self.nonce_errors_list):
+                    tx['nonce'] = await NONCES.recover(network=self.network, address=self.address, fetch=self._get_transaction_count_pending)
+                    retries += 1
+                elif gas_profiled and any(error in str(e) for error in self.gas_errors_list):
+                    # The learned gas limit is too low (e.g. the contract was upgraded): the profile is dropped and the gas estimated.
+                    self.gas_profile_cache.invalidate(tx)
+                    tx['gas'] = await self._estimate_gas(tx=tx)
+                    gas_profiled = False
+                else:
+                    raise
+
+    def _record_sent(self, tx: dict, raw_transaction: HexBytes, transaction_hash: HexBytes, sweep: Optional[bool] = False):
+        if self.gas_profiles:
+            self.gas_profile_cache.track(transaction_hash=Web3.to_hex(transaction_hash), tx=tx)
+        if self.journal is not None:
+            self.journal.record_sent(my_web3=self, tx=tx, raw_transaction=raw_transaction, transaction_hash=transaction_hash, sweep=sweep)
 
+    @instrument
     async def verify_transaction(self, transaction_hash: HexBytes) -> Tuple[int, Union[bool, Exception]]:
         """Checks the status of a transaction using its hash."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'verify_transaction'
         try:
-            data = await afh(self.w3.eth.wait_for_transaction_receipt, self.async_provider, transaction_hash=transaction_hash, timeout=self.timeout)
+            self.engine.watch_heads()
+            if (self.journal is not None) and (self.journal.get_entry(Web3.to_hex(transaction_hash)) is not None):
+                self.journal.attach(self)
+                receipt = await self.journal.track(transaction_hash=Web3.to_hex(transaction_hash), timeout=self.timeout)
+                self._observe_receipt(transaction_hash=receipt.transaction_hash, status=receipt.status, gas_used=receipt.gas_used)
+                return 0, receipt.status == 1
+            if self.receipt_tracker is not None:
+                receipt = await self.receipt_tracker.track(transaction_hash=Web3.to_hex(transaction_hash), timeout=self.timeout)
+                self._observe_receipt(transaction_hash=transaction_hash, status=receipt.status, gas_used=receipt.gas_used)
+                return 0, receipt.status == 1
+            elif self.async_provider:
+                data = await self.w3.eth.wait_for_transaction_receipt(transaction_hash=transaction_hash, timeout=self.timeout)
+            else:
+                data = await self._wait_for_transaction_receipt_polling(transaction_hash=transaction_hash)
+            self._observe_receipt(transaction_hash=transaction_hash, status=data.get('status', 0), gas_used=data.get('gasUsed', 0))
             if ('status' in data) and (data['status'] == 1):
                 return 0, True
             else:
                 return 0, False
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def verify_transactions_many(self, transactions_hashes: List[HexBytes]) -> Tuple[int, Union[List[Tuple[int, Union[bool, Exception]]], Exception]]:
+        """Checks the statuses of many transactions concurrently (tracked per block with `rpc_batch=True`)."""
+        log_process = 'verify_transactions_many'
+        try:
+            return 0, list(await asyncio.gather(*[self.verify_transaction(transaction_hash=transaction_hash) for transaction_hash in transactions_hashes]))
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def get_transaction_receipt(self, transaction_hash: HexBytes) -> Tuple[int, Union[Receipt, Exception]]:
+        """Waits for a transaction and returns its receipt (status, gas used, effective gas price, block number)."""
+        log_process = 'get_transaction_receipt'
+        try:
+            self.engine.watch_heads()
+            if (self.journal is not None) and (self.journal.get_entry(Web3.to_hex(transaction_hash)) is not None):
+                self.journal.attach(self)
+                receipt = await self.journal.track(transaction_hash=Web3.to_hex(transaction_hash), timeout=self.timeout)
+            else:
+                receipt_tracker = self.receipt_tracker or get_receipt_tracker(network=self.network, proxy=self.proxy)
+                receipt = await receipt_tracker.track(transaction_hash=Web3.to_hex(transaction_hash), timeout=self.timeout)
+            self._observe_receipt(transaction_hash=transaction_hash, status=receipt.status, gas_used=receipt.gas_used)
+            return 0, receipt
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def transfer_amount(self, address_recipient: str, amount: int) -> Tuple[int, Union[HexBytes, Exception]]:
         """Transfers a specified amount of balance to a recipient address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'transfer_amount'
         try:
             status, result = await self.send_transaction(address_to=address_recipient, value=amount)
             if status == 0:
                 return 0, result
             else:
-                return -1, Exception(f'{log_process} | {result}')
+                return -1, utils.get_exception(log_process, result)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def transfer_percent(self, address_recipient: str, percent: float) -> Tuple[int, Union[HexBytes, Exception]]:
         """Transfers a specified percentage of the balance to a recipient address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'transfer_percent'
         try:
-            status, result = await self.get_balance()
+            if percent > 100:
+                return -1, Exception(f'{log_process} | percent > 100')
+            status, result = await self._get_state()
+            if status != 0:
+                return -1, utils.get_exception(log_process, result)
+            snapshot: StateSnapshot = result
+            if percent == 100:
+                status, result = await self.send_transaction(address_to=address_recipient, sweep=True)
+            else:
+                amount = int(snapshot.balance * (percent / 100))
+                status, result = await self.transfer_amount(address_recipient=address_recipient, amount=amount)
             if status == 0:
-                balance: int = result
-                if percent < 100:
-                    amount = int(balance * (percent / 100))
-                    status, result = await self.transfer_amount(address_recipient=address_recipient, amount=amount)
-                    if status == 0:
-                        return 0, result
-                    else:
-                        return -1, Exception(f'{log_process} | {result}')
-                elif percent == 100:
-                    amount = balance
-                    while True:
-                        if amount > 0:
-                            status, result = await self.transfer_amount(address_recipient=address_recipient, amount=amount)
-                            if status == 0:
-                                return 0, result
-                            else:
-                                if any(error in str(result) for error in self.insufficient_fund_errors_list):
-                                    amount -= self.network.get_step_withdraw()
-                                    await asyncio.sleep(1)
-                                else:
-                                    return -1, Exception(f'{log_process} | {result}')
-                        else:
-                            return -1, Exception(f'{log_process} | amount <= 0')
-                else:
-                    return -1, Exception(f'{log_process} | percent > 100')
+                return 0, result
             else:
-                return -1, Exception(f'{log_process} | {result}')
+                return -1, utils.get_exception(log_process, result)
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def disperse_amounts(self, recipients: List[Tuple[str, int]], chunk_size: Optional[int] = None) -> Tuple[int, Union[List[Tuple[int, Union[HexBytes, Exception]]], Exception]]:
+        """
+        Transfers native coin amounts to many (recipient, amount) pairs through the Disperse contract, in as few transactions
+        as the block gas limit allows. Returns the hash of the batch transaction (or the error) of every recipient.
+        Each recipient costs a value call (~10k gas) instead of a 21k transaction; a call creating a new account costs 25k more.
+        """
+        log_process = 'disperse_amounts'
+        try:
+            return 0, await self._disperse(recipients=recipients, chunk_size=chunk_size)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_get_balance(self, address_token: str, address_wallet: Optional[str] = None) -> Tuple[int, Union[int, Exception]]:
         """Gets the balance of a specified ERC20 token."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_get_balance'
         try:
             contract = self._get_contract_ERC20(address_token)
             address_wallet = self._get_address_wallet(address_wallet)
             return 0, await afh(contract.functions.balanceOf(address_wallet).call, self.async_provider)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_get_allowance(self, address_token: str, address_spender: str, address_wallet: Optional[str] = None) -> Tuple[int, Union[int, Exception]]:
         """Gets the allowance amount that a spender is allowed to withdraw from a given wallet for a specific ERC20 token."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_get_allowance'
         try:
             contract = self._get_contract_ERC20(address_token=address_token)
             address_wallet = self._get_address_wallet(address_wallet=address_wallet)
             address_spender = Web3.to_checksum_address(address_spender)
             return 0, await afh(contract.functions.allowance(address_wallet, address_spender).call, self.async_provider)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_get_decimals(self, address_token: str) -> Tuple[int, Union[int, Exception]]:
         """Gets decimals of an ERC20 token from blockchain based on its address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_get_decimals'
         try:
             token_contract = self._get_contract_ERC20(address_token)
             return 0, await afh(token_contract.functions.decimals().call, self.async_provider)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_get_decimals_smart(self, address_token: str) -> Tuple[int, Union[int, Exception]]:
         """Gets decimals of an ERC20 token from internal token dict and blockchain based on its address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_get_decimals_smart'
         for token in TOKENS_LIST:
-            if address_token == token.addresses[self.network]:
+            if address_token == token.addresses.get(self.network):
                 return 0, token.decimals
         status, result = await self.ERC20_get_decimals(address_token)
         if status == -1:
-            return -1, Exception(f'{log_process} | {result}')
+            return -1, utils.get_exception(log_process, result)
         else:
             return 0, result
 
+    @instrument
     async def ERC20_get_symbol(self, address_token: str) -> Tuple[int, Union[str, Exception]]:
         """Gets the symbol of an ERC20 token from blockchain based on its address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_get_symbol'
         try:
             token_contract = self._get_contract_ERC20(address_token)
-            return 0, await afh(token_contract.functions.name().call, self.async_provider)
+            return 0, await afh(token_contract.functions.symbol().call, self.async_provider)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_get_symbol_smart(self, address_token: str) -> Tuple[int, Union[str, Exception]]:
         """Gets the symbol of an ERC20 token from internal token dict and blockchain based on its address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_get_symbol_smart'
         for token in TOKENS_LIST:
-            if address_token == token.addresses[self.network]:
+            if address_token == token.addresses.get(self.network):
                 return 0, token.name
         status, result = await self.ERC20_get_symbol(address_token=address_token)
         if status == -1:
-            return -1, Exception(f'{log_process} | {result}')
+            return -1, utils.get_exception(log_process, result)
         else:
             return 0, result
 
+    @instrument
+    async def ERC20_get_balances_many(self, pairs: List[Tuple[str, str]]) -> Tuple[int, Union[List[Tuple[int, Union[int, Exception]]], Exception]]:
+        """Gets balances for many (address_token, address_wallet) pairs via Multicall3."""
+        log_process = 'ERC20_get_balances_many'
+        try:
+            calls = [
+                (address_token, 'balanceOf', (self._get_address_wallet(address_wallet),))
+                for address_token, address_wallet in pairs
+            ]
+            return 0, await self._ERC20_call_many(calls=calls, output_type='uint256')
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def ERC20_get_allowances_many(self, triples: List[Tuple[str, str, Optional[str]]]) -> Tuple[int, Union[List[Tuple[int, Union[int, Exception]]], Exception]]:
+        """Gets allowances for many (address_token, address_spender, address_wallet) triples via Multicall3."""
+        log_process = 'ERC20_get_allowances_many'
+        try:
+            calls = [
+                (address_token, 'allowance', (self._get_address_wallet(address_wallet), Web3.to_checksum_address(address_spender)))
+                for address_token, address_spender, address_wallet in triples
+            ]
+            return 0, await self._ERC20_call_many(calls=calls, output_type='uint256')
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def ERC20_get_decimals_many(self, addresses_tokens: List[str]) -> Tuple[int, Union[List[Tuple[int, Union[int, Exception]]], Exception]]:
+        """Gets decimals of many ERC20 tokens via Multicall3."""
+        log_process = 'ERC20_get_decimals_many'
+        try:
+            calls = [(address_token, 'decimals', ()) for address_token in addresses_tokens]
+            return 0, await self._ERC20_call_many(calls=calls, output_type='uint8')
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def ERC20_get_symbols_many(self, addresses_tokens: List[str]) -> Tuple[int, Union[List[Tuple[int, Union[str, Exception]]], Exception]]:
+        """Gets symbols of many ERC20 tokens via Multicall3."""
+        log_process = 'ERC20_get_symbols_many'
+        try:
+            calls = [(address_token, 'symbol', ()) for address_token in addresses_tokens]
+            return 0, await self._ERC20_call_many(calls=calls, output_type='string')
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
     async def ERC20_approve(self, amount: int, address_token: str, address_spender: str) -> Tuple[int, Union[HexBytes, Exception]]:
         """Approves a specified amount of an ERC20 token for a spender address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_approve'
         try:
             contract = self._get_contract_ERC20(address_token)
             data_transaction = contract.encodeABI(
@@ -287,42 +702,41 @@ class MyWeb3:
             if status == 0:
                 return 0, result
             else:
-                return -1, Exception(f'{log_process} | {result}')
+                return -1, utils.get_exception(log_process, result)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_approve_smart(self, amount: int, address_token: str, address_spender: str) -> Tuple[int, Union[HexBytes, Exception]]:
         """Checks allowance and balance and approves a specified amount of an ERC20 token for a spender address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_approve_smart'
         try:
-            status, result = await self.ERC20_get_allowance(address_token=address_token, address_spender=address_spender)
+            status, result = await self._get_state(addresses_tokens=[address_token], allowances=[(address_token, address_spender)])
             if status == 0:
-                allowance: int = result
-                status, result = await self.ERC20_get_balance(address_token=address_token)
-                if status == 0:
-                    balance: int = result
-                    if balance > 0:
-                        if (amount > balance) and (amount != self.amount_tokens_all):
-                            amount = balance
-                        if allowance >= amount:
-                            return 0, HexBytes(0)
-                        status, result = await self.ERC20_approve(address_token=address_token, address_spender=address_spender, amount=amount)
-                        if status == 0:
-                            return 0, result
-                        else:
-                            return -1, Exception(f'{log_process} | {result}')
+                snapshot: StateSnapshot = result
+                allowance = snapshot.get_allowance(address_token=address_token, address_spender=address_spender)
+                balance = snapshot.get_token_balance(address_token=address_token)
+                if balance > 0:
+                    if (amount > balance) and (amount != self.amount_tokens_all):
+                        amount = balance
+                    if allowance >= amount:
+                        return 0, HexBytes(0)
+                    status, result = await self.ERC20_approve(address_token=address_token, address_spender=address_spender, amount=amount)
+                    if status == 0:
+                        return 0, result
                     else:
-                        return -1, Exception(f'{log_process} | {result}')
+                        return -1, utils.get_exception(log_process, result)
                 else:
-                    return -1, Exception(f'{log_process} | {result}')
+                    return -1, utils.get_exception(log_process, balance)
             else:
-                return -1, Exception(f'{log_process} | {result}')
+                return -1, utils.get_exception(log_process, result)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_transfer_amount(self, amount: int, address_token: str, address_recipient: str) -> Tuple[int, Union[HexBytes, Exception]]:
         """Transfers an amount of an ERC20 token balance from the address to a specified recipient address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_transfer_amount'
         try:
             contract = self._get_contract_ERC20(address_token)
             data_transaction = contract.encodeABI(
@@ -339,66 +753,187 @@ class MyWeb3:
             if status == 0:
                 return 0, result
             else:
-                return -1, Exception(f'{log_process} | {result}')
+                return -1, utils.get_exception(log_process, result)
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
 
+    @instrument
     async def ERC20_transfer_percent(self, percent: float, address_token: str, address_recipient: str) -> Tuple[int, Union[HexBytes, Exception]]:
         """Transfers a percentage of an ERC20 token balance from the address to a specified recipient address."""
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+        log_process = 'ERC20_transfer_percent'
         try:
-            status, result = await self.ERC20_get_balance(address_token=address_token)
+            status, result = await self._get_state(addresses_tokens=[address_token])
             if status == 0:
-                balance: int = result
+                balance = result.get_token_balance(address_token=address_token)
                 amount = int(balance * (percent / 100))
                 status, result = await self.ERC20_transfer_amount(address_token=address_token, address_recipient=address_recipient, amount=amount)
                 if status == 0:
                     return 0, result
                 else:
-                    return -1, Exception(f'{log_process} | {result}')
+                    return -1, utils.get_exception(log_process, result)
             else:
-                return -1, Exception(f'{log_process} | {result}')
+                return -1, utils.get_exception(log_process, result)
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def ERC20_disperse_amounts(self, address_token: str, recipients: List[Tuple[str, int]], chunk_size: Optional[int] = None) -> Tuple[int, Union[List[Tuple[int, Union[HexBytes, Exception]]], Exception]]:
+        """
+        Transfers ERC20 token amounts to many (recipient, amount) pairs through the Disperse contract, in as few transactions
+        as the block gas limit allows. The contract is approved for the total first (and the approval awaited) if needed.
+        Returns the hash of the batch transaction (or the error) of every recipient.
+        """
+        log_process = 'ERC20_disperse_amounts'
+        try:
+            address_disperse = self.network.address_disperse
+            if not address_disperse:
+                return -1, Exception(f'{log_process} | no Disperse contract on {self.network.name}')
+            amount = sum(amount for _, amount in recipients)
+            # The contract is checked before the approval, so no allowance is left to an address without code.
+            (status, result), _ = await asyncio.gather(
+                self._get_state(addresses_tokens=[address_token], allowances=[(address_token, address_disperse)]),
+                self._check_disperse(),
+            )
+            if status != 0:
+                return -1, utils.get_exception(log_process, result)
+            snapshot: StateSnapshot = result
+            balance = snapshot.get_token_balance(address_token=address_token)
+            if balance < amount:
+                return -1, Exception(f'{log_process} | token balance {balance} < {amount}')
+            if snapshot.get_allowance(address_token=address_token, address_spender=address_disperse) < amount:
+                status, result = await self.ERC20_approve(amount=amount, address_token=address_token, address_spender=address_disperse)
+                if status != 0:
+                    return -1, utils.get_exception(log_process, result)
+                # The batches are estimated against the latest block, so the approval has to be included first.
+                status, result = await self.verify_transaction(transaction_hash=result)
+                if status != 0:
+                    return -1, utils.get_exception(log_process, result)
+                if not result:
+                    return -1, Exception(f'{log_process} | approve reverted')
+            return 0, await self._disperse(recipients=recipients, chunk_size=chunk_size, address_token=address_token, checked=True)
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def multicall(
+            self,
+            calls: List[Tuple[str, str]],
+            chunk_size: Optional[int] = None,
+            block_identifier: Union[str, int] = 'latest',
+    ) -> Tuple[int, Union[List[Tuple[bool, bytes]], Exception]]:
+        """Executes many (address_target, call_data) read calls through the Multicall3 contract at one block, split into chunks."""
+        log_process = 'multicall'
+        try:
+            chunk_size = chunk_size or self.multicall_chunk_size
+            chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+            results = await asyncio.gather(*[self._aggregate3(calls=chunk, block_identifier=block_identifier) for chunk in chunks])
+            return 0, [item for result in results for item in result]
         except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
+            return -1, utils.get_exception(log_process, e)
+
+    @instrument
+    async def get_state_snapshot(
+            self,
+            addresses_tokens: Optional[List[str]] = None,
+            allowances: Optional[List[Tuple[str, str]]] = None,
+    ) -> Tuple[int, Union[StateSnapshot, Exception]]:
+        """Reads balance, nonce, fees and token balances and allowances (pairs of token and spender) of the wallet at one block concurrently."""
+        log_process = 'get_state_snapshot'
+        try:
+            addresses_tokens, allowances = addresses_tokens or [], allowances or []
+            snapshot = self._snapshot
+            if (snapshot is not None) and self._is_state_snapshot_fresh(snapshot) and snapshot.covers(addresses_tokens, allowances):
+                return 0, snapshot
+            contract_multicall3 = self._get_contract_multicall3()
+            calls = [
+                (self.network.address_multicall3, contract_multicall3.encodeABI(fn_name='getBlockNumber')),
+                (self.network.address_multicall3, contract_multicall3.encodeABI(fn_name='getEthBalance', args=(self.address,))),
+            ]
+            calls += [(address_token, self._get_contract_ERC20(address_token).encodeABI(fn_name='balanceOf', args=(self.address,))) for address_token in addresses_tokens]
+            calls += [
+                (address_token, self._get_contract_ERC20(address_token).encodeABI(fn_name='allowance', args=(self.address, Web3.to_checksum_address(address_spender))))
+                for address_token, address_spender in allowances
+            ]
+
+            async def get_nonce() -> Optional[int]:
+                # With the nonce manager the nonce is handed out locally, so it is not read.
+                return None if self.nonce_manager else await self._get_transaction_count()
+
+            (status, result), nonce, fees = await asyncio.gather(self.multicall(calls=calls), get_nonce(), self._get_fees())
+            if status != 0:
+                return -1, utils.get_exception(log_process, result)
+            values = []
+            for (address_target, _), (success, return_data) in zip(calls, result):
+                if not success:
+                    return -1, Exception(f'{log_process} | {address_target} | call reverted')
+                values.append(self.w3.codec.decode(['uint256'], return_data)[0])
+            block_number, balance = values[0], values[1]
+            token_balances = {address_token.lower(): value for address_token, value in zip(addresses_tokens, values[2:])}
+            allowances_values = {
+                (address_token.lower(), address_spender.lower()): value
+                for (address_token, address_spender), value in zip(allowances, values[2 + len(addresses_tokens):])
+            }
+            if (self.engine.block_number is None) or (block_number > self.engine.block_number):
+                self.engine.block_number = block_number
+            snapshot = self._snapshot = StateSnapshot(
+                address=self.address, block_number=block_number, balance=balance, nonce=nonce,
+                token_balances=token_balances, allowances=allowances_values, fees=fees, time_taken=time.monotonic(),
+            )
+            return 0, snapshot
+        except Exception as e:
+            return -1, utils.get_exception(log_process, e)
 
     @staticmethod
     def generate_wallet() -> Wallet:
         """Generates a new wallet with seed_phrase, private_key and address."""
-        Account.enable_unaudited_hdwallet_features()
-        mnemo = Mnemonic("english")
-        seed_phrase = mnemo.generate(128)
-        account = Account.from_mnemonic(seed_phrase)
-        return Wallet(seed_phrase=str(seed_phrase), private_key=str(account.key.hex()), address=str(account.address))
-
-    def _get_w3(self, network: Network, proxy: Optional[str] = None, async_provider: Optional[bool] = False, poa_middleware: Optional[bool] = None) -> Web3:
-        if not async_provider:
-            if proxy is not None:
-                w3 = Web3(
-                    provider=Web3.HTTPProvider(
-                        endpoint_uri=network.rpc,
-                        request_kwargs={
-                            'proxies': {
-                                'http': f'http://{proxy}',
-                                'https': f'http://{proxy}',
-                            }
-                        },
-                    ),
-                )
-            else:
-                w3 = Web3(
-                    provider=Web3.HTTPProvider(
-                        endpoint_uri=network.rpc,
-                    ),
-                )
-        else:
-            w3 = Web3(
-                provider=Web3.AsyncHTTPProvider(endpoint_uri=network.rpc),
-                modules={"eth": (AsyncEth,)},
-                middlewares=[],
-            )
-        if poa_middleware is not None:
-            w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        return w3
+        from . import wallets
+        return wallets.generate_wallet()
+
+    @staticmethod
+    def generate_wallets(count: int, filename: str, workers: Optional[int] = None) -> int:
+        """Generates many independent wallets in a process pool and streams them to a JSONL or CSV file."""
+        from . import wallets
+        return wallets.write_wallets(wallets.generate_wallets(count=count, workers=workers), filename=filename)
+
+    @staticmethod
+    def derive_wallets(seed_phrase: str, count: int, filename: str, start: int = 0, workers: Optional[int] = None) -> int:
+        """Derives many accounts of one seed phrase (m/44'/60'/0'/0/i) and streams them to a JSONL or CSV file."""
+        from . import wallets
+        return wallets.write_wallets(wallets.derive_wallets(seed_phrase=seed_phrase, count=count, start=start, workers=workers), filename=filename)
+
+    async def _get_state(self, addresses_tokens: Optional[List[str]] = None, allowances: Optional[List[Tuple[str, str]]] = None) -> Tuple[int, Union[StateSnapshot, Exception]]:
+        # Composite operations read their state with one snapshot; on networks where it fails (e.g. no Multicall3 at the
+        # configured address) the balances and allowances are read with individual calls, as before snapshots existed.
+        status, result = await self.get_state_snapshot(addresses_tokens=addresses_tokens, allowances=allowances)
+        if status == 0:
+            return 0, result
+        addresses_tokens, allowances = addresses_tokens or [], allowances or []
+        results = await asyncio.gather(
+            self.get_balance(),
+            *[self.ERC20_get_balance(address_token=address_token) for address_token in addresses_tokens],
+            *[self.ERC20_get_allowance(address_token=address_token, address_spender=address_spender) for address_token, address_spender in allowances],
+        )
+        for status, result in results:
+            if status != 0:
+                return -1, result
+        values = [result for _, result in results]
+        return 0, StateSnapshot(
+            address=self.address, block_number=None, balance=values[0], nonce=None,
+            token_balances={address_token.lower(): value for address_token, value in zip(addresses_tokens, values[1:])},
+            allowances={
+                (address_token.lower(), address_spender.lower()): value
+                for (address_token, address_spender), value in zip(allowances, values[1 + len(addresses_tokens):])
+            },
+            fees={}, time_taken=time.monotonic(),
+        )
+
+    def _set_engine(self, **kwargs):
+        settings = {
+            'network': self.engine.network, 'proxy': self.engine.proxy, 'async_provider': self.engine.async_provider,
+            'rpc_batch': self.engine.rpc_batch, 'websocket': self.engine.websocket,
+        }
+        self.engine = get_engine(**{**settings, **kwargs})
+        self._snapshot = None
 
     def _get_address_wallet(self, address_wallet: Optional[str] = None) -> ChecksumAddress:
         if address_wallet is not None:
@@ -407,22 +942,150 @@ class MyWeb3:
             return self.address
 
     def _get_contract_ERC20(self, address_token: str) -> Contract:
-        return self.w3.eth.contract(address=Web3.to_checksum_address(address_token), abi=self.abi_ERC20)
+        return self.engine.get_contract(address=address_token, abi=self.abi_ERC20)
+
+    async def _get_transaction_count(self, block_identifier: str = 'latest') -> int:
+        if self.batcher is not None:
+            return int(await self.batcher.request('eth_getTransactionCount', [self.address, block_identifier]), 16)
+        return await afh(self.w3.eth.get_transaction_count, self.async_provider, self.address, block_identifier)
+
+    async def _get_transaction_count_pending(self) -> int:
+        return await self._get_transaction_count(block_identifier='pending')
 
-    async def _get_eth_gas_price_gwei(self, proxy: Optional[str] = None) -> Tuple[int, Union[int, Exception]]:
-        log_process = f'{inspect.currentframe().f_code.co_name}'
+    async def _wait_for_transaction_receipt_polling(self, transaction_hash: HexBytes) -> dict:
+        # Polls from the event loop, so waiting for a receipt does not hold a thread of the executor.
+        async def wait():
+            while True:
+                try:
+                    return await afh(self.w3.eth.get_transaction_receipt, self.async_provider, transaction_hash)
+                except TransactionNotFound:
+                    await asyncio.sleep(RECEIPT_POLL_LATENCY)
         try:
-            w3 = self._get_w3(network=ETHEREUM, proxy=proxy)
-            return 0, int(Web3.from_wei(int(w3.eth.gas_price), 'gwei'))
-        except Exception as e:
-            return -1, Exception(f'{log_process} | {e}')
-
-    async def _get_EIP_1559_gas_price_parameters(self, gas_increase_base: Optional[float] = None) -> Tuple[int, int]:
-        w3 = self._get_w3(network=self.network, proxy=self.proxy, poa_middleware=True, async_provider=False)
-        base_fee_per_gas = w3.eth.get_block('latest')['baseFeePerGas']
-        max_priority_fee_per_gas = int(w3.eth.max_priority_fee)
-        if gas_increase_base is not None:
-            max_fee_per_gas = max_priority_fee_per_gas + int(base_fee_per_gas * gas_increase_base)
+            return await asyncio.wait_for(wait(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(f'Transaction {Web3.to_hex(transaction_hash)} is not in the chain after {self.timeout} seconds')
+
+    def _is_state_snapshot_fresh(self, snapshot: StateSnapshot) -> bool:
+        # A snapshot expires when a newer block is reported to the engine or after STATE_SNAPSHOT_TTL seconds.
+        return (
+            (time.monotonic() - snapshot.time_taken < STATE_SNAPSHOT_TTL)
+            and ((self.engine.block_number is None) or (snapshot.block_number >= self.engine.block_number))
+        )
+
+    def _pop_state_snapshot(self) -> Optional[StateSnapshot]:
+        snapshot, self._snapshot = self._snapshot, None
+        return snapshot if (snapshot is not None) and self._is_state_snapshot_fresh(snapshot) else None
+
+    def _observe_receipt(self, transaction_hash: HexBytes, status: int, gas_used: int):
+        if self.gas_profiles:
+            self.gas_profile_cache.observe_receipt(transaction_hash=Web3.to_hex(transaction_hash), status=status, gas_used=gas_used)
+
+    def _get_contract_multicall3(self) -> Contract:
+        return self.engine.get_contract(address=self.network.address_multicall3, abi=self.abi_multicall3)
+
+    async def _get_l1_fee(self, tx: dict) -> int:
+        # The oracle prices the serialized transaction; a signed one is slightly larger than the unsigned one, so the fee is not underestimated.
+        contract = self.engine.get_contract(address=self.network.address_l1_fee_oracle, abi=self.abi_l1_fee_oracle)
+        sign = self.w3.eth.account.sign_transaction(tx, self.private_key)
+        return int(await afh(contract.functions.getL1Fee(sign.rawTransaction).call, self.async_provider))
+
+    async def _aggregate3(self, calls: List[Tuple[str, str]], block_identifier: Union[str, int] = 'latest') -> List[Tuple[bool, bytes]]:
+        # aggregate3 is encoded directly: contract function encoding normalizes (and checksums) every argument of every
+        # call, which takes ~1 ms per call, longer than the request itself for large chunks.
+        result = await afh(
+            self.w3.eth.call,
+            self.async_provider,
+            {
+                'to': self._get_contract_multicall3().address,
+                'data': SELECTOR_AGGREGATE3 + utils.encode_aggregate3([(address_target, True, call_data) for address_target, call_data in calls]).hex(),
+            },
+            block_identifier,
+        )
+        return utils.decode_aggregate3(result)
+
+    async def _ERC20_call_many(self, calls: List[Tuple[str, str, tuple]], output_type: str) -> List[Tuple[int, Union[int, str, Exception]]]:
+        calls_data = [
+            (address_token, self._get_contract_ERC20(address_token).encodeABI(fn_name=fn_name, args=args))
+            for address_token, fn_name, args in calls
+        ]
+        # Chunks are read separately, so a failed chunk only fails its own calls.
+        chunk_size = self.multicall_chunk_size
+        chunks = [calls_data[i:i + chunk_size] for i in range(0, len(calls_data), chunk_size)]
+        results_chunks = await asyncio.gather(*[self._aggregate3(calls=chunk) for chunk in chunks], return_exceptions=True)
+        results = []
+        for chunk, result in zip(chunks, results_chunks):
+            if isinstance(result, BaseException):
+                results.extend((-1, utils.get_exception('multicall', result)) for _ in chunk)
+                continue
+            for (address_token, _), (success, return_data) in zip(chunk, result):
+                if not success:
+                    results.append((-1, Exception(f'{address_token} | call reverted')))
+                    continue
+                try:
+                    results.append((0, self.w3.codec.decode([output_type], return_data)[0]))
+                except Exception as e:
+                    results.append((-1, Exception(f'{address_token} | {e}')))
+        return results
+
+    async def _check_disperse(self, ):
+        address_disperse = self.network.address_disperse
+        if not address_disperse:
+            raise Exception(f'no Disperse contract on {self.network.name}')
+        # A value call to an address without code would send the whole batch value to it.
+        if not await afh(self.w3.eth.get_code, self.async_provider, Web3.to_checksum_address(address_disperse)):
+            raise Exception(f'no Disperse contract at {address_disperse} on {self.network.name}')
+
+    async def _disperse(self, recipients: List[Tuple[str, int]], chunk_size: Optional[int] = None, address_token: Optional[str] = None, checked: bool = False) -> List[Tuple[int, Union[HexBytes, Exception]]]:
+        # `checked`: the caller already checked the contract code.
+        if checked:
+            block = await afh(self.w3.eth.get_block, self.async_provider, 'latest')
         else:
-            max_fee_per_gas = max_priority_fee_per_gas + int(base_fee_per_gas)
-        return max_priority_fee_per_gas, max_fee_per_gas
+            _, block = await asyncio.gather(self._check_disperse(), afh(self.w3.eth.get_block, self.async_provider, 'latest'))
+        gas_max = min(int(block['gasLimit'] * DISPERSE_BLOCK_GAS_SHARE), DISPERSE_GAS_MAX)
+        chunk_size = chunk_size or self.disperse_chunk_size
+        batches = await asyncio.gather(*[
+            self._get_disperse_batches(recipients=recipients[i:i + chunk_size], gas_max=gas_max, address_token=address_token)
+            for i in range(0, len(recipients), chunk_size)
+        ])
+        batches = [batch for chunk_batches in batches for batch in chunk_batches]
+
+        def send(batch: Tuple[List[Tuple[str, int]], dict, int], nonce: Optional[int] = None):
+            _, tx, gas = batch
+            return self.send_transaction(address_to=tx['to'], data=tx['data'], value=tx.get('value'), gas=gas, nonce=nonce)
+
+        if self.nonce_manager:
+            results = await asyncio.gather(*[send(batch) for batch in batches])
+        else:
+            # Batches are sent one by one with consecutive nonces; after a failure the rest is not sent, so no nonce gap is left.
+            nonce = await self._get_transaction_count_pending()
+            results = []
+            for batch in batches:
+                if results and (results[-1][0] != 0):
+                    results.append((-1, Exception('not sent: a previous batch failed')))
+                    continue
+                results.append(await send(batch, nonce=nonce + len(results)))
+        return [result for (chunk, _, _), result in zip(batches, results) for _ in chunk]
+
+    async def _get_disperse_batches(self, recipients: List[Tuple[str, int]], gas_max: int, address_token: Optional[str] = None) -> List[Tuple[List[Tuple[str, int]], dict, int]]:
+        # Chunks whose estimate exceeds the gas cap are split in proportion to the excess and estimated again.
+        if address_token is None:
+            data = SELECTOR_DISPERSE_ETHER + utils.encode_disperse(recipients).hex()
+        else:
+            data = SELECTOR_DISPERSE_TOKEN + utils.encode_disperse(recipients, address_token=address_token).hex()
+        tx = {'from': self.address, 'to': Web3.to_checksum_address(self.network.address_disperse), 'data': data}
+        if address_token is None:
+            tx['value'] = sum(amount for _, amount in recipients)
+        gas = await afh(self.w3.eth.estimate_gas, self.async_provider, tx)
+        if self.gas_increase_gas:
+            gas = int(gas * self.gas_increase_gas)
+        if (gas <= gas_max) or (len(recipients) == 1):
+            return [(recipients, tx, gas)]
+        size = max(1, min(len(recipients) - 1, int(len(recipients) * gas_max / gas)))
+        batches = await asyncio.gather(*[
+            self._get_disperse_batches(recipients=recipients[i:i + size], gas_max=gas_max, address_token=address_token)
+            for i in range(0, len(recipients), size)
+        ])
+        return [batch for chunk_batches in batches for batch in chunk_batches]
+
+    async def _get_EIP_1559_gas_price_parameters(self, ) -> Tuple[int, int]:
+        return await self.fee_oracle.get_EIP_1559_fees(w3=self.engine.w3_poa, asynchrony=self.async_provider, strategy=self.fee_strategy)
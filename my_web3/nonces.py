@@ -0,0 +1,68 @@
+from .utils import LoopLock
+from .models.network import Network
+
+from typing import Optional, Tuple, Dict, Callable, Awaitable
+
+
+class NonceState:
+    def __init__(self):
+        self.nonce: Optional[int] = None
+        self.lock = LoopLock()
+
+
+class NonceManager:
+    def __init__(self):
+        """
+        Hands out nonces locally per (network, address), so one wallet can send many transactions without waiting
+        for the previous ones to become visible on the node.
+
+        The nonce is fetched once (from the pending transaction count) and then incremented under an asyncio lock.
+        """
+        self._states: Dict[Tuple[int, str], NonceState] = {}
+
+    async def get_nonce(self, network: Network, address: str, fetch: Callable[[], Awaitable[int]]) -> int:
+        """Reserves the next nonce of the address. `fetch` returns the pending transaction count from the node."""
+        state = self._get_state(network=network, address=address)
+        async with state.lock.get():
+            if state.nonce is None:
+                state.nonce = await fetch()
+            nonce = state.nonce
+            state.nonce += 1
+            return nonce
+
+    async def resync(self, network: Network, address: str, fetch: Callable[[], Awaitable[int]]) -> int:
+        """Resets the local nonce of the address to the pending transaction count from the node."""
+        state = self._get_state(network=network, address=address)
+        async with state.lock.get():
+            state.nonce = await fetch()
+            return state.nonce
+
+    async def recover(self, network: Network, address: str, fetch: Callable[[], Awaitable[int]]) -> int:
+        """Reserves a new nonce after "nonce too low" or "replacement underpriced" errors."""
+        state = self._get_state(network=network, address=address)
+        async with state.lock.get():
+            state.nonce = max(state.nonce or 0, await fetch())
+            nonce = state.nonce
+            state.nonce += 1
+            return nonce
+
+    def release(self, network: Network, address: str, nonce: int):
+        """
+        Returns a reserved nonce which was never broadcast. Only the latest reserved nonce can be handed out again; releasing an
+        earlier one (later nonces are already reserved) resets the state to None, so the next `get_nonce` fetches the pending
+        transaction count from the node and the released nonce is reused once the node reports it as the next one.
+        """
+        state = self._get_state(network=network, address=address)
+        if state.nonce == nonce + 1:
+            state.nonce = nonce
+        else:
+            state.nonce = None
+
+    def _get_state(self, network: Network, address: str) -> NonceState:
+        key = (network.chain_id, address.lower())
+        if key not in self._states:
+            self._states[key] = NonceState()
+        return self._states[key]
+
+
+NONCES = NonceManager()
@@ -0,0 +1,505 @@
+from .constants import *
+from .utils import merge_streams
+from .engine import get_engine
+from .myweb3 import MyWeb3
+from .transfers import TransferScanner
+from .models.network import Network, NETWORKS_LIST
+from .models.token import Token, TOKENS_LIST
+from .models.transfer import Transfer
+from .models.balance import Balance
+
+from typing import Any, Optional, Union, Tuple, List, Dict, Collection, Set, Callable, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+
+import json
+import math
+import time
+import asyncio
+import hashlib
+import sqlite3
+import functools
+import collections
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    chain_id INTEGER PRIMARY KEY,
+    block INTEGER NOT NULL,
+    block_native INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS balances (
+    address_wallet TEXT NOT NULL,
+    chain_id INTEGER NOT NULL,
+    address_token TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (address_wallet, chain_id, address_token)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS transfers (
+    chain_id INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    address_token TEXT NOT NULL,
+    address_from TEXT NOT NULL,
+    address_to TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (chain_id, transaction_hash, log_index)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS transfers_from ON transfers (address_from, block_number);
+CREATE INDEX IF NOT EXISTS transfers_to ON transfers (address_to, block_number);
+"""
+
+
+class PortfolioIndex:
+    def __init__(
+            self,
+            path: str,
+            addresses_wallets: Collection[str],
+            networks: Optional[List[Network]] = None,
+            tokens: Optional[List[Token]] = None,
+            confirmations: Union[int, Dict[int, int]] = PORTFOLIO_CONFIRMATIONS,
+            proxy: Optional[str] = None,
+            async_provider: Optional[bool] = True,
+            reconcile_interval: Optional[float] = PORTFOLIO_RECONCILE_INTERVAL,
+    ):
+        """
+        Local SQLite index of native and ERC20 balances of wallets on several networks, answering portfolio queries without RPCs.
+
+        Each network is seeded once with Multicall3 balance reads pinned to a confirmed block and then kept current
+        incrementally by `sync` (or `run`): `Transfer` logs of new blocks are applied to token balances (and stored as
+        history), and native balances of wallets touched by transactions or withdrawals of new blocks are re-read. Only blocks
+        `confirmations` deep are ingested, so reorgs above that depth never reach the index. Changing the wallets or tokens
+        re-seeds the network.
+
+        Native balances changed by internal transactions (value sent by contracts) are only picked up when all wallets are
+        re-read, which `sync` does instead of scanning blocks when it costs fewer requests, or by `reconcile`.
+        Likewise, token balances changing without `Transfer` events (rebasing or fee-on-holding tokens) drift from the
+        chain until the next reconciliation, which `sync` runs every `reconcile_interval` seconds; mints and burns of
+        wrapped native coins (`Token.wrapped`, e.g. WETH) are applied from their `Deposit`/`Withdrawal` events, and a
+        balance going negative is re-read at once. Tokens whose `balanceOf` reverts for a wallet are not indexed for it.
+        Database writes run in a dedicated thread, so ingestion does not block the event loop.
+
+        :param path: SQLite database file (several indexes of different networks may share it).
+        :param addresses_wallets: Tracked wallet addresses.
+        :param networks: Tracked networks (NETWORKS_LIST by default).
+        :param tokens: Tracked tokens (TOKENS_LIST by default); tokens without an address on a network are skipped there.
+        :param confirmations: Number of blocks behind the head which are ingested (or a dict of it by chain id).
+        :param proxy: Proxy server address for redirecting API requests.
+        :param async_provider: Uses the async provider.
+        :param reconcile_interval: Time (in seconds) after which `sync` re-reads all balances of a network (never if None).
+        """
+        self.path = path
+        self.addresses_wallets = sorted({address_wallet.lower() for address_wallet in addresses_wallets})
+        self.networks = list(networks or NETWORKS_LIST)
+        self.confirmations = confirmations
+        self.reconcile_interval = reconcile_interval
+        self._reconciled: Dict[int, float] = {network.chain_id: time.monotonic() for network in self.networks}
+        self._wallets: Set[str] = set(self.addresses_wallets)
+        self._readers: Dict[int, MyWeb3] = {}
+        self._scanners: Dict[int, TransferScanner] = {}
+        self._addresses_tokens: Dict[int, List[str]] = {}
+        for network in self.networks:
+            addresses_tokens = sorted({token.addresses[network].lower() for token in tokens or TOKENS_LIST if token.addresses.get(network)})
+            addresses_wrapped = sorted({token.addresses[network].lower() for token in tokens or TOKENS_LIST if token.wrapped and token.addresses.get(network)})
+            self._addresses_tokens[network.chain_id] = addresses_tokens
+            self._readers[network.chain_id] = MyWeb3(network=network, proxy=proxy, async_provider=async_provider)
+            if addresses_tokens:
+                self._scanners[network.chain_id] = TransferScanner(
+                    network=network, addresses_tokens=addresses_tokens, addresses_wallets=self.addresses_wallets, proxy=proxy,
+                    async_provider=async_provider, addresses_wrapped=addresses_wrapped,
+                )
+        # Writes go through their own connection in a single thread (so they are serialized and off the event loop);
+        # queries read committed data through the caller's connection (WAL allows both at once).
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='my_web3_portfolio')
+        self._connection_write = sqlite3.connect(path, check_same_thread=False)
+        self._connection_write.execute('PRAGMA journal_mode=WAL')
+        self._connection_write.execute('PRAGMA synchronous=NORMAL')
+        self._connection_write.executescript(SCHEMA)
+        self._connection = sqlite3.connect(path)
+
+    async def sync(self) -> Dict[int, Union[int, Exception]]:
+        """Ingests the confirmed blocks of all networks concurrently; returns the indexed block (or the error) by chain id."""
+        results = await asyncio.gather(*[self._sync_network(network) for network in self.networks], return_exceptions=True)
+        return {network.chain_id: result for network, result in zip(self.networks, results)}
+
+    async def run(self, interval: float = PORTFOLIO_SYNC_INTERVAL):
+        """Syncs the index every `interval` seconds until cancelled."""
+        while True:
+            await self.sync()
+            await asyncio.sleep(interval)
+
+    async def reconcile(self, network: Optional[Network] = None):
+        """Re-reads all balances of the network (all networks if None) at the confirmed block."""
+        await asyncio.gather(*[self._seed(network=network, block=await self._get_block_confirmed(network)) for network in ([network] if network else self.networks)])
+
+    def get_block_number(self, network: Network) -> Optional[int]:
+        """Returns the block the token balances of the network are indexed at (None if the network is not seeded)."""
+        row = self._connection.execute('SELECT block FROM sync_state WHERE chain_id = ?', (network.chain_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def get_balance(self, network: Network, address_wallet: str, address_token: Optional[str] = None) -> Optional[int]:
+        """Returns the indexed balance of a token (native coin if None), or None if it is not indexed."""
+        row = self._connection.execute(
+            'SELECT amount FROM balances WHERE address_wallet = ? AND chain_id = ? AND address_token = ?',
+            (address_wallet.lower(), network.chain_id, (address_token or ADDRESS_ZERO).lower()),
+        ).fetchone()
+        return None if row is None else int(row[0])
+
+    def get_portfolio(
+            self,
+            addresses_wallets: Optional[Collection[str]] = None,
+            networks: Optional[List[Network]] = None,
+    ) -> Dict[str, Dict[int, Dict[str, int]]]:
+        """Returns non-zero balances as {wallet: {chain id: {token address (ADDRESS_ZERO for the native coin): amount}}}."""
+        query = "SELECT address_wallet, chain_id, address_token, amount FROM balances WHERE amount != '0'"
+        if networks is not None:
+            query += f" AND chain_id IN ({', '.join(str(int(network.chain_id)) for network in networks)})"
+        if addresses_wallets is None:
+            rows = self._connection.execute(query).fetchall()
+        else:
+            addresses_wallets = sorted({address_wallet.lower() for address_wallet in addresses_wallets})
+            rows = []
+            for i in range(0, len(addresses_wallets), PORTFOLIO_QUERY_CHUNK_SIZE):
+                chunk = addresses_wallets[i:i + PORTFOLIO_QUERY_CHUNK_SIZE]
+                rows += self._connection.execute(f"{query} AND address_wallet IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+        portfolio = {}
+        for address_wallet, chain_id, address_token, amount in rows:
+            portfolio.setdefault(address_wallet, {}).setdefault(chain_id, {})[address_token] = int(amount)
+        return portfolio
+
+    def get_transfers(self, address_wallet: str, network: Optional[Network] = None, limit: int = 100) -> List[Transfer]:
+        """Returns the latest indexed token transfers from or to the wallet (newest first)."""
+        query = 'SELECT chain_id, address_token, address_from, address_to, amount, block_number, transaction_hash, log_index FROM transfers WHERE (address_from = ? OR address_to = ?)'
+        parameters = [address_wallet.lower(), address_wallet.lower()]
+        if network is not None:
+            query += ' AND chain_id = ?'
+            parameters.append(network.chain_id)
+        query += ' ORDER BY block_number DESC, log_index DESC LIMIT ?'
+        parameters.append(limit)
+        return [
+            Transfer(
+                chain_id=chain_id, address_token=address_token, address_from=address_from, address_to=address_to, amount=int(amount),
+                block_number=block_number, transaction_hash=transaction_hash, log_index=log_index,
+            )
+            for chain_id, address_token, address_from, address_to, amount, block_number, transaction_hash, log_index in self._connection.execute(query, parameters)
+        ]
+
+    def close(self):
+        self._executor.submit(self._connection_write.close).result()
+        self._executor.shutdown()
+        self._connection.close()
+
+    async def _write(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _sync_network(self, network: Network) -> int:
+        block_confirmed = await self._get_block_confirmed(network)
+        row = self._connection.execute('SELECT block, block_native, fingerprint FROM sync_state WHERE chain_id = ?', (network.chain_id,)).fetchone()
+        reconcile = (self.reconcile_interval is not None) and (time.monotonic() - self._reconciled[network.chain_id] >= self.reconcile_interval)
+        if (row is None) or (row[2] != self._get_fingerprint(network)) or reconcile:
+            await self._seed(network=network, block=block_confirmed)
+            return block_confirmed
+        block, block_native, _ = row
+        if block_native < block_confirmed:
+            await self._sync_native(network=network, block_start=block_native + 1, block_end=block_confirmed)
+        if block < block_confirmed:
+            await self._sync_tokens(network=network, block_start=block + 1, block_end=block_confirmed)
+        return block_confirmed
+
+    async def _seed(self, network: Network, block: int):
+        pairs = [(address_wallet, ADDRESS_ZERO) for address_wallet in self.addresses_wallets]
+        pairs += [(address_wallet, address_token) for address_token in self._addresses_tokens[network.chain_id] for address_wallet in self.addresses_wallets]
+        balances = await self._read_balances(network=network, pairs=pairs, block=block)
+        await self._write(self._write_seed, network=network, balances=balances, block=block)
+        self._reconciled[network.chain_id] = time.monotonic()
+
+    def _write_seed(self, network: Network, balances: Dict[Tuple[str, str], int], block: int):
+        with self._connection_write as connection:
+            connection.execute('DELETE FROM balances WHERE chain_id = ?', (network.chain_id,))
+            connection.executemany(
+                'INSERT INTO balances VALUES (?, ?, ?, ?)',
+                [(address_wallet, network.chain_id, address_token, str(amount)) for (address_wallet, address_token), amount in balances.items()],
+            )
+            connection.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)', (network.chain_id, block, block, self._get_fingerprint(network)))
+
+    async def _sync_native(self, network: Network, block_start: int, block_end: int):
+        # Receipts would be needed to apply native transfers as deltas (gas fees, L1 fees), so touched balances are re-read instead;
+        # when re-reading all of them takes fewer requests than fetching the blocks, the blocks are not fetched at all.
+        if block_end - block_start + 1 < math.ceil(len(self.addresses_wallets) / self._readers[network.chain_id].multicall_chunk_size):
+            addresses_wallets = await self._get_wallets_touched(network=network, block_start=block_start, block_end=block_end)
+        else:
+            addresses_wallets = self.addresses_wallets
+        balances = await self._read_balances(network=network, pairs=[(address_wallet, ADDRESS_ZERO) for address_wallet in addresses_wallets], block=block_end)
+        await self._write(self._write_balances, network=network, balances=balances, block_native=block_end)
+
+    def _write_balances(self, network: Network, balances: Dict[Tuple[str, str], int], block_native: Optional[int] = None):
+        with self._connection_write as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO balances VALUES (?, ?, ?, ?)',
+                [(address_wallet, network.chain_id, address_token, str(amount)) for (address_wallet, address_token), amount in balances.items()],
+            )
+            if block_native is not None:
+                connection.execute('UPDATE sync_state SET block_native = ? WHERE chain_id = ?', (block_native, network.chain_id))
+
+    async def _sync_tokens(self, network: Network, block_start: int, block_end: int):
+        scanner = self._scanners.get(network.chain_id)
+        if scanner is None:
+            await self._commit_transfers(network=network, transfers=[], block=block_end)
+            return
+        # The index, not the scanner, keeps the progress: a failed sync resumes after the last committed block.
+        scanner.block_checkpoint = None
+        transfers = []
+        async for transfer in scanner.scan(block_start=block_start, block_end=block_end):
+            if (len(transfers) >= PORTFOLIO_COMMIT_SIZE) and (transfer.block_number > transfers[-1].block_number):
+                # Transfers are yielded in block order, so all transfers of the previous blocks are in the batch.
+                await self._commit_transfers(network=network, transfers=transfers, block=transfer.block_number - 1)
+                transfers = []
+            transfers.append(transfer)
+        await self._commit_transfers(network=network, transfers=transfers, block=block_end)
+
+    async def _commit_transfers(self, network: Network, transfers: List[Transfer], block: int):
+        negative = await self._write(self._write_transfers, network=network, transfers=transfers, block=block)
+        if negative:
+            # Balances changed without Transfer events (e.g. rebasing tokens): the affected ones are re-read at the committed block.
+            await self._write(self._write_balances, network=network, balances=await self._read_balances(network=network, pairs=negative, block=block))
+
+    def _write_transfers(self, network: Network, transfers: List[Transfer], block: int) -> List[Tuple[str, str]]:
+        # Returns the (wallet, token) pairs whose balance went negative.
+        deltas: Dict[Tuple[str, str], int] = collections.defaultdict(int)
+        negative = []
+        with self._connection_write as connection:
+            for transfer in transfers:
+                cursor = connection.execute(
+                    'INSERT OR IGNORE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        network.chain_id, transfer.transaction_hash, transfer.log_index, transfer.block_number,
+                        transfer.address_token, transfer.address_from, transfer.address_to, str(transfer.amount),
+                    ),
+                )
+                if cursor.rowcount != 1:
+                    continue  # Already applied.
+                if transfer.address_from in self._wallets:
+                    deltas[(transfer.address_from, transfer.address_token)] -= transfer.amount
+                if transfer.address_to in self._wallets:
+                    deltas[(transfer.address_to, transfer.address_token)] += transfer.amount
+            # Amounts are stored as text (uint256 does not fit SQLite integers), so deltas are added here.
+            for (address_wallet, address_token), delta in deltas.items():
+                row = connection.execute(
+                    'SELECT amount FROM balances WHERE address_wallet = ? AND chain_id = ? AND address_token = ?',
+                    (address_wallet, network.chain_id, address_token),
+                ).fetchone()
+                if row is None:
+                    continue  # The balance could not be read when the network was seeded, so it is not indexed.
+                amount = int(row[0]) + delta
+                if amount < 0:
+                    negative.append((address_wallet, address_token))
+                connection.execute('UPDATE balances SET amount = ? WHERE address_wallet = ? AND chain_id = ? AND address_token = ?', (str(amount), address_wallet, network.chain_id, address_token))
+            connection.execute('UPDATE sync_state SET block = ? WHERE chain_id = ?', (block, network.chain_id))
+        return negative
+
+    async def _get_wallets_touched(self, network: Network, block_start: int, block_end: int) -> List[str]:
+        engine = self._readers[network.chain_id].engine
+        semaphore = asyncio.Semaphore(PORTFOLIO_BLOCKS_CONCURRENCY)
+        touched = set()
+
+        async def fetch_block(block_number: int):
+            async with semaphore:
+                block = await engine.request('eth_getBlockByNumber', [hex(block_number), True])
+            for tx in block['transactions']:
+                touched.update(address for address in (tx['from'].lower(), (tx.get('to') or '').lower()) if address in self._wallets)
+            for withdrawal in block.get('withdrawals') or []:
+                if withdrawal['address'].lower() in self._wallets:
+                    touched.add(withdrawal['address'].lower())
+
+        await asyncio.gather(*[fetch_block(block_number) for block_number in range(block_start, block_end + 1)])
+        return sorted(touched)
+
+    async def _read_balances(self, network: Network, pairs: List[Tuple[str, str]], block: int) -> Dict[Tuple[str, str], int]:
+        calls = [get_balance_call(network=network, address_wallet=address_wallet, address_token=address_token) for address_wallet, address_token in pairs]
+        if not calls:
+            return {}
+        status, result = await self._readers[network.chain_id].multicall(calls=calls, block_identifier=block)
+        if status != 0:
+            raise result
+        # Calls are sent with allowFailure, so a token reverting for a wallet only leaves that pair out.
+        return {
+            (address_wallet, address_token): int.from_bytes(return_data[:32], 'big')
+            for (address_wallet, address_token), (success, return_data) in zip(pairs, result)
+            if success and (len(return_data) >= 32)
+        }
+
+    async def _get_block_confirmed(self, network: Network) -> int:
+        engine = self._readers[network.chain_id].engine
+        block_number = int(await engine.request('eth_blockNumber', []), 16)
+        engine.on_new_block(block_number)
+        confirmations = self.confirmations.get(network.chain_id, PORTFOLIO_CONFIRMATIONS) if isinstance(self.confirmations, dict) else self.confirmations
+        return max(0, block_number - confirmations)
+
+    def _get_fingerprint(self, network: Network) -> str:
+        return hashlib.sha256(json.dumps([self.addresses_wallets, self._addresses_tokens[network.chain_id]]).encode()).hexdigest()
+
+
+def get_balance_call(network: Network, address_wallet: str, address_token: str) -> Tuple[str, str]:
+    """Returns the Multicall3 call (target, data) reading the balance of a token (ADDRESS_ZERO for the native coin)."""
+    # Calls are encoded by hand: encoding tens of thousands of calls through contract objects takes seconds.
+    if address_token == ADDRESS_ZERO:
+        return network.address_multicall3, SELECTOR_GET_ETH_BALANCE + address_wallet[2:].lower().rjust(64, '0')
+    return address_token, SELECTOR_BALANCE_OF + address_wallet[2:].lower().rjust(64, '0')
+
+
+async def scan_balances(
+        addresses_wallets: Collection[str],
+        networks: Optional[List[Network]] = None,
+        tokens: Optional[List[Token]] = None,
+        proxy: Optional[str] = None,
+        async_provider: Optional[bool] = True,
+        concurrency: int = PORTFOLIO_SCAN_CONCURRENCY,
+        timeout: Optional[float] = PORTFOLIO_SCAN_TIMEOUT,
+        chunk_size: int = MULTICALL_CHUNK_SIZE,
+) -> AsyncIterator[Balance]:
+    """
+    Reads native and token balances of many wallets on all networks concurrently and yields them as they arrive.
+
+    Balances of a network are read in Multicall3 chunks of `chunk_size` calls (with the wallet's balances in one chunk),
+    at most `concurrency` chunks of a network at once; a chunk whose Multicall3 call fails is read with JSON-RPC batches
+    instead, and so is the rest of a network without Multicall3 deployed.
+    Chunks of a network not read within `timeout` seconds are yielded as balances with a `TimeoutError`, so the scan takes
+    as long as the slowest network, but never longer than the timeout.
+
+    :param addresses_wallets: Wallet addresses.
+    :param networks: Networks (NETWORKS_LIST by default).
+    :param tokens: Tokens (TOKENS_LIST by default); tokens without an address on a network are skipped there.
+    :param proxy: Proxy server address for redirecting API requests.
+    :param async_provider: Uses the async provider.
+    :param concurrency: Maximum number of chunks read concurrently per network.
+    :param timeout: Time (in seconds) each network is read for (unlimited if None).
+    :param chunk_size: Number of balances per Multicall3 call.
+    """
+    addresses_wallets = list(dict.fromkeys(address_wallet.lower() for address_wallet in addresses_wallets))
+    streams = []
+    for network in networks or NETWORKS_LIST:
+        addresses_tokens = list(dict.fromkeys(token.addresses[network].lower() for token in tokens or TOKENS_LIST if token.addresses.get(network)))
+        streams.append(_scan_network_balances(
+            network=network, addresses_wallets=addresses_wallets, addresses_tokens=[ADDRESS_ZERO] + addresses_tokens,
+            proxy=proxy, async_provider=async_provider, concurrency=concurrency, timeout=timeout, chunk_size=chunk_size,
+        ))
+    async for balance in merge_streams(streams):
+        yield balance
+
+
+async def _scan_network_balances(
+        network: Network,
+        addresses_wallets: List[str],
+        addresses_tokens: List[str],
+        proxy: Optional[str],
+        async_provider: Optional[bool],
+        concurrency: int,
+        timeout: Optional[float],
+        chunk_size: int,
+) -> AsyncIterator[Balance]:
+    reader = MyWeb3(network=network, proxy=proxy, async_provider=async_provider)
+    semaphore = asyncio.Semaphore(concurrency)
+    multicall = [True]
+    code_check: List[Optional[asyncio.Future]] = [None]
+
+    async def read_chunk(chunk: List[Tuple[str, str]]) -> List[Balance]:
+        async with semaphore:
+            if multicall[0]:
+                balances = await _read_chunk_multicall(reader=reader, chunk=chunk)
+                if balances is not None:
+                    return balances
+                # Multicall3 is given up for the network only when it is not deployed; after other failures (timeouts,
+                # rate limits) only this chunk is read with JSON-RPC batches, so a struggling endpoint is not flooded.
+                if code_check[0] is None:
+                    code_check[0] = asyncio.ensure_future(_has_code(reader=reader, address=network.address_multicall3))
+                has_code = await asyncio.shield(code_check[0])
+                if has_code is None:
+                    code_check[0] = None  # Unknown: checked again after the next failure.
+                elif not has_code:
+                    multicall[0] = False
+            return await _read_chunk_batch(network=network, proxy=proxy, chunk=chunk)
+
+    # Chunks hold whole wallets, so each wallet's balances on the network arrive together.
+    wallets_per_chunk = max(1, chunk_size // len(addresses_tokens))
+    chunks = {}
+    for i in range(0, len(addresses_wallets), wallets_per_chunk):
+        chunk = [(address_wallet, address_token) for address_wallet in addresses_wallets[i:i + wallets_per_chunk] for address_token in addresses_tokens]
+        chunks[asyncio.ensure_future(read_chunk(chunk))] = chunk
+    pending = set(chunks)
+    deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=None if deadline is None else max(0., deadline - asyncio.get_running_loop().time()), return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for task in done:
+                for balance in task.result():
+                    yield balance
+        for task in pending:
+            task.cancel()
+            for address_wallet, address_token in chunks[task]:
+                yield Balance(
+                    chain_id=network.chain_id, address_wallet=address_wallet, address_token=address_token, amount=None,
+                    error=asyncio.TimeoutError(f'{network.name} | balances not read in {timeout} s'),
+                )
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _has_code(reader: MyWeb3, address: str) -> Optional[bool]:
+    # Returns None when the code could not be read.
+    try:
+        code = await reader.engine.request('eth_getCode', [address, 'latest'])
+    except Exception:
+        return None
+    return code not in (None, '', '0x')
+
+
+async def _read_chunk_multicall(reader: MyWeb3, chunk: List[Tuple[str, str]]) -> Optional[List[Balance]]:
+    network = reader.network
+    calls = [(network.address_multicall3, SELECTOR_GET_BLOCK_NUMBER)]
+    calls += [get_balance_call(network=network, address_wallet=address_wallet, address_token=address_token) for address_wallet, address_token in chunk]
+    status, result = await reader.multicall(calls=calls, chunk_size=len(calls))
+    if (status != 0) or (not result[0][0]) or (len(result[0][1]) < 32):
+        return None  # Multicall3 failed (the caller checks whether it is deployed).
+    block_number = int.from_bytes(result[0][1][:32], 'big')
+    balances = []
+    for (address_wallet, address_token), (success, return_data) in zip(chunk, result[1:]):
+        if success and (len(return_data) >= 32):
+            balances.append(Balance(
+                chain_id=network.chain_id, address_wallet=address_wallet, address_token=address_token,
+                amount=int.from_bytes(return_data[:32], 'big'), block_number=block_number,
+            ))
+        else:
+            balances.append(Balance(
+                chain_id=network.chain_id, address_wallet=address_wallet, address_token=address_token, amount=None,
+                block_number=block_number, error=Exception(f'{network.name} | {address_token} | call reverted'),
+            ))
+    return balances
+
+
+async def _read_chunk_batch(network: Network, proxy: Optional[str], chunk: List[Tuple[str, str]]) -> List[Balance]:
+    batcher = get_engine(network=network, proxy=proxy, async_provider=True, rpc_batch=True).batcher
+    requests = []
+    for address_wallet, address_token in chunk:
+        if address_token == ADDRESS_ZERO:
+            requests.append(batcher.request('eth_getBalance', [address_wallet, 'latest']))
+        else:
+            _, data = get_balance_call(network=network, address_wallet=address_wallet, address_token=address_token)
+            requests.append(batcher.request('eth_call', [{'to': address_token, 'data': data}, 'latest']))
+    results = await asyncio.gather(*requests, return_exceptions=True)
+    balances = []
+    for (address_wallet, address_token), result in zip(chunk, results):
+        try:
+            if isinstance(result, BaseException):
+                raise result
+            balances.append(Balance(chain_id=network.chain_id, address_wallet=address_wallet, address_token=address_token, amount=int(result, 16)))
+        except Exception as e:
+            balances.append(Balance(
+                chain_id=network.chain_id, address_wallet=address_wallet, address_token=address_token, amount=None,
+                error=Exception(f'{network.name} | {address_token} | {e}'),
+            ))
+    return balances
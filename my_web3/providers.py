@@ -0,0 +1,294 @@
+from .constants import *
+from .router import RpcRouter
+from .ratelimit import check_rate_limit
+from .metrics import KIND_RPC, get_metrics, observe, observe_sync
+from .models.network import Network
+
+from typing import Any, Optional, Tuple, Dict
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from requests.adapters import HTTPAdapter
+from web3.eth import AsyncEth
+from web3.types import RPCEndpoint, RPCResponse
+
+import asyncio
+import requests
+import threading
+
+from web3 import Web3, HTTPProvider, AsyncHTTPProvider
+from web3.middleware import geth_poa_middleware, async_geth_poa_middleware
+
+
+class PooledHTTPProvider(HTTPProvider):
+    def __init__(self, router: RpcRouter, registry: 'ProviderRegistry', proxy: Optional[str] = None):
+        """HTTP provider sending requests over the endpoints of the router through the keep-alive session pool of the registry."""
+        super().__init__(endpoint_uri=router.endpoints[0].uri)
+        self.router = router
+        self.registry = registry
+        self.proxy = proxy
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        metrics = get_metrics()
+        if metrics.enabled:
+            return observe_sync(metrics, KIND_RPC, method, lambda: self._make_request(method=method, params=params), get_error=get_response_error)
+        return self._make_request(method=method, params=params)
+
+    def _make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        response = self.decode_rpc_response(self.router.request_sync(
+            lambda uri: self._post(uri=uri, request_data=request_data),
+            write=method in ROUTER_WRITE_METHODS,
+        ))
+        return get_response_write(method=method, params=params, response=response)
+
+    def _post(self, uri: str, request_data: bytes) -> bytes:
+        response = self.registry.get_session().post(
+            uri,
+            data=request_data,
+            headers=self.get_request_headers(),
+            proxies=self.registry.get_proxies(self.proxy),
+            timeout=self.registry.request_timeout,
+        )
+        check_rate_limit(status=response.status_code, headers=response.headers, content=response.content)
+        response.raise_for_status()
+        return response.content
+
+
+class PooledAsyncHTTPProvider(AsyncHTTPProvider):
+    def __init__(self, router: RpcRouter, registry: 'ProviderRegistry', proxy: Optional[str] = None):
+        """Async HTTP provider sending requests over the endpoints of the router through the keep-alive session pool of the registry."""
+        super().__init__(endpoint_uri=router.endpoints[0].uri)
+        self.router = router
+        self.registry = registry
+        self.proxy = proxy
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        metrics = get_metrics()
+        if metrics.enabled:
+            return await observe(metrics, KIND_RPC, method, self._make_request(method=method, params=params), get_error=get_response_error)
+        return await self._make_request(method=method, params=params)
+
+    async def _make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request_data = self.encode_rpc_request(method, params)
+        response = self.decode_rpc_response(await self.router.request(
+            lambda uri: self._post(uri=uri, request_data=request_data),
+            write=method in ROUTER_WRITE_METHODS,
+        ))
+        return get_response_write(method=method, params=params, response=response)
+
+    async def _post(self, uri: str, request_data: bytes) -> bytes:
+        async with self.registry.get_async_session().post(
+                uri,
+                data=request_data,
+                headers=self.get_request_headers(),
+                proxy=self.registry.get_proxy_url(self.proxy),
+        ) as response:
+            content = await response.read()
+            check_rate_limit(status=response.status, headers=response.headers, content=content)
+            response.raise_for_status()
+            return content
+
+
+def get_response_error(response: RPCResponse) -> Optional[str]:
+    return 'JSONRPCError' if 'error' in response else None
+
+
+def get_response_write(method: RPCEndpoint, params: Any, response: RPCResponse) -> RPCResponse:
+    # A transaction sent again after a fail over may already be known to the node: it is broadcast, so its hash is the result.
+    if (method == 'eth_sendRawTransaction') and (ERROR_ALREADY_KNOWN in str(response.get('error', ''))):
+        return {'jsonrpc': response.get('jsonrpc', '2.0'), 'id': response.get('id'), 'result': Web3.to_hex(Web3.keccak(hexstr=params[0]))}
+    return response
+
+
+class ProviderRegistry:
+    def __init__(
+            self,
+            pool_connections: int = PROVIDER_POOL_CONNECTIONS,
+            pool_maxsize: int = PROVIDER_POOL_MAXSIZE,
+            keepalive_timeout: float = PROVIDER_KEEPALIVE_TIMEOUT,
+            request_timeout: float = PROVIDER_REQUEST_TIMEOUT,
+            hedge_reads: bool = False,
+    ):
+        """
+        Process-wide registry handing out shared `Web3` instances keyed by (network, proxy, async_provider, poa_middleware).
+
+        All providers send requests through pooled keep-alive sessions (one `requests.Session` for sync providers and
+        one `aiohttp.ClientSession` per event loop for async providers), so many wallets reuse a handful of TCP/TLS connections.
+
+        :param pool_connections: Number of per-host connection pools kept by the sync session.
+        :param pool_maxsize: Maximum number of keep-alive connections per host.
+        :param keepalive_timeout: Time (in seconds) an idle async connection is kept open.
+        :param request_timeout: Timeout (in seconds) of a single HTTP request.
+        :param hedge_reads: Sends slow async reads to a second endpoint of networks with several RPC endpoints.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.hedge_reads = hedge_reads
+        self._lock = threading.RLock()
+        self._w3s: Dict[Tuple[Tuple[str, ...], Optional[str], bool, bool, bool], Web3] = {}
+        self._routers: Dict[Tuple[str, ...], RpcRouter] = {}
+        self._session: Optional[requests.Session] = None
+        self._async_sessions: Dict[asyncio.AbstractEventLoop, ClientSession] = {}
+
+    def configure(
+            self,
+            pool_connections: Optional[int] = None,
+            pool_maxsize: Optional[int] = None,
+            keepalive_timeout: Optional[float] = None,
+            request_timeout: Optional[float] = None,
+            hedge_reads: Optional[bool] = None,
+    ):
+        """Changes pool and routing settings. The shared sessions are closed, the next requests open new ones with the new pool values."""
+        with self._lock:
+            if hedge_reads is not None:
+                self.hedge_reads = hedge_reads
+                for router in self._routers.values():
+                    router.hedge = hedge_reads
+            if (pool_connections, pool_maxsize, keepalive_timeout, request_timeout) == (None, None, None, None):
+                return
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            if keepalive_timeout is not None:
+                self.keepalive_timeout = keepalive_timeout
+            if request_timeout is not None:
+                self.request_timeout = request_timeout
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+            for loop, session in self._async_sessions.items():
+                self._close_async_session(loop=loop, session=session)
+            self._async_sessions = {}
+
+    def get_w3(
+            self,
+            network: Network,
+            proxy: Optional[str] = None,
+            async_provider: Optional[bool] = False,
+            poa_middleware: Optional[bool] = None,
+            websocket: Optional[bool] = False,
+    ) -> Web3:
+        """Returns the shared `Web3` instance of the network (`websocket` sends requests over the network WebSocket connection)."""
+        key = (tuple(network.rpcs), proxy, bool(async_provider) or bool(websocket), poa_middleware is not None, bool(websocket))
+        w3 = self._w3s.get(key)
+        if w3 is None:
+            with self._lock:
+                w3 = self._w3s.get(key)
+                if w3 is None:
+                    w3 = self._w3s[key] = self._build_w3(network=network, proxy=proxy, async_provider=async_provider, poa_middleware=poa_middleware, websocket=websocket)
+        return w3
+
+    def get_router(self, network: Network) -> RpcRouter:
+        """Returns the shared router over the RPC endpoints of the network."""
+        key = tuple(network.rpcs)
+        router = self._routers.get(key)
+        if router is None:
+            with self._lock:
+                router = self._routers.get(key)
+                if router is None:
+                    router = self._routers[key] = RpcRouter(uris=network.rpcs, hedge=self.hedge_reads)
+        return router
+
+    def get_session(self) -> requests.Session:
+        """Returns the shared sync session."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def get_async_session(self) -> ClientSession:
+        """Returns the shared async session of the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            for loop_stale in [loop_stale for loop_stale in self._async_sessions if loop_stale.is_closed()]:
+                self._discard_async_session(self._async_sessions.pop(loop_stale))
+            session = self._async_sessions[loop] = ClientSession(
+                connector=TCPConnector(
+                    limit=self.pool_connections * self.pool_maxsize,
+                    limit_per_host=self.pool_maxsize,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+                timeout=ClientTimeout(total=self.request_timeout),
+            )
+        return session
+
+    async def close(self):
+        """Closes the shared sessions. They are recreated on the next request."""
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _close_async_session(self, loop: asyncio.AbstractEventLoop, session: ClientSession):
+        if loop.is_closed() or not loop.is_running():
+            self._discard_async_session(session)
+        else:
+            # configure may run in another thread than the loop of the session, which closes it itself.
+            loop.call_soon_threadsafe(lambda: asyncio.ensure_future(session.close()))
+
+    @staticmethod
+    def _discard_async_session(session: ClientSession):
+        # The session may belong to a closed loop, so its connections are dropped without awaiting.
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            connector._close()
+
+    @staticmethod
+    def get_proxy_url(proxy: Optional[str] = None) -> Optional[str]:
+        return f'http://{proxy}' if proxy is not None else None
+
+    @staticmethod
+    def get_proxies(proxy: Optional[str] = None) -> Optional[Dict[str, str]]:
+        if proxy is None:
+            return None
+        return {
+            'http': f'http://{proxy}',
+            'https': f'http://{proxy}',
+        }
+
+    def _build_w3(
+            self,
+            network: Network,
+            proxy: Optional[str] = None,
+            async_provider: Optional[bool] = False,
+            poa_middleware: Optional[bool] = None,
+            websocket: Optional[bool] = False,
+    ) -> Web3:
+        if websocket:
+            # Imported here: the websocket module depends on this one.
+            from .websocket import WebSocketProvider, get_ws_client
+
+            async_provider = True
+            w3 = Web3(
+                provider=WebSocketProvider(client=get_ws_client(network=network, proxy=proxy)),
+                modules={"eth": (AsyncEth,)},
+                middlewares=[],
+            )
+        elif not async_provider:
+            w3 = Web3(
+                provider=PooledHTTPProvider(router=self.get_router(network=network), registry=self, proxy=proxy),
+            )
+        else:
+            w3 = Web3(
+                provider=PooledAsyncHTTPProvider(router=self.get_router(network=network), registry=self, proxy=proxy),
+                modules={"eth": (AsyncEth,)},
+                middlewares=[],
+            )
+        if poa_middleware is not None:
+            w3.middleware_onion.inject(async_geth_poa_middleware if async_provider else geth_poa_middleware, layer=0)
+        return w3
+
+
+PROVIDERS = ProviderRegistry()
@@ -0,0 +1,164 @@
+from .constants import *
+
+from typing import Optional, Tuple, Deque, Mapping
+
+import time
+import asyncio
+import threading
+import collections
+
+
+class RateLimitError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(message: str) -> bool:
+    message = message.lower()
+    if any(error in message for error in ERRORS_LOGS_RANGE):
+        return False  # Log queries over the provider limit share -32005 with rate limits, they are split instead.
+    return any(error in message for error in ERRORS_RATE_LIMIT)
+
+
+def get_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def check_rate_limit(status: int, headers: Mapping[str, str], content: bytes):
+    """Raises `RateLimitError` for an HTTP 429 response or a small JSON-RPC error response about rate limits."""
+    if status == 429:
+        raise RateLimitError(f'{status} Too Many Requests', retry_after=get_retry_after(headers.get('Retry-After')))
+    if (len(content) <= RATE_LIMIT_ERROR_SIZE_MAX) and (b'"error"' in content):
+        message = content.decode(errors='ignore')
+        if is_rate_limit_error(message):
+            raise RateLimitError(message, retry_after=get_retry_after(headers.get('Retry-After')))
+
+
+class RateLimiter:
+    def __init__(
+            self,
+            rate: float = RATE_LIMIT_RATE,
+            rate_max: float = RATE_LIMIT_RATE_MAX,
+            concurrency: int = RATE_LIMIT_CONCURRENCY,
+            concurrency_max: int = RATE_LIMIT_CONCURRENCY_MAX,
+    ):
+        """
+        Adaptive limiter of one RPC endpoint: a token bucket for the request rate plus an AIMD limit of concurrent requests.
+
+        Until the first throttled request the limits grow fast (slow start: every success adds one request per second and one slot);
+        afterwards every success raises the rate by a small step and the concurrency by about one slot per window of requests;
+        a throttled request (HTTP 429 or a "rate limit" error) reduces both multiplicatively and pauses the endpoint for the `Retry-After` time, so the limiter converges to the highest throughput the endpoint allows.
+        Works for both async (`acquire`) and thread pool (`acquire_sync`) callers.
+
+        :param rate: Initial request rate (requests per second).
+        :param rate_max: Maximum request rate (requests per second).
+        :param concurrency: Initial limit of concurrent requests.
+        :param concurrency_max: Maximum limit of concurrent requests.
+        """
+        self.rate = float(rate)
+        self.rate_max = float(rate_max)
+        self.concurrency = float(concurrency)
+        self.concurrency_max = float(concurrency_max)
+        self.tokens = float(rate)
+        self.in_flight = 0
+        self.slow_start = True
+        self.paused_until = 0.
+        self._refill_time = time.monotonic()
+        self._condition = threading.Condition()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = collections.deque()
+
+    async def acquire(self):
+        """Waits for a request slot."""
+        loop = asyncio.get_running_loop()
+        # One future per waiter: it stays queued across the periodic rechecks and is replaced only after a wake-up.
+        future: Optional[asyncio.Future] = None
+        acquired = False
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire()
+                    if (wait is None) and ((future is None) or future.done()):
+                        future = loop.create_future()
+                        self._waiters.append((loop, future))
+                if wait == 0:
+                    acquired = True
+                    return
+                if wait is None:
+                    await asyncio.wait([future], timeout=RATE_LIMIT_WAIT_MAX)
+                else:
+                    await asyncio.sleep(wait)
+        finally:
+            if future is not None:
+                with self._condition:
+                    if not future.done():
+                        future.cancel()
+                        try:
+                            self._waiters.remove((loop, future))
+                        except ValueError:
+                            pass
+                    elif not (acquired or future.cancelled()):
+                        # Woken up but left (cancelled) without taking the slot: the wake-up goes to the next waiter.
+                        self._wake_waiters(1)
+
+    def acquire_sync(self):
+        """Waits for a request slot, blocking the current thread."""
+        with self._condition:
+            while True:
+                wait = self._try_acquire()
+                if wait == 0:
+                    return
+                self._condition.wait(timeout=wait if wait is not None else RATE_LIMIT_WAIT_MAX)
+
+    def release(self, throttled: Optional[bool] = False, retry_after: Optional[float] = None):
+        """Frees a request slot and adapts the limits: `False` for a success, `True` for a throttled request, `None` keeps them."""
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                now = time.monotonic()
+                # Requests throttled while the endpoint is paused belong to the same burst, so the limits are decreased once.
+                if now >= self.paused_until:
+                    self.slow_start = False
+                    self.rate = max(RATE_LIMIT_RATE_MIN, self.rate * RATE_LIMIT_DECREASE)
+                    self.concurrency = max(1., self.concurrency * RATE_LIMIT_DECREASE)
+                    self.tokens = min(self.tokens, 0.)
+                self.paused_until = max(self.paused_until, now + (retry_after or RATE_LIMIT_BACKOFF))
+            elif self.slow_start and (throttled is not None):
+                self.rate = min(self.rate_max, self.rate + 1)
+                self.concurrency = min(self.concurrency_max, self.concurrency + 1)
+            elif throttled is not None:
+                self.rate = min(self.rate_max, self.rate + RATE_LIMIT_RATE_INCREASE)
+                self.concurrency = min(self.concurrency_max, self.concurrency + RATE_LIMIT_CONCURRENCY_INCREASE / self.concurrency)
+            self._condition.notify_all()
+            self._wake_waiters(max(1, int(self.concurrency) - self.in_flight))
+
+    def _wake_waiters(self, slots: int):
+        # Called with the condition held; waiters that already left (done futures, closed loops) do not use up a slot.
+        while self._waiters and slots:
+            loop, future = self._waiters.popleft()
+            if not (future.done() or loop.is_closed()):
+                loop.call_soon_threadsafe(self._wake, future)
+                slots -= 1
+
+    def _try_acquire(self) -> Optional[float]:
+        # Returns 0 when a slot is taken, the time to wait for a token, or None when all concurrent slots are busy.
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self._refill_time) * self.rate)
+        self._refill_time = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.concurrency):
+            return None
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    @staticmethod
+    def _wake(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
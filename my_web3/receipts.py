@@ -0,0 +1,174 @@
+from .constants import *
+from .batching import get_batcher
+from .models.network import Network
+from .models.receipt import Receipt
+from .metrics import KIND_TASK, get_metrics, observe
+
+from typing import Union, Optional, Tuple, List, Dict, Set
+from web3.exceptions import TimeExhausted
+
+import asyncio
+
+
+class ReceiptTracker:
+    def __init__(
+            self,
+            network: Network,
+            proxy: Optional[str] = None,
+            interval: float = RECEIPT_TRACKER_INTERVAL,
+            block_receipts: Optional[bool] = None,
+    ):
+        """
+        Tracks receipts of many transactions with a single poller per network.
+
+        The head block is polled once per `interval`; on each new block all pending hashes are resolved with one JSON-RPC batch
+        (or with `eth_getBlockReceipts` of the new blocks where the node supports it), so network load grows with blocks,
+        not with pending transactions. When heads are pushed (`pushed`, e.g. by a `newHeads` subscription), the reported
+        head is used instead and the head block is only polled once per `WS_FALLBACK_INTERVAL` as a fallback.
+
+        :param network: Network of the tracked transactions.
+        :param proxy: Proxy server address for redirecting API requests.
+        :param interval: Time (in seconds) between head block polls.
+        :param block_receipts: Use `eth_getBlockReceipts` (`None` detects support automatically).
+        """
+        self.network = network
+        self.batcher = get_batcher(network=network, proxy=proxy)
+        self.interval = interval
+        self.block_receipts = block_receipts
+        self.block_number: Optional[int] = None
+        self.pushed = False
+        self.errors = 0
+        self.error: Optional[Exception] = None
+        self._block_pushed: Optional[int] = None
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._unchecked: Set[str] = set()
+        self._new_block = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def track(self, transaction_hash: str, timeout: float = TIMEOUT) -> Receipt:
+        """Waits for the receipt of the transaction."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._futures = {}
+            self._waiters = {}
+            self._unchecked = set()
+            self._new_block = asyncio.Event()
+            self._task = None
+        transaction_hash = transaction_hash.lower()
+        future = self._futures.get(transaction_hash)
+        if future is None:
+            future = self._futures[transaction_hash] = loop.create_future()
+            self._unchecked.add(transaction_hash)
+        # Callers of the same hash share its future, which is dropped only when the last of them stops waiting.
+        self._waiters[transaction_hash] = self._waiters.get(transaction_hash, 0) + 1
+        if (self._task is None) or self._task.done():
+            self._task = loop.create_task(self._run())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(f'Transaction {transaction_hash} is not in the chain after {timeout} seconds')
+        finally:
+            self._waiters[transaction_hash] -= 1
+            if self._waiters[transaction_hash] == 0:
+                del self._waiters[transaction_hash]
+                if self._futures.get(transaction_hash) is future:
+                    del self._futures[transaction_hash]
+                    self._unchecked.discard(transaction_hash)
+
+    async def track_many(self, transactions_hashes: List[str], timeout: float = TIMEOUT) -> List[Tuple[int, Union[Receipt, Exception]]]:
+        """Waits for the receipts of many transactions."""
+        results = await asyncio.gather(*[self.track(transaction_hash, timeout=timeout) for transaction_hash in transactions_hashes], return_exceptions=True)
+        return [(-1, result) if isinstance(result, Exception) else (0, result) for result in results]
+
+    def on_new_block(self, block_number: int):
+        """Reports a new head block (e.g. from a `newHeads` subscription), so receipts are fetched without waiting for the next poll."""
+        if (self._block_pushed is None) or (block_number > self._block_pushed):
+            self._block_pushed = block_number
+        if (self.block_number is None) or (block_number > self.block_number):
+            self._new_block.set()
+
+    async def _run(self):
+        polled = False
+        while self._futures:
+            metrics = get_metrics()
+            try:
+                if metrics.enabled:
+                    await observe(metrics, KIND_TASK, type(self).__name__, self._poll(polled=polled))
+                else:
+                    await self._poll(polled=polled)
+                self.error = None
+            except Exception as e:
+                # Retried on the next block; the failure is kept for inspection (and observed when metrics are enabled).
+                self.errors += 1
+                self.error = e
+            if self._futures:
+                self._new_block.clear()
+                try:
+                    await asyncio.wait_for(self._new_block.wait(), timeout=WS_FALLBACK_INTERVAL if self.pushed else self.interval)
+                    polled = False
+                except asyncio.TimeoutError:
+                    polled = True
+
+    async def _poll(self, polled: bool):
+        if self.pushed and (self._block_pushed is not None) and not polled:
+            block_number = self._block_pushed
+        else:
+            block_number = int(await self.batcher.request('eth_blockNumber', []), 16)
+        if (self.block_number is None) or (block_number > self.block_number) or self._unchecked:
+            self.block_number = await self._fetch_receipts(block_number=block_number)
+
+    async def _fetch_receipts(self, block_number: int) -> int:
+        # Returns the last block whose receipts are all checked.
+        unchecked, self._unchecked = self._unchecked, set()
+        hashes = set(self._futures)
+        block_checked = block_number
+        blocks = []
+        if (self.block_receipts is not False) and (self.block_number is not None):
+            blocks = list(range(self.block_number + 1, block_number + 1))
+            if (len(blocks) > RECEIPT_TRACKER_BLOCK_RECEIPTS_MAX_BLOCKS) or (len(blocks) >= len(hashes - unchecked)):
+                blocks = []
+        if blocks:
+            try:
+                results = await asyncio.gather(*[self.batcher.request('eth_getBlockReceipts', [hex(block)]) for block in blocks])
+                self.block_receipts = True
+                for receipts in results:
+                    for receipt in receipts or []:
+                        self._resolve(receipt)
+                if any(receipts is None for receipts in results):
+                    # A lagging endpoint does not know the block yet: the transactions are looked up one by one,
+                    # and the block is read again on the next poll.
+                    unchecked = hashes
+                    block_checked = min(block for block, receipts in zip(blocks, results) if receipts is None) - 1
+            except Exception:
+                if not self.block_receipts:
+                    self.block_receipts = False
+                unchecked = hashes
+        else:
+            unchecked = hashes
+        unchecked = [transaction_hash for transaction_hash in unchecked if transaction_hash in self._futures]
+        results = await asyncio.gather(*[self.batcher.request('eth_getTransactionReceipt', [transaction_hash]) for transaction_hash in unchecked], return_exceptions=True)
+        for transaction_hash, receipt in zip(unchecked, results):
+            if isinstance(receipt, Exception):
+                self._unchecked.add(transaction_hash)
+            elif receipt is not None:
+                self._resolve(receipt)
+        return block_checked
+
+    def _resolve(self, receipt: dict):
+        future = self._futures.pop(receipt['transactionHash'].lower(), None)
+        if (future is not None) and not future.done():
+            future.set_result(Receipt.from_rpc(receipt))
+
+
+_receipt_trackers: Dict[Tuple[int, Optional[str]], ReceiptTracker] = {}
+
+
+def get_receipt_tracker(network: Network, proxy: Optional[str] = None) -> ReceiptTracker:
+    """Returns the process-wide receipt tracker of the network."""
+    key = (network.chain_id, proxy)
+    if key not in _receipt_trackers:
+        _receipt_trackers[key] = ReceiptTracker(network=network, proxy=proxy)
+    return _receipt_trackers[key]
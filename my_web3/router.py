@@ -0,0 +1,190 @@
+from .constants import *
+from .ratelimit import RateLimiter, RateLimitError
+from .metrics import KIND_ENDPOINT, get_metrics, observe, observe_sync
+
+from typing import Any, Optional, List, Callable, Awaitable
+from urllib.parse import urlsplit
+from aiohttp import ClientConnectorError, ServerTimeoutError
+from requests.exceptions import ConnectTimeout, ConnectionError as RequestsConnectionError
+from urllib3.exceptions import ConnectTimeoutError
+
+import time
+import asyncio
+
+
+class Endpoint:
+    def __init__(self, uri: str, alpha: float = ROUTER_EWMA_ALPHA):
+        """RPC endpoint with EWMA statistics of its latency and error rate and an adaptive rate limiter."""
+        self.uri = uri
+        self.name = urlsplit(uri).netloc or uri  # Metrics label without the path, which often holds an API key.
+        self.alpha = alpha
+        self.limiter = RateLimiter()
+        self.latency: Optional[float] = None
+        self.error_rate = 0.
+        self.unhealthy_until = 0.
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def score(self) -> float:
+        # Endpoints without measurements go first, so every endpoint gets probed.
+        return (self.latency or 0.) * (1 + ROUTER_ERROR_PENALTY * self.error_rate)
+
+    def record_success(self, latency: float):
+        self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+        self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_failure(self):
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        if self.error_rate >= ROUTER_ERROR_THRESHOLD:
+            self.unhealthy_until = time.monotonic() + ROUTER_COOLDOWN
+
+
+class RpcRouter:
+    def __init__(self, uris: List[str], hedge: bool = False):
+        """
+        Routes requests of a network over several RPC endpoints.
+
+        Reads go to the fastest healthy endpoint (by EWMA latency and error rate) and fail over to the next one on transport errors;
+        with `hedge=True` a read that is slower than usual is also sent to the second endpoint and the first answer wins.
+        Writes are never hedged; they fail over only when the connection to the endpoint could not be established, so a
+        request which may have reached the node (e.g. a read timeout after the transaction was broadcast) is not sent again.
+        Every request waits for a slot of the endpoint rate limiter; throttled requests fail over to the next endpoint
+        and, when all endpoints are throttled, are retried once the limiters' back off expires.
+
+        :param uris: RPC endpoint URLs.
+        :param hedge: Enables hedged reads (async requests only).
+        """
+        self.endpoints = [Endpoint(uri=uri) for uri in uris]
+        self.hedge = hedge
+
+    def get_endpoints(self) -> List[Endpoint]:
+        """Returns the endpoints ordered from the best to the worst."""
+        healthy = sorted([endpoint for endpoint in self.endpoints if endpoint.healthy], key=lambda endpoint: endpoint.score)
+        unhealthy = sorted([endpoint for endpoint in self.endpoints if not endpoint.healthy], key=lambda endpoint: endpoint.unhealthy_until)
+        return healthy + unhealthy
+
+    def request_sync(self, send: Callable[[str], Any], write: Optional[bool] = False) -> Any:
+        """Sends a request with `send(uri)`, failing over to the next endpoint on transport errors."""
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            error = None
+            for endpoint in self.get_endpoints():
+                try:
+                    return self._send_sync(endpoint=endpoint, send=send)
+                except RateLimitError as e:
+                    error = error or e
+                except Exception as e:
+                    if write and not is_connect_error(e):
+                        raise
+                    error = e
+            if not isinstance(error, RateLimitError):
+                break
+        raise error
+
+    async def request(self, send: Callable[[str], Awaitable[Any]], write: Optional[bool] = False) -> Any:
+        """Sends a request with `await send(uri)`, failing over to the next endpoint on transport errors and hedging slow reads."""
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            endpoints = self.get_endpoints()
+            try:
+                if (not self.hedge) or write or (len(endpoints) < 2):
+                    return await self._request_sequential(endpoints=endpoints, send=send, write=write)
+                return await self._request_hedged(endpoints=endpoints, send=send)
+            except RateLimitError as e:
+                error = e
+        raise error
+
+    async def _request_sequential(self, endpoints: List[Endpoint], send: Callable[[str], Awaitable[Any]], write: Optional[bool] = False) -> Any:
+        error = None
+        for endpoint in endpoints:
+            try:
+                return await self._send(endpoint=endpoint, send=send)
+            except RateLimitError as e:
+                error = error or e
+            except Exception as e:
+                if write and not is_connect_error(e):
+                    raise
+                error = e
+        raise error
+
+    async def _request_hedged(self, endpoints: List[Endpoint], send: Callable[[str], Awaitable[Any]]) -> Any:
+        endpoints = list(endpoints)
+        tasks = set()
+        error = None
+        while endpoints or tasks:
+            if endpoints and (len(tasks) < 2):
+                endpoint = endpoints.pop(0)
+                tasks.add(asyncio.ensure_future(self._send(endpoint=endpoint, send=send)))
+                hedge_delay = max(ROUTER_HEDGE_DELAY_MIN, ROUTER_HEDGE_LATENCY_FACTOR * (endpoint.latency or 0.))
+            else:
+                hedge_delay = None
+            done, tasks = await asyncio.wait(tasks, timeout=hedge_delay if endpoints else None, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for task_pending in tasks:
+                        task_pending.cancel()
+                    return task.result()
+                if not (isinstance(task.exception(), RateLimitError) and error is not None):
+                    error = task.exception()
+        raise error
+
+    @staticmethod
+    def _send_sync(endpoint: Endpoint, send: Callable[[str], Any]) -> Any:
+        endpoint.limiter.acquire_sync()
+        time_start = time.monotonic()
+        try:
+            metrics = get_metrics()
+            if metrics.enabled:
+                result = observe_sync(metrics, KIND_ENDPOINT, endpoint.name, lambda: send(endpoint.uri))
+            else:
+                result = send(endpoint.uri)
+        except RateLimitError as e:
+            endpoint.limiter.release(throttled=True, retry_after=e.retry_after)
+            raise
+        except Exception:
+            endpoint.limiter.release(throttled=None)
+            endpoint.record_failure()
+            raise
+        endpoint.limiter.release()
+        endpoint.record_success(time.monotonic() - time_start)
+        return result
+
+    @staticmethod
+    async def _send(endpoint: Endpoint, send: Callable[[str], Awaitable[Any]]) -> Any:
+        await endpoint.limiter.acquire()
+        time_start = time.monotonic()
+        try:
+            metrics = get_metrics()
+            if metrics.enabled:
+                result = await observe(metrics, KIND_ENDPOINT, endpoint.name, send(endpoint.uri))
+            else:
+                result = await send(endpoint.uri)
+        except asyncio.CancelledError:
+            endpoint.limiter.release(throttled=None)
+            raise
+        except RateLimitError as e:
+            endpoint.limiter.release(throttled=True, retry_after=e.retry_after)
+            raise
+        except Exception:
+            endpoint.limiter.release(throttled=None)
+            endpoint.record_failure()
+            raise
+        endpoint.limiter.release()
+        endpoint.record_success(time.monotonic() - time_start)
+        return result
+
+
+def is_connect_error(error: BaseException) -> bool:
+    """Returns True for errors raised before a request was sent: the connection could not be established (refused, DNS, connect timeout)."""
+    if isinstance(error, (ClientConnectorError, ConnectTimeout, ConnectionRefusedError)):
+        return True
+    if isinstance(error, ServerTimeoutError):
+        # aiohttp raises ConnectionTimeoutError (a plain ServerTimeoutError before 3.10) with this message when connecting
+        # times out; other ServerTimeoutErrors are read timeouts, after the request was sent.
+        return str(error).startswith('Connection timeout')
+    if isinstance(error, RequestsConnectionError) and error.args:
+        # requests wraps urllib3 errors; connection failures (NewConnectionError included) are ConnectTimeoutError.
+        reason = getattr(error.args[0], 'reason', error.args[0])
+        return isinstance(reason, ConnectTimeoutError)
+    return False
@@ -0,0 +1,89 @@
+from .constants import *
+
+from concurrent.futures import ProcessPoolExecutor
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from typing import Union, Optional, Tuple, List, Dict, AsyncIterator
+from web3.types import HexBytes
+
+import asyncio
+import multiprocessing
+
+_accounts: Dict[str, LocalAccount] = {}
+
+
+def _init_worker(private_keys: List[str]):
+    # Keys are parsed once per worker process, not once per transaction.
+    for private_key in private_keys:
+        account = Account.from_key(private_key)
+        _accounts[account.address.lower()] = account
+
+
+def _sign_many(transactions: List[Tuple[str, dict]]) -> List[Union[bytes, Exception]]:
+    results = []
+    for address, tx in transactions:
+        try:
+            results.append(bytes(_accounts[address.lower()].sign_transaction(tx).rawTransaction))
+        except KeyError:
+            results.append(Exception(f'sign | no private key for {address}'))
+        except Exception as e:
+            results.append(Exception(f'sign | {e}'))
+    return results
+
+
+class SigningPool:
+    def __init__(
+            self,
+            private_keys: List[str],
+            workers: Optional[int] = None,
+            chunk_size: int = SIGNING_CHUNK_SIZE,
+            mp_context: Optional[str] = None,
+    ):
+        """
+        Process pool signing transactions off the event loop.
+
+        Every worker loads the private keys once at start-up; transactions are sent to the workers in chunks of `chunk_size`
+        and raw transactions are streamed back as chunks finish, so signing throughput scales with CPU cores.
+
+        :param private_keys: Private keys of the wallets whose transactions are signed.
+        :param workers: Number of worker processes (defaults to the number of CPU cores).
+        :param chunk_size: Number of transactions signed by a worker per task.
+        :param mp_context: Multiprocessing start method ('fork', 'spawn', 'forkserver'); defaults to the platform default.
+        """
+        self.chunk_size = chunk_size
+        self.addresses = {Account.from_key(private_key).address.lower() for private_key in private_keys}
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(mp_context) if mp_context is not None else None,
+            initializer=_init_worker,
+            initargs=(list(private_keys),),
+        )
+
+    async def sign_stream(self, transactions: List[Tuple[str, dict]]) -> AsyncIterator[Tuple[int, Union[HexBytes, Exception]]]:
+        """Signs (address, transaction) pairs and yields (index, raw_transaction) in the order chunks are signed."""
+        loop = asyncio.get_running_loop()
+
+        async def sign_chunk(start: int) -> Tuple[int, List[Union[bytes, Exception]]]:
+            return start, await loop.run_in_executor(self.executor, _sign_many, transactions[start:start + self.chunk_size])
+
+        for future in asyncio.as_completed([sign_chunk(start) for start in range(0, len(transactions), self.chunk_size)]):
+            start, results = await future
+            for i, result in enumerate(results):
+                yield start + i, result if isinstance(result, Exception) else HexBytes(result)
+
+    async def sign_many(self, transactions: List[Tuple[str, dict]]) -> List[Union[HexBytes, Exception]]:
+        """Signs (address, transaction) pairs and returns raw transactions in the input order."""
+        results: List[Union[HexBytes, Exception]] = [None] * len(transactions)
+        async for index, result in self.sign_stream(transactions):
+            results[index] = result
+        return results
+
+    def close(self):
+        """Stops the worker processes."""
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
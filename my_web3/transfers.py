@@ -0,0 +1,209 @@
+from .constants import *
+from .utils import merge_streams
+from .engine import get_engine
+from .ratelimit import RateLimitError
+from .models.network import Network, NETWORKS_LIST
+from .models.token import Token, TOKENS_LIST
+from .models.transfer import Transfer
+
+from typing import Optional, Union, List, Dict, Collection, AsyncIterator
+
+import os
+import json
+import asyncio
+import collections
+
+from web3 import Web3
+
+
+class TransferScanner:
+    def __init__(
+            self,
+            network: Network,
+            addresses_tokens: List[str],
+            addresses_wallets: Optional[Collection[str]] = None,
+            proxy: Optional[str] = None,
+            async_provider: Optional[bool] = True,
+            chunk_size: int = LOGS_CHUNK_SIZE,
+            chunk_size_max: int = LOGS_CHUNK_SIZE_MAX,
+            results_target: int = LOGS_RESULTS_TARGET,
+            concurrency: int = LOGS_CONCURRENCY,
+            checkpoint: Optional[str] = None,
+            addresses_wrapped: Optional[List[str]] = None,
+    ):
+        """
+        Streams ERC20 `Transfer` events of tokens from `eth_getLogs`, optionally only those touching the wallet addresses.
+        `Deposit`/`Withdrawal` events of wrapped native coins (`addresses_wrapped`) are streamed as transfers from/to ADDRESS_ZERO.
+
+        Block ranges are sized adaptively: a range rejected by the provider (block range or result limits, timeouts) is split
+        in halves, and the size of the next ranges follows the number of returned logs towards `results_target`.
+        Up to `concurrency` ranges are requested at once, but events are yielded in block order, so the checkpoint
+        (the last block whose events were all yielded) always covers a contiguous prefix and memory stays bounded.
+
+        :param network: Network of the tokens.
+        :param addresses_tokens: Token contract addresses.
+        :param addresses_wallets: Wallet addresses; only transfers from or to them are returned (all transfers if None).
+        :param proxy: Proxy server address for redirecting API requests.
+        :param async_provider: Uses the async provider.
+        :param chunk_size: Initial number of blocks per `eth_getLogs` request.
+        :param chunk_size_max: Maximum number of blocks per `eth_getLogs` request.
+        :param results_target: Number of logs per request the range size is adapted to.
+        :param concurrency: Number of ranges requested concurrently.
+        :param checkpoint: JSON file the progress is saved to; a scan resumes after the block saved in it.
+        :param addresses_wrapped: Wrapped native coin contract addresses (WETH-style) whose mints and burns are streamed too.
+        """
+        self.network = network
+        self.engine = get_engine(network=network, proxy=proxy, async_provider=async_provider)
+        self.addresses_tokens = [Web3.to_checksum_address(address_token) for address_token in addresses_tokens]
+        self.addresses_wallets = None if addresses_wallets is None else sorted({address_wallet.lower() for address_wallet in addresses_wallets})
+        self.addresses_wrapped = [Web3.to_checksum_address(address_wrapped) for address_wrapped in addresses_wrapped or []]
+        self.chunk_size = chunk_size
+        self.chunk_size_max = chunk_size_max
+        self.chunk_size_limit = chunk_size_max
+        self.results_target = results_target
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.block_checkpoint: Optional[int] = self._load_checkpoint()
+
+    async def scan(self, block_start: int = 0, block_end: Optional[int] = None) -> AsyncIterator[Transfer]:
+        """Yields the transfers of blocks `block_start`..`block_end` (the head block if None), resuming after the checkpoint."""
+        if block_end is None:
+            block_end = await self.get_block_number()
+        block = block_start if self.block_checkpoint is None else max(block_start, self.block_checkpoint + 1)
+        tasks = collections.deque()
+        try:
+            while (block <= block_end) or tasks:
+                while (block <= block_end) and (len(tasks) < self.concurrency):
+                    end = min(block_end, block + self.chunk_size - 1)
+                    tasks.append((end, asyncio.ensure_future(self._fetch_range(start=block, end=end))))
+                    block = end + 1
+                end, task = tasks.popleft()
+                for transfer in await task:
+                    yield transfer
+                self._save_checkpoint(end)
+        finally:
+            for _, task in tasks:
+                task.cancel()
+
+    async def get_block_number(self) -> int:
+        return int(await self._request('eth_blockNumber', []), 16)
+
+    async def _fetch_range(self, start: int, end: int) -> List[Transfer]:
+        results = await asyncio.gather(*[self._get_logs(params) for params in self._get_filters(start=start, end=end)], return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            if (start == end) or not is_range_error(errors[0]):
+                raise errors[0]
+            # The provider refused the range: it is split, and the next ranges are not larger than the halves
+            # until ranges of that size keep succeeding (the limit is then probed upwards by LOGS_CHUNK_SIZE_PROBE).
+            middle = (start + end) // 2
+            self.chunk_size_limit = max(LOGS_CHUNK_SIZE_MIN, min(self.chunk_size_limit, (end - start + 1) // 2))
+            self.chunk_size = min(self.chunk_size, self.chunk_size_limit)
+            return await self._fetch_range(start=start, end=middle) + await self._fetch_range(start=middle + 1, end=end)
+        self._adapt(size=end - start + 1, count=max(len(logs) for logs in results))
+        logs_unique = {}
+        for logs in results:
+            for log in logs:
+                # ERC721 transfers share the signature but index the token id as a fourth topic.
+                if (len(log['topics']) == 3) or ((len(log['topics']) == 2) and (log['topics'][0] in (TOPIC_DEPOSIT, TOPIC_WITHDRAWAL))):
+                    logs_unique[(log['transactionHash'], log['logIndex'])] = log
+        transfers = [Transfer.from_rpc(log=log, chain_id=self.network.chain_id) for log in logs_unique.values()]
+        transfers.sort(key=lambda transfer: (transfer.block_number, transfer.log_index))
+        return transfers
+
+    def _adapt(self, size: int, count: int):
+        if count > self.results_target:
+            self.chunk_size = max(LOGS_CHUNK_SIZE_MIN, min(self.chunk_size, size * self.results_target // count))
+        elif (count < self.results_target // 2) and (size >= self.chunk_size):
+            if self.chunk_size >= self.chunk_size_limit:
+                self.chunk_size_limit = min(self.chunk_size_max, int(self.chunk_size_limit * (1 + LOGS_CHUNK_SIZE_PROBE)) + 1)
+            self.chunk_size = min(self.chunk_size_limit, self.chunk_size * 2)
+
+    def _get_filters(self, start: int, end: int) -> List[dict]:
+        base = {'fromBlock': hex(start), 'toBlock': hex(end), 'address': self.addresses_tokens}
+        base_wrapped = {**base, 'address': self.addresses_wrapped}
+        if self.addresses_wallets is None:
+            filters = [{**base, 'topics': [TOPIC_TRANSFER]}]
+            if self.addresses_wrapped:
+                filters.append({**base_wrapped, 'topics': [[TOPIC_DEPOSIT, TOPIC_WITHDRAWAL]]})
+            return filters
+        filters = []
+        for i in range(0, len(self.addresses_wallets), LOGS_ADDRESSES_CHUNK_SIZE):
+            topics = ['0x' + '0' * 24 + address_wallet[2:] for address_wallet in self.addresses_wallets[i:i + LOGS_ADDRESSES_CHUNK_SIZE]]
+            filters.append({**base, 'topics': [TOPIC_TRANSFER, topics]})
+            filters.append({**base, 'topics': [TOPIC_TRANSFER, None, topics]})
+            if self.addresses_wrapped:
+                # Both events index the wallet as their only argument.
+                filters.append({**base_wrapped, 'topics': [[TOPIC_DEPOSIT, TOPIC_WITHDRAWAL], topics]})
+        return filters
+
+    async def _get_logs(self, params: dict) -> List[dict]:
+        for attempt in range(LOGS_RETRIES + 1):
+            try:
+                return await self._request('eth_getLogs', [params])
+            except Exception as e:
+                if is_range_error(e) or (attempt == LOGS_RETRIES):
+                    raise
+                await asyncio.sleep(LOGS_RETRY_DELAY * 2 ** attempt)
+
+    async def _request(self, method: str, params: list):
+        # Raw responses are used: web3 result formatting of every log would dominate the scan time.
+        return await self.engine.request(method, params)
+
+    def _load_checkpoint(self) -> Optional[int]:
+        if (self.checkpoint is None) or not os.path.exists(self.checkpoint):
+            return None
+        with open(self.checkpoint) as file:
+            data = json.load(file)
+        return data['block'] if data.get('chain_id') == self.network.chain_id else None
+
+    def _save_checkpoint(self, block: int):
+        self.block_checkpoint = block
+        if self.checkpoint is None:
+            return
+        path_tmp = f'{self.checkpoint}.tmp'
+        with open(path_tmp, 'w') as file:
+            json.dump({'chain_id': self.network.chain_id, 'block': block}, file)
+        os.replace(path_tmp, self.checkpoint)
+
+
+def is_range_error(error: BaseException) -> bool:
+    if isinstance(error, RateLimitError):
+        return False
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    message = str(error).lower()
+    if any(error_range in message for error_range in ERRORS_LOGS_RANGE):
+        return True
+    # JSON-RPC errors are raised with the error object: "limit exceeded" without a known message is still a range error
+    # (rate limits sharing the code are raised as RateLimitError).
+    error_rpc = error.args[0] if error.args and isinstance(error.args[0], dict) else {}
+    return error_rpc.get('code') in ERROR_CODES_LOGS_RANGE
+
+
+def get_transfer_scanners(
+        addresses_wallets: Optional[Collection[str]] = None,
+        networks: Optional[List[Network]] = None,
+        tokens: Optional[List[Token]] = None,
+        checkpoint_dir: Optional[str] = None,
+        **kwargs,
+) -> List[TransferScanner]:
+    """Returns a scanner per network (NETWORKS_LIST by default) with an address of any of the tokens (TOKENS_LIST by default)."""
+    scanners = []
+    for network in networks or NETWORKS_LIST:
+        addresses_tokens = [token.addresses[network] for token in tokens or TOKENS_LIST if token.addresses.get(network)]
+        if not addresses_tokens:
+            continue
+        checkpoint = os.path.join(checkpoint_dir, f'transfers_{network.chain_id}.json') if checkpoint_dir is not None else None
+        scanners.append(TransferScanner(network=network, addresses_tokens=addresses_tokens, addresses_wallets=addresses_wallets, checkpoint=checkpoint, **kwargs))
+    return scanners
+
+
+async def scan_transfers(scanners: List[TransferScanner], blocks_start: Union[int, Dict[int, int]] = 0) -> AsyncIterator[Transfer]:
+    """Scans several networks concurrently and yields transfers as they arrive (`blocks_start` may map chain ids to start blocks)."""
+    streams = [
+        scanner.scan(block_start=blocks_start.get(scanner.network.chain_id, 0) if isinstance(blocks_start, dict) else blocks_start)
+        for scanner in scanners
+    ]
+    async for transfer in merge_streams(streams):
+        yield transfer
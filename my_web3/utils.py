@@ -1,13 +1,57 @@
-from typing import Union, Optional
+from .constants import SYNC_EXECUTOR_MAX_WORKERS, STREAMS_QUEUE_SIZE
+
+from typing import Any, Union, Optional, Tuple, List, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from web3.types import ChecksumAddress
 
+import os
 import json
+import asyncio
+import warnings
+import functools
+
+executor = ThreadPoolExecutor(max_workers=SYNC_EXECUTOR_MAX_WORKERS, thread_name_prefix='my_web3')
 
 
 def read_json_from_file(path: str, encoding: Optional[str] = None) -> Union[list, dict]:
     return json.load(open(file=path, encoding=encoding))
 
 
+def read_json_from_package(path: str) -> Union[list, dict]:
+    return read_json_from_file(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), path), encoding='utf-8')
+
+
+class LazyJSON:
+    def __init__(self, path: str):
+        """Class attribute holding a JSON file of the package (e.g. an ABI), parsed on first access."""
+        self.path = path
+        self.value: Optional[Union[list, dict]] = None
+
+    def __get__(self, instance, owner) -> Union[list, dict]:
+        if self.value is None:
+            self.value = read_json_from_package(self.path)
+        return self.value
+
+
+class Deprecated:
+    def __init__(self, value: Any, message: str):
+        """Class attribute kept for compatibility: reading it emits a `DeprecationWarning`."""
+        self.value = value
+        self.message = message
+
+    def __get__(self, instance, owner) -> Any:
+        warnings.warn(self.message, DeprecationWarning, stacklevel=2)
+        return self.value
+
+
+def get_exception(log_process: str, error: Any) -> Exception:
+    """Returns `Exception('<log_process> | <error>')` chained to the error, so its class is not lost."""
+    exception = Exception(f'{log_process} | {error}')
+    if isinstance(error, BaseException):
+        exception.__cause__ = error
+    return exception
+
+
 def get_anonymous_string(address: Union[str, ChecksumAddress]) -> str:
     return str(address)[:5] + "..." + str(address)[-5:]
 
@@ -16,5 +60,119 @@ async def afh(func, asynchrony, *args, **kwargs):  # Async Function Handler
     if asynchrony:
         result = await func(*args, **kwargs)
     else:
-        result = func(*args, **kwargs)
+        result = await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args, **kwargs))
     return result
+
+
+async def aah(obj, name: str, asynchrony):  # Async Attribute Handler
+    if asynchrony:
+        result = await getattr(obj, name)
+    else:
+        result = await afh(getattr, asynchrony, obj, name)
+    return result
+
+
+class LoopLock:
+    def __init__(self):
+        """asyncio.Lock which is recreated for each event loop, so module-level objects survive several `asyncio.run` calls."""
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        return self._lock
+
+
+async def merge_streams(streams: List[AsyncIterator], max_size: int = STREAMS_QUEUE_SIZE) -> AsyncIterator:
+    """Yields items of several async iterators as they arrive; a bounded queue keeps fast producers from running ahead."""
+    queue = asyncio.Queue(maxsize=max_size)
+    end = object()
+
+    async def drain(stream: AsyncIterator):
+        try:
+            async for item in stream:
+                await queue.put((item, None))
+            await queue.put((end, None))
+        except Exception as e:
+            await queue.put((end, e))
+
+    tasks = [asyncio.ensure_future(drain(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is end:
+                remaining -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def encode_aggregate3(calls: List[Tuple[str, bool, Union[bytes, str]]]) -> bytes:
+    """ABI-encodes the (address, allowFailure, callData)[] argument of Multicall3 `aggregate3` (call data may be hex strings)."""
+    # The layout is fixed, so it is written directly: the generic ABI codec validates and encodes every tuple field by field,
+    # which costs more than the JSON-RPC request itself for chunks of hundreds of calls.
+    heads, tails = [], []
+    offset = 32 * len(calls)
+    for address, allow_failure, data in calls:
+        address = bytes.fromhex(address[2:])
+        if len(address) != 20:
+            raise ValueError(f'invalid address: 0x{address.hex()}')
+        data = bytes.fromhex(data[2:] if data.startswith('0x') else data) if isinstance(data, str) else bytes(data)
+        tail = b''.join((
+            address.rjust(32, b'\0'), int(bool(allow_failure)).to_bytes(32, 'big'), (96).to_bytes(32, 'big'),
+            len(data).to_bytes(32, 'big'), data, bytes(-len(data) % 32),
+        ))
+        heads.append(offset.to_bytes(32, 'big'))
+        tails.append(tail)
+        offset += len(tail)
+    return (32).to_bytes(32, 'big') + len(calls).to_bytes(32, 'big') + b''.join(heads) + b''.join(tails)
+
+
+def decode_aggregate3(data: bytes) -> List[Tuple[bool, bytes]]:
+    """Decodes the (success, returnData)[] result of Multicall3 `aggregate3`."""
+    def read_int(position: int) -> int:
+        if position + 32 > len(data):
+            raise ValueError('aggregate3 result is too short')
+        return int.from_bytes(data[position:position + 32], 'big')
+
+    data = bytes(data)
+    base = read_int(0) + 32
+    results = []
+    for i in range(read_int(base - 32)):
+        start = base + read_int(base + 32 * i)
+        position = start + read_int(start + 32)
+        length = read_int(position)
+        if position + 32 + length > len(data):
+            raise ValueError('aggregate3 result is too short')
+        results.append((read_int(start) != 0, data[position + 32:position + 32 + length]))
+    return results
+
+
+def encode_disperse(recipients: List[Tuple[str, int]], address_token: Optional[str] = None) -> bytes:
+    """ABI-encodes the arguments of Disperse `disperseEther(address[], uint256[])` or, with a token, `disperseToken(address, address[], uint256[])`."""
+    addresses, amounts = [], []
+    for address, amount in recipients:
+        address = bytes.fromhex(address[2:])
+        if len(address) != 20:
+            raise ValueError(f'invalid address: 0x{address.hex()}')
+        addresses.append(address.rjust(32, b'\0'))
+        amounts.append(int(amount).to_bytes(32, 'big'))
+    head = b''
+    if address_token is not None:
+        address_token = bytes.fromhex(address_token[2:])
+        if len(address_token) != 20:
+            raise ValueError(f'invalid address: 0x{address_token.hex()}')
+        head = address_token.rjust(32, b'\0')
+    offset = 32 * (len(head) // 32 + 2)
+    return b''.join((
+        head, offset.to_bytes(32, 'big'), (offset + 32 * (len(recipients) + 1)).to_bytes(32, 'big'),
+        len(recipients).to_bytes(32, 'big'), *addresses, len(recipients).to_bytes(32, 'big'), *amounts,
+    ))
@@ -0,0 +1,115 @@
+from .constants import *
+from .models.wallet import Wallet
+
+from concurrent.futures import ProcessPoolExecutor, Future
+from eth_account import Account
+from eth_account.hdaccount.deterministic import HDPath, Node, hmac_sha512, ec_point, to_int, derive_child_key, SECP256K1_N
+from mnemonic import Mnemonic
+from typing import Optional, Tuple, List, Deque, Iterable, Iterator, Callable
+
+import os
+import csv
+import json
+import collections
+
+from web3 import Web3
+
+_mnemonic = Mnemonic('english')
+
+WalletRow = Tuple[str, str, str, Optional[str]]
+
+
+def generate_wallet() -> Wallet:
+    """Generates a new wallet (seed phrase, private key of its first account and address)."""
+    return Wallet(*_generate_rows(1)[0])
+
+
+def generate_wallets(count: int, workers: Optional[int] = None, chunk_size: int = WALLETS_CHUNK_SIZE) -> Iterator[Wallet]:
+    """Generates `count` independent wallets in a process pool and yields them as they are ready."""
+    for rows in _run_chunks(_generate_rows, [(min(chunk_size, count - start),) for start in range(0, count, chunk_size)], workers=workers):
+        for row in rows:
+            yield Wallet(*row)
+
+
+def derive_wallets(
+        seed_phrase: str,
+        count: int,
+        start: int = 0,
+        passphrase: str = '',
+        path_parent: str = WALLETS_PATH_PARENT,
+        workers: Optional[int] = None,
+        chunk_size: int = WALLETS_CHUNK_SIZE,
+) -> Iterator[Wallet]:
+    """Derives accounts `start`..`start + count - 1` of one seed phrase along `path_parent/i` and yields them in order."""
+    if not _mnemonic.check(seed_phrase):
+        raise ValueError('invalid seed phrase')
+    # The seed (PBKDF2) and the parent node are computed once; every account costs one HMAC and one public key.
+    seed = Mnemonic.to_seed(seed_phrase, passphrase)
+    master = hmac_sha512(b'Bitcoin seed', seed)
+    key, chain_code = master[:32], master[32:]
+    for node in path_parent.split('/')[1:]:
+        key, chain_code = derive_child_key(key, chain_code, Node.decode(node))
+    chunks = [
+        (seed_phrase, path_parent, key, chain_code, index, min(chunk_size, start + count - index))
+        for index in range(start, start + count, chunk_size)
+    ]
+    for rows in _run_chunks(_derive_rows, chunks, workers=workers):
+        for row in rows:
+            yield Wallet(*row)
+
+
+def write_wallets(wallets: Iterable[Wallet], filename: str) -> int:
+    """Streams wallets to a JSONL (`.jsonl`) or CSV (`.csv`) file and returns the number of written wallets."""
+    fields = ['seed_phrase', 'private_key', 'address', 'path']
+    n = 0
+    with open(filename, 'w', newline='') as file:
+        if os.path.splitext(filename)[1].lower() == '.csv':
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            for wallet in wallets:
+                writer.writerow([getattr(wallet, field) for field in fields])
+                n += 1
+        else:
+            for wallet in wallets:
+                file.write(json.dumps({field: getattr(wallet, field) for field in fields}) + '\n')
+                n += 1
+    return n
+
+
+def _generate_rows(count: int) -> List[WalletRow]:
+    rows = []
+    for _ in range(count):
+        seed_phrase = _mnemonic.generate(128)
+        private_key = HDPath(WALLETS_PATH_PARENT + '/0').derive(Mnemonic.to_seed(seed_phrase))
+        rows.append((seed_phrase, Web3.to_hex(private_key), Account.from_key(private_key).address, WALLETS_PATH_PARENT + '/0'))
+    return rows
+
+
+def _derive_rows(seed_phrase: str, path_parent: str, key_parent: bytes, chain_code_parent: bytes, start: int, count: int) -> List[WalletRow]:
+    point_parent = ec_point(key_parent)
+    rows = []
+    for index in range(start, start + count):
+        child = hmac_sha512(chain_code_parent, point_parent + index.to_bytes(4, 'big'))
+        private_key = (to_int(child[:32]) + to_int(key_parent)) % SECP256K1_N
+        if (to_int(child[:32]) >= SECP256K1_N) or (private_key == 0):
+            continue  # BIP32: the account is invalid and skipped (probability < 2^-127).
+        private_key = private_key.to_bytes(32, 'big')
+        rows.append((seed_phrase, Web3.to_hex(private_key), Account.from_key(private_key).address, f'{path_parent}/{index}'))
+    return rows
+
+
+def _run_chunks(func: Callable[..., List[WalletRow]], chunks: List[tuple], workers: Optional[int] = None) -> Iterator[List[WalletRow]]:
+    # Chunks are yielded in order with a bounded number of chunks in flight, so memory does not grow with the total count.
+    if (workers == 1) or (len(chunks) <= 1):
+        for chunk in chunks:
+            yield func(*chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = (workers or os.cpu_count() or 1) * 2
+        futures: Deque[Future] = collections.deque()
+        for chunk in chunks:
+            futures.append(executor.submit(func, *chunk))
+            if len(futures) >= in_flight:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
@@ -0,0 +1,273 @@
+from .constants import *
+from .providers import PROVIDERS, get_response_error, get_response_write
+from .metrics import KIND_RPC, get_metrics, observe
+from .models.network import Network
+
+from typing import Any, Optional, Tuple, List, Dict, Callable
+from web3.providers.async_base import AsyncBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+from web3._utils.encoding import Web3JsonEncoder
+
+import json
+import asyncio
+import itertools
+
+from aiohttp import WSMsgType
+
+
+class Subscription:
+    def __init__(self, params: list):
+        """
+        `eth_subscribe` subscription shared by all its callbacks. `id` is the subscription id on the current connection
+        (None while disconnected); it changes when the subscription is renewed after a reconnect.
+        """
+        self.params = params
+        self.id: Optional[str] = None
+        self.callbacks: List[Callable[[Any], None]] = []
+
+
+class WebSocketClient:
+    def __init__(
+            self,
+            network: Network,
+            proxy: Optional[str] = None,
+            reconnect_delay: float = WS_RECONNECT_DELAY,
+            reconnect_delay_max: float = WS_RECONNECT_DELAY_MAX,
+            heartbeat: float = WS_HEARTBEAT,
+            request_timeout: float = PROVIDER_REQUEST_TIMEOUT,
+    ):
+        """
+        Persistent WebSocket connection to the network (`Network(ws=...)`) shared by all wallets and components.
+
+        Requests are multiplexed over the socket by their ids. Subscriptions (`newHeads`, `logs`, ...) with the same
+        parameters share one `eth_subscribe` and are renewed after every reconnect; a dropped connection is reopened with
+        exponential backoff (rotating over the WebSocket endpoints), and requests in flight fail with `ConnectionError`.
+        Pushes sent while disconnected are not replayed: `newHeads` callbacks get the next head, so block numbers may jump.
+
+        :param network: Network with WebSocket endpoints.
+        :param proxy: Proxy server address for redirecting API requests.
+        :param reconnect_delay: Initial delay (in seconds) before reconnecting.
+        :param reconnect_delay_max: Maximum delay (in seconds) before reconnecting.
+        :param heartbeat: Interval (in seconds) of ping frames detecting dead connections.
+        :param request_timeout: Timeout (in seconds) of a single request, including waiting for the connection.
+        """
+        if not network.ws_rpcs:
+            raise ValueError(f'{network.name} has no WebSocket RPC (Network(ws=...))')
+        self.network = network
+        self.proxy = proxy
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_delay_max = reconnect_delay_max
+        self.heartbeat = heartbeat
+        self.request_timeout = request_timeout
+        self.reconnects = 0
+        self._ids = itertools.count()
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._subscriptions_active: Dict[str, Subscription] = {}
+        self._subscribing: Dict[int, Subscription] = {}
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._ws = None
+        self._connected: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    def start(self):
+        """Opens the connection in the running event loop (once; it is kept open and reopened until `close`)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._futures = {}
+            self._subscribing = {}
+            self._subscriptions_active = {}
+            self._ws = None
+            self._connected = asyncio.Event()
+            self._task = None
+        if (self._task is None) or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except BaseException:
+                pass
+            self._task = None
+
+    async def request(self, method: str, params: list) -> Any:
+        """Sends a JSON-RPC request over the socket and returns its result."""
+        response = await self.send(method, params)
+        if 'error' in response:
+            raise ValueError(response['error'])
+        return response['result']
+
+    async def send(self, method: str, params: Any) -> RPCResponse:
+        """Sends a JSON-RPC request over the socket and returns the raw response."""
+        self.start()
+        return await asyncio.wait_for(self._send(method, params), timeout=self.request_timeout)
+
+    def subscribe(self, params: list, callback: Callable[[Any], None]) -> Subscription:
+        """Calls `callback(result)` for every push of the subscription (e.g. `['newHeads']` or `['logs', {'address': ...}]`)."""
+        key = json.dumps(params, sort_keys=True, cls=Web3JsonEncoder)
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            subscription = self._subscriptions[key] = Subscription(params=params)
+        subscription.callbacks.append(callback)
+        self.start()
+        if self.connected and (subscription.id is None) and (subscription not in self._subscribing.values()):
+            self._loop.create_task(self._subscribe(subscription))
+        return subscription
+
+    def subscribe_new_heads(self, callback: Callable[[dict], None]) -> Subscription:
+        return self.subscribe(['newHeads'], callback)
+
+    def subscribe_logs(self, callback: Callable[[dict], None], address: Optional[Any] = None, topics: Optional[list] = None) -> Subscription:
+        log_filter = {}
+        if address is not None:
+            log_filter['address'] = address
+        if topics is not None:
+            log_filter['topics'] = topics
+        return self.subscribe(['logs', log_filter], callback)
+
+    def unsubscribe(self, subscription: Subscription, callback: Callable[[Any], None]):
+        """Removes the callback; the subscription is cancelled on the node when it has no callbacks left."""
+        if callback in subscription.callbacks:
+            subscription.callbacks.remove(callback)
+        if subscription.callbacks:
+            return
+        self._subscriptions = {key: value for key, value in self._subscriptions.items() if value is not subscription}
+        if subscription.id is not None:
+            self._subscriptions_active.pop(subscription.id, None)
+            if self.connected:
+                self._loop.create_task(self._unsubscribe(subscription.id))
+            subscription.id = None
+
+    async def _send(self, method: str, params: Any, subscription: Optional[Subscription] = None) -> RPCResponse:
+        await self._connected.wait()
+        ws = self._ws
+        if ws is None:
+            raise ConnectionError(f'{self.network.name} | websocket disconnected')
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._futures[request_id] = future
+        if subscription is not None:
+            # The subscription is registered when its response is read, before pushes following it are dispatched.
+            self._subscribing[request_id] = subscription
+        try:
+            await ws.send_str(json.dumps({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params}, cls=Web3JsonEncoder))
+            return await future
+        finally:
+            self._futures.pop(request_id, None)
+            self._subscribing.pop(request_id, None)
+
+    async def _subscribe(self, subscription: Subscription):
+        try:
+            await asyncio.wait_for(self._send('eth_subscribe', subscription.params, subscription=subscription), timeout=self.request_timeout)
+        except Exception:
+            pass  # Renewed after the next reconnect.
+
+    async def _unsubscribe(self, subscription_id: str):
+        try:
+            await asyncio.wait_for(self._send('eth_unsubscribe', [subscription_id]), timeout=self.request_timeout)
+        except Exception:
+            pass
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        for attempt in itertools.count():
+            uri = self.network.ws_rpcs[attempt % len(self.network.ws_rpcs)]
+            try:
+                async with PROVIDERS.get_async_session().ws_connect(uri, proxy=PROVIDERS.get_proxy_url(self.proxy), heartbeat=self.heartbeat) as ws:
+                    self._ws = ws
+                    self._connected.set()
+                    delay = self.reconnect_delay
+                    for subscription in list(self._subscriptions.values()):
+                        self._loop.create_task(self._subscribe(subscription))
+                    async for message in ws:
+                        if message.type == WSMsgType.TEXT:
+                            self._on_message(json.loads(message.data))
+                        elif message.type in (WSMsgType.ERROR, WSMsgType.CLOSE):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            finally:
+                self._on_disconnect()
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(self.reconnect_delay_max, delay * 2)
+
+    def _on_message(self, message: dict):
+        if message.get('method') == 'eth_subscription':
+            params = message.get('params') or {}
+            subscription = self._subscriptions_active.get(params.get('subscription'))
+            if subscription is None:
+                return
+            for callback in list(subscription.callbacks):
+                try:
+                    callback(params.get('result'))
+                except Exception:
+                    pass  # A failing callback must not stop the connection or the other callbacks.
+            return
+        request_id = message.get('id')
+        subscription = self._subscribing.pop(request_id, None)
+        if (subscription is not None) and ('result' in message):
+            if subscription.callbacks:
+                subscription.id = message['result']
+                self._subscriptions_active[subscription.id] = subscription
+            else:
+                self._loop.create_task(self._unsubscribe(message['result']))  # Unsubscribed while subscribing.
+        future = self._futures.get(request_id)
+        if (future is not None) and not future.done():
+            future.set_result(message)
+
+    def _on_disconnect(self):
+        self._ws = None
+        self._connected.clear()
+        for subscription in self._subscriptions.values():
+            subscription.id = None
+        self._subscriptions_active = {}
+        self._subscribing = {}
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f'{self.network.name} | websocket disconnected'))
+
+
+class WebSocketProvider(AsyncBaseProvider):
+    def __init__(self, client: WebSocketClient):
+        """Async provider sending requests over the shared WebSocket connection of the network."""
+        super().__init__()
+        self.client = client
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        metrics = get_metrics()
+        if metrics.enabled:
+            return await observe(metrics, KIND_RPC, method, self._make_request(method=method, params=params), get_error=get_response_error)
+        return await self._make_request(method=method, params=params)
+
+    async def _make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return get_response_write(method=method, params=params, response=await self.client.send(method, params))
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        try:
+            await self.client.request('web3_clientVersion', [])
+            return True
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+
+
+_ws_clients: Dict[Tuple[Tuple[str, ...], Optional[str]], WebSocketClient] = {}
+
+
+def get_ws_client(network: Network, proxy: Optional[str] = None) -> WebSocketClient:
+    """Returns the process-wide WebSocket client of the network."""
+    key = (tuple(network.ws_rpcs), proxy)
+    if key not in _ws_clients:
+        _ws_clients[key] = WebSocketClient(network=network, proxy=proxy)
+    return _ws_clients[key]
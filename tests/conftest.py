@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from mock_node import MockNode
+from my_web3.nonces import NONCES
+
+
+@pytest.fixture
+def node():
+    node = MockNode(block_time=0.1)
+    node.start()
+    yield node
+    node.stop()
+    # Every mock node is a new chain, nonces handed out against it must not leak into the next test.
+    NONCES._states.clear()
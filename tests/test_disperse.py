@@ -0,0 +1,41 @@
+import asyncio
+
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS_TOKEN = '0x' + '2a' * 20
+RECIPIENTS = [('0x' + f'{i:040x}', 10 ** 15) for i in range(1, 4)]
+
+
+def get_my_web3(node) -> MyWeb3:
+    network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    return MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True)
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await PROVIDERS.close()
+
+    return asyncio.run(main())
+
+
+def test_disperse_amounts(node):
+    status, results = run(get_my_web3(node).disperse_amounts(recipients=RECIPIENTS))
+    assert status == 0, results
+    assert len({result for _, result in results}) == 1
+    assert node.get_counters()['calls']['eth_sendRawTransaction'] == 1
+
+
+def test_disperse_without_contract_code(node):
+    node._rpc_eth_getCode = lambda address, block_identifier='latest': '0x'
+    my_web3 = get_my_web3(node)
+
+    status, result = run(my_web3.disperse_amounts(recipients=RECIPIENTS))
+    assert status == -1 and 'no Disperse contract' in str(result)
+    # No approval is sent for tokens either.
+    status, result = run(my_web3.ERC20_disperse_amounts(address_token=ADDRESS_TOKEN, recipients=RECIPIENTS))
+    assert status == -1 and 'no Disperse contract' in str(result)
+    assert 'eth_sendRawTransaction' not in node.get_counters()['calls']
@@ -0,0 +1,58 @@
+import asyncio
+
+from eth_account import Account
+from web3 import Web3, HTTPProvider
+
+from my_web3 import MyWeb3, Network, ETH, EIP_1559
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS = Web3.to_checksum_address('0x' + 'ab' * 20)
+
+
+def get_network(node, name: str = 'Mock') -> Network:
+    return Network(name=name, rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+
+
+def test_handles_share_engine(node):
+    network = get_network(node)
+    first = MyWeb3(network=network, private_key=PRIVATE_KEY)
+    second = MyWeb3(network=network)
+    assert first.engine is second.engine
+    assert first.w3 is second.w3
+    assert first.address == Account.from_key(PRIVATE_KEY).address
+    assert second.address == Web3.to_checksum_address(MyWeb3.address_zero)
+    assert not hasattr(second, '__dict__') or not second.__dict__
+
+
+def test_attribute_overrides(node):
+    network = get_network(node)
+    first = MyWeb3(network=network)
+    second = MyWeb3(network=network)
+
+    first.timeout = 5
+    first.nonce_retries = 0
+    first.address = ADDRESS
+    assert (first.timeout, first.nonce_retries, first.address) == (5, 0, ADDRESS)
+    assert (second.timeout, second.nonce_retries) == (MyWeb3.timeout, MyWeb3.nonce_retries)
+
+    network_other = Network(name='Other', rpc=node.url + '/', coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    first.network = network_other
+    assert first.network is network_other
+    assert first.engine is not second.engine
+
+    first.async_provider = True
+    assert first.async_provider and (first.network is network_other)
+    assert not second.async_provider
+
+
+def test_w3_override(node):
+    network = get_network(node)
+    first = MyWeb3(network=network)
+    second = MyWeb3(network=network)
+    w3 = Web3(HTTPProvider(node.url))
+
+    first.w3 = w3
+    assert first.w3 is w3
+    assert second.w3 is not w3
+    assert first.network is network
+    assert asyncio.run(first.get_balance(ADDRESS))[0] == 0
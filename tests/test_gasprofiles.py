@@ -0,0 +1,52 @@
+import asyncio
+
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559
+from my_web3.gasprofiles import GasProfileCache
+from mock_node import GAS
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESSES_EOA = ['0x' + f'{i:02x}' * 20 for i in range(1, 4)]
+ADDRESS_CONTRACT = '0x' + 'cc' * 20
+
+
+def test_get_key():
+    cache = GasProfileCache()
+    assert cache.get_key({'to': ADDRESS_CONTRACT, 'data': '0xa9059cbb' + '00' * 64}) == (ADDRESS_CONTRACT, '0xa9059cbb')
+    # Until its code is known, a plain transfer recipient is keyed as a contract.
+    assert not cache.is_code_known({'to': ADDRESS_CONTRACT})
+    assert cache.get_key({'to': ADDRESS_CONTRACT}) == (ADDRESS_CONTRACT, '')
+    cache.set_code(address=ADDRESS_CONTRACT, code=True)
+    cache.set_code(address=ADDRESSES_EOA[0], code=False)
+    assert cache.is_code_known({'to': ADDRESS_CONTRACT})
+    assert cache.get_key({'to': ADDRESS_CONTRACT}) == (ADDRESS_CONTRACT, '')
+    assert cache.get_key({'to': ADDRESSES_EOA[0]}) == ('', '')
+
+
+def test_plain_transfers_to_contracts_are_estimated(node):
+    network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    my_web3 = MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True, gas_profiles=True)
+    estimates = []
+    estimate_gas = node._rpc_eth_estimateGas
+
+    def estimate(tx: dict, block_identifier=None) -> str:
+        estimates.append(tx['to'].lower())
+        # The fallback of the contract costs more than a plain transfer.
+        return hex(3 * GAS) if tx['to'].lower() == ADDRESS_CONTRACT else estimate_gas(tx, block_identifier)
+
+    node._rpc_eth_estimateGas = estimate
+    node._rpc_eth_getCode = lambda address, block_identifier='latest': '0x6080' if address.lower() == ADDRESS_CONTRACT else '0x'
+
+    async def main():
+        try:
+            gases = []
+            for address in ADDRESSES_EOA + [ADDRESS_CONTRACT]:
+                tx = await my_web3._build_transaction(nonce=0, address_to=address, value=1)
+                gases.append(tx['gas'])
+            return gases
+        finally:
+            await PROVIDERS.close()
+
+    gases = asyncio.run(main())
+    # The third payout uses the shared profile, the contract does not.
+    assert estimates == ADDRESSES_EOA[:2] + [ADDRESS_CONTRACT]
+    assert gases == [GAS, GAS, int(GAS * my_web3.gas_profile_cache.margin), 3 * GAS]
@@ -0,0 +1,162 @@
+import os
+import asyncio
+
+import rlp
+import pytest
+from web3 import Web3
+
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559, TransactionJournal
+from my_web3.constants import JOURNAL_INCLUDED, JOURNAL_PENDING
+from mock_node import BASE_FEE, PRIORITY_FEE
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS_RECIPIENT = '0x' + '3c' * 20
+
+
+def get_network(node) -> Network:
+    return Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+
+
+def get_raw_transactions(node, send_raw_transaction) -> list:
+    raw_transactions = []
+
+    def send(raw_transaction: str) -> str:
+        raw_transactions.append(raw_transaction)
+        return send_raw_transaction(raw_transaction)
+
+    node._rpc_eth_sendRawTransaction = send
+    return raw_transactions
+
+
+def get_fields(raw_transaction: str) -> dict:
+    # Type 2 fields: [chainId, nonce, maxPriorityFee, maxFee, gas, to, value, ...]
+    fields = rlp.decode(bytes.fromhex(raw_transaction[4:]))
+    return {name: int.from_bytes(fields[i], 'big') for name, i in (('nonce', 1), ('maxFeePerGas', 3), ('gas', 4), ('value', 6))}
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await PROVIDERS.close()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('fields, fees, expected', [
+    ({'gasPrice': 100}, {'maxFeePerGas': 50, 'maxPriorityFeePerGas': 1}, {'gasPrice': 113}),
+    ({'gasPrice': 100}, {'gasPrice': 300}, {'gasPrice': 300}),
+    ({'maxFeePerGas': 100, 'maxPriorityFeePerGas': 10}, {'maxFeePerGas': 200, 'maxPriorityFeePerGas': 5}, {'maxFeePerGas': 200, 'maxPriorityFeePerGas': 12}),
+])
+def test_get_tx_bumped(tmp_path, fields, fees, expected):
+    journal = TransactionJournal(path=str(tmp_path / 'journal.jsonl'))
+    assert journal._get_tx_bumped({'gas': 21000, 'value': 1, **fields}, fees) == {'gas': 21000, 'value': 1, **expected}
+    journal.close()
+
+
+def test_get_tx_bumped_limits(tmp_path):
+    journal = TransactionJournal(path=str(tmp_path / 'journal.jsonl'), fee_max=105)
+    assert journal._get_tx_bumped({'gas': 21000, 'gasPrice': 100}, {}) is None
+    journal.fee_max = None
+    # A sweep pays the fee increase out of its value; when the value does not cover it, there is no valid replacement.
+    tx = journal._get_tx_bumped({'gas': 10, 'gasPrice': 100, 'value': 1000}, {'gasPrice': 150})
+    assert (tx['gasPrice'], tx['value']) == (150, 1000)
+    tx = journal._get_tx_bumped({'gas': 10, 'gasPrice': 100, 'value': 1000}, {'gasPrice': 150}, sweep=True)
+    assert (tx['gasPrice'], tx['value']) == (150, 500)
+    assert journal._get_tx_bumped({'gas': 10, 'gasPrice': 100, 'value': 400}, {'gasPrice': 150}, sweep=True) is None
+    journal.close()
+
+
+def test_bump_sweep_and_replay(node, tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = TransactionJournal(path=path, blocks=1, interval=0.02)
+    my_web3 = MyWeb3(network=get_network(node), private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True, rpc_batch=True, journal=journal)
+    raw_transactions = get_raw_transactions(node, node._rpc_eth_sendRawTransaction)
+
+    async def main():
+        status, transaction_hash = await my_web3.transfer_percent(address_recipient=ADDRESS_RECIPIENT, percent=100)
+        assert status == 0, transaction_hash
+        node.base_fee = BASE_FEE * 10  # The fee spikes above the max fee of the transaction, which is then stuck.
+        return await my_web3.verify_transaction(transaction_hash)
+
+    assert run(main()) == (0, True)
+    journal.close()
+    assert len(raw_transactions) >= 2
+    original, replacement = get_fields(raw_transactions[0]), get_fields(raw_transactions[-1])
+    assert replacement['nonce'] == original['nonce']
+    assert replacement['maxFeePerGas'] > original['maxFeePerGas']
+    # The replacement spends no more than the original: value + gas * max fee stays the same.
+    assert replacement['value'] + replacement['gas'] * replacement['maxFeePerGas'] == original['value'] + original['gas'] * original['maxFeePerGas']
+
+    # The state is restored from the file after a restart.
+    journal = TransactionJournal(path=path)
+    entry, = journal.entries.values()
+    assert entry.status == JOURNAL_INCLUDED and entry.sweep
+    assert len(entry.hashes) == len(raw_transactions)
+    assert all(journal.get_entry(transaction_hash) is entry for transaction_hash in entry.hashes)
+    assert not journal.get_pending()
+    journal.close()
+
+
+def test_rebroadcast_after_restart(node, tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = TransactionJournal(path=path)
+    my_web3 = MyWeb3(network=get_network(node), private_key=PRIVATE_KEY, async_provider=True, journal=journal)
+    node.base_fee = BASE_FEE * 10
+
+    async def send():
+        status, result = await my_web3.send_transaction(address_to=ADDRESS_RECIPIENT, value=1, gas_price=BASE_FEE + PRIORITY_FEE)
+        assert status == 0, result
+        return result
+
+    transaction_hash = run(send())
+    journal.close()
+    # The node forgets the transaction while the process is down.
+    node.pending.clear()
+    raw_transactions = get_raw_transactions(node, node._rpc_eth_sendRawTransaction)
+
+    journal = TransactionJournal(path=path, blocks=1, interval=0.02)
+    entry, = journal.get_pending()
+    assert entry.status == JOURNAL_PENDING
+    # Without the private key the restored transaction can only be rebroadcast unchanged.
+    journal.attach(MyWeb3(network=get_network(node), async_provider=True))
+
+    async def track():
+        task = asyncio.ensure_future(journal.track(Web3.to_hex(transaction_hash), timeout=5))
+        while not raw_transactions:
+            await asyncio.sleep(0.01)
+        node.base_fee = BASE_FEE
+        return await task
+
+    receipt = run(track())
+    assert receipt.transaction_hash.lower() == entry.transaction_hash
+    assert set(raw_transactions) == {entry.raw_transaction}
+    journal.close()
+    assert os.path.getsize(path) > 0
+
+
+def test_failed_record_keeps_broadcast_nonce(node, tmp_path):
+    journal = TransactionJournal(path=str(tmp_path / 'journal.jsonl'))
+    my_web3 = MyWeb3(network=get_network(node), private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True, journal=journal)
+    raw_transactions = get_raw_transactions(node, node._rpc_eth_sendRawTransaction)
+    record_sent = journal.record_sent
+
+    def record_sent_failing(**kwargs):
+        journal.record_sent = record_sent
+        raise OSError('No space left on device')
+
+    journal.record_sent = record_sent_failing
+
+    async def main():
+        results = []
+        for _ in range(2):
+            results.append(await my_web3.send_transaction(address_to=ADDRESS_RECIPIENT, value=1))
+        return results
+
+    (status_first, result_first), (status_second, result_second) = run(main())
+    journal.close()
+    # The first transaction was broadcast before the journal failed, so its nonce is not handed out again.
+    assert status_first == -1 and 'No space left' in str(result_first)
+    assert status_second == 0, result_second
+    assert [get_fields(raw_transaction)['nonce'] for raw_transaction in raw_transactions] == [0, 1]
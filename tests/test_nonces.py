@@ -0,0 +1,54 @@
+import asyncio
+
+from my_web3 import BASE
+from my_web3.nonces import NonceManager
+
+ADDRESS = '0x' + 'ab' * 20
+
+
+def test_get_nonce_sequential():
+    nonces = NonceManager()
+    fetches = []
+
+    async def fetch() -> int:
+        fetches.append(None)
+        return 7
+
+    async def main():
+        return await asyncio.gather(*[nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch) for _ in range(10)])
+
+    assert sorted(asyncio.run(main())) == list(range(7, 17))
+    assert len(fetches) == 1
+
+
+def test_release_last_nonce_is_reused():
+    nonces = NonceManager()
+
+    async def fetch() -> int:
+        return 3
+
+    async def main():
+        first = await nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch)
+        second = await nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch)
+        nonces.release(network=BASE, address=ADDRESS, nonce=second)
+        return first, second, await nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch)
+
+    assert asyncio.run(main()) == (3, 4, 4)
+
+
+def test_release_earlier_nonce_refetches():
+    nonces = NonceManager()
+    counts = iter([3, 5])
+
+    async def fetch() -> int:
+        return next(counts)
+
+    async def main():
+        first = await nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch)
+        await nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch)
+        # The later nonce may already be broadcast, so the next one comes from the node instead of reusing the gap.
+        nonces.release(network=BASE, address=ADDRESS, nonce=first)
+        assert nonces._get_state(network=BASE, address=ADDRESS).nonce is None
+        return await nonces.get_nonce(network=BASE, address=ADDRESS, fetch=fetch)
+
+    assert asyncio.run(main()) == 5
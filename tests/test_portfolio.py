@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from my_web3 import PROVIDERS, Network, Token, ETH, EIP_1559, PortfolioIndex, scan_balances
+from my_web3.constants import ADDRESS_ZERO
+from mock_node import MockNode, TOPIC_TRANSFER, SELECTOR_BALANCE_OF, SELECTOR_GET_ETH_BALANCE, SELECTOR_AGGREGATE3
+
+ADDRESS_TOKEN = '0x' + '7a' * 20
+ADDRESS_A = '0x' + 'a1' * 20
+ADDRESS_B = '0x' + 'b2' * 20
+
+
+@pytest.fixture
+def chain():
+    # Blocks are advanced by the tests, so the confirmed block is known.
+    node = MockNode(block_time=3600, block_number=10)
+    node.start()
+    chain = Chain(node)
+    yield chain
+    node.stop()
+
+
+class Chain:
+    def __init__(self, node: MockNode):
+        """Mock node answering balances from `balances` and `Transfer` logs from `logs`."""
+        self.node = node
+        self.balances = {}
+        self.logs = []
+        self.calls = []
+        self.network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+        self.token = Token(name='MOCK', decimals=18, addresses={self.network: ADDRESS_TOKEN})
+        execute_call = node._execute_call
+
+        def execute(to: str, data: bytes) -> bytes:
+            selector = data[:4].hex()
+            self.calls.append(selector)
+            if selector in (SELECTOR_BALANCE_OF, SELECTOR_GET_ETH_BALANCE):
+                address_token = to.lower() if selector == SELECTOR_BALANCE_OF else ADDRESS_ZERO
+                return self.balances.get(('0x' + data[16:36].hex(), address_token), 0).to_bytes(32, 'big')
+            return execute_call(to, data)
+
+        node._execute_call = execute
+        node._rpc_eth_getBalance = lambda address, block_identifier='latest': hex(self.balances.get((address.lower(), ADDRESS_ZERO), 0))
+        node._rpc_eth_getLogs = self.get_logs
+
+    def transfer(self, block_number: int, address_from: str, address_to: str, amount: int):
+        self.logs.append({
+            'address': ADDRESS_TOKEN,
+            'topics': [TOPIC_TRANSFER, '0x' + '00' * 12 + address_from[2:], '0x' + '00' * 12 + address_to[2:]],
+            'data': '0x' + f'{amount:064x}', 'blockNumber': hex(block_number), 'blockHash': '0x' + '11' * 32,
+            'transactionHash': '0x' + f'{len(self.logs):064x}', 'transactionIndex': '0x0', 'logIndex': '0x0', 'removed': False,
+        })
+
+    def get_logs(self, params: dict) -> list:
+        start, end = int(params['fromBlock'], 16), int(params['toBlock'], 16)
+        return [log for log in self.logs if start <= int(log['blockNumber'], 16) <= end]
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await PROVIDERS.close()
+
+    return asyncio.run(main())
+
+
+def get_index(chain: Chain, tmp_path) -> PortfolioIndex:
+    return PortfolioIndex(
+        path=str(tmp_path / 'portfolio.sqlite'), addresses_wallets=[ADDRESS_A, ADDRESS_B], networks=[chain.network], tokens=[chain.token],
+        confirmations=0, reconcile_interval=None,
+    )
+
+
+def test_index_applies_transfers(chain, tmp_path):
+    chain.balances.update({(ADDRESS_A, ADDRESS_ZERO): 5, (ADDRESS_B, ADDRESS_ZERO): 7, (ADDRESS_A, ADDRESS_TOKEN): 100})
+    index = get_index(chain, tmp_path)
+    assert run(index.sync()) == {chain.network.chain_id: 10}
+    assert index.get_portfolio() == {ADDRESS_A: {chain.network.chain_id: {ADDRESS_ZERO: 5, ADDRESS_TOKEN: 100}}, ADDRESS_B: {chain.network.chain_id: {ADDRESS_ZERO: 7}}}
+
+    chain.transfer(block_number=12, address_from=ADDRESS_A, address_to=ADDRESS_B, amount=30)
+    chain.balances[(ADDRESS_A, ADDRESS_ZERO)] = 4
+    chain.node.block_number = 12
+    chain.calls.clear()
+    assert run(index.sync()) == {chain.network.chain_id: 12}
+    # Token balances follow the Transfer logs (the chain is not asked for them), native balances are re-read.
+    assert SELECTOR_BALANCE_OF not in chain.calls
+    assert (index.get_balance(chain.network, ADDRESS_A, ADDRESS_TOKEN), index.get_balance(chain.network, ADDRESS_B, ADDRESS_TOKEN)) == (70, 30)
+    assert index.get_balance(chain.network, ADDRESS_A) == 4
+    assert index.get_block_number(chain.network) == 12
+    transfer, = index.get_transfers(ADDRESS_B)
+    assert (transfer.address_from, transfer.amount, transfer.block_number) == (ADDRESS_A, 30, 12)
+    index.close()
+
+    # The state is kept in the database: a new index resumes after the indexed block.
+    index = get_index(chain, tmp_path)
+    chain.node.block_number = 13
+    assert run(index.sync()) == {chain.network.chain_id: 13}
+    assert index.get_balance(chain.network, ADDRESS_A, ADDRESS_TOKEN) == 70
+    index.close()
+
+
+def test_index_rereads_negative_and_reconciles(chain, tmp_path):
+    chain.balances.update({(ADDRESS_A, ADDRESS_TOKEN): 10, (ADDRESS_B, ADDRESS_TOKEN): 0})
+    index = get_index(chain, tmp_path)
+    run(index.sync())
+
+    # The token rebased: the wallet sends more than the index knows of, so its balance is re-read instead of going negative.
+    chain.balances.update({(ADDRESS_A, ADDRESS_TOKEN): 3, (ADDRESS_B, ADDRESS_TOKEN): 30})
+    chain.transfer(block_number=11, address_from=ADDRESS_A, address_to=ADDRESS_B, amount=30)
+    chain.node.block_number = 11
+    run(index.sync())
+    assert index.get_balance(chain.network, ADDRESS_A, ADDRESS_TOKEN) == 3
+    assert index.get_balance(chain.network, ADDRESS_B, ADDRESS_TOKEN) == 30
+
+    # A balance changed without events is only picked up by a reconciliation.
+    chain.balances[(ADDRESS_B, ADDRESS_TOKEN)] = 25
+    chain.node.block_number = 12
+    run(index.sync())
+    assert index.get_balance(chain.network, ADDRESS_B, ADDRESS_TOKEN) == 30
+    run(index.reconcile())
+    assert index.get_balance(chain.network, ADDRESS_B, ADDRESS_TOKEN) == 25
+    index.close()
+
+
+def scan(chain: Chain, networks=None, **kwargs) -> list:
+    async def main():
+        return [balance async for balance in scan_balances(addresses_wallets=[ADDRESS_A, ADDRESS_B], networks=networks or [chain.network], tokens=[chain.token], **kwargs)]
+
+    return run(main())
+
+
+def test_scan_balances_timeout(chain):
+    chain.balances.update({(ADDRESS_A, ADDRESS_ZERO): 5, (ADDRESS_B, ADDRESS_TOKEN): 7})
+    node_slow = MockNode(chain_id=1337, latency=2)
+    node_slow.start()
+    try:
+        network_slow = Network(name='Slow', rpc=node_slow.url, coin=ETH, chain_id=node_slow.chain_id, tx_type=EIP_1559)
+        chain.token.addresses[network_slow] = ADDRESS_TOKEN
+        balances = scan(chain, networks=[chain.network, network_slow], timeout=0.5)
+    finally:
+        node_slow.stop()
+    amounts = {(balance.chain_id, balance.address_wallet, balance.address_token): balance.amount for balance in balances}
+    assert len(amounts) == 8
+    # The fast network is read in full, the slow one yields errors instead of holding the scan.
+    assert {key[1:]: amount for key, amount in amounts.items() if key[0] == chain.network.chain_id} == {
+        (ADDRESS_A, ADDRESS_ZERO): 5, (ADDRESS_A, ADDRESS_TOKEN): 0, (ADDRESS_B, ADDRESS_ZERO): 0, (ADDRESS_B, ADDRESS_TOKEN): 7,
+    }
+    errors = [balance.error for balance in balances if balance.chain_id == node_slow.chain_id]
+    assert len(errors) == 4 and all(isinstance(error, asyncio.TimeoutError) for error in errors)
+
+
+@pytest.mark.parametrize('deployed', [False, True])
+def test_scan_balances_multicall_fallback(chain, deployed):
+    chain.balances.update({(ADDRESS_A, ADDRESS_ZERO): 5, (ADDRESS_B, ADDRESS_TOKEN): 7})
+    execute_call = chain.node._execute_call
+    failures = []
+
+    def execute(to: str, data: bytes) -> bytes:
+        # Without Multicall3 every aggregate3 call fails; a deployed one fails once (e.g. a timeout of the endpoint).
+        if (data[:4].hex() == SELECTOR_AGGREGATE3) and not (deployed and failures):
+            failures.append(to)
+            raise Exception('execution reverted')
+        return execute_call(to, data)
+
+    chain.node._execute_call = execute
+    chain.node._rpc_eth_getCode = lambda address, block_identifier='latest': '0x6080' if deployed else '0x'
+    balances = scan(chain, concurrency=1, chunk_size=2)
+    assert {(balance.address_wallet, balance.address_token): balance.amount for balance in balances} == {
+        (ADDRESS_A, ADDRESS_ZERO): 5, (ADDRESS_A, ADDRESS_TOKEN): 0, (ADDRESS_B, ADDRESS_ZERO): 0, (ADDRESS_B, ADDRESS_TOKEN): 7,
+    }
+    # Multicall3 is given up for the network only when it has no code; otherwise only the failed chunk is read with batches.
+    assert len(failures) == 1
+    assert chain.node.get_counters()['calls']['eth_getCode'] == 1
+    assert [balance.block_number is not None for balance in balances] == ([False, False, True, True] if deployed else [False] * 4)
@@ -0,0 +1,31 @@
+import asyncio
+
+from my_web3.constants import PROVIDER_POOL_MAXSIZE
+from my_web3.providers import ProviderRegistry
+
+
+def test_configure_closes_sessions(node):
+    providers = ProviderRegistry()
+    session = providers.get_session()
+    session.get(node.url)
+    adapter = session.get_adapter(node.url)
+    assert adapter.poolmanager.pools
+
+    async def main():
+        session_async = providers.get_async_session()
+        async with session_async.post(node.url, json={'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}):
+            pass
+        providers.configure(pool_maxsize=PROVIDER_POOL_MAXSIZE + 1)
+        await asyncio.sleep(0)
+        try:
+            return session_async, providers.get_async_session()
+        finally:
+            await providers.close()
+
+    session_async, session_async_new = asyncio.run(main())
+    # The replaced sessions are closed instead of keeping their connections open until they are garbage collected.
+    assert session_async.closed and (session_async_new is not session_async)
+    assert not adapter.poolmanager.pools
+    assert providers.get_session() is not session
+    assert providers.get_session().get_adapter(node.url)._pool_maxsize == PROVIDER_POOL_MAXSIZE + 1
+    providers.get_session().close()
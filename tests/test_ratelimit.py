@@ -0,0 +1,42 @@
+import asyncio
+
+from my_web3.ratelimit import RateLimiter
+
+
+def test_waiters_are_woken_up():
+    limiter = RateLimiter(rate=1000, rate_max=1000, concurrency=2, concurrency_max=2)
+    active = []
+
+    async def request():
+        await limiter.acquire()
+        active.append(None)
+        try:
+            assert len(active) <= 2
+            await asyncio.sleep(0.05)
+        finally:
+            active.pop()
+            limiter.release(throttled=None)
+
+    async def main():
+        await asyncio.wait_for(asyncio.gather(*[request() for _ in range(10)]), timeout=5)
+
+    asyncio.run(main())
+    assert not limiter._waiters
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_is_removed():
+    limiter = RateLimiter(rate=1000, rate_max=1000, concurrency=1, concurrency_max=1)
+
+    async def main():
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert len(limiter._waiters) == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert not limiter._waiters
+        limiter.release(throttled=None)
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from web3.exceptions import TimeExhausted
+
+from my_web3 import PROVIDERS, Network, ETH, EIP_1559
+from my_web3.receipts import ReceiptTracker
+
+
+def get_tracker(node) -> ReceiptTracker:
+    network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    return ReceiptTracker(network=network, interval=0.02, block_receipts=True)
+
+
+def get_hashes(count: int, start: int = 0):
+    return ['0x' + f'{i:064x}' for i in range(start + 1, start + count + 1)]
+
+
+async def track_many(tracker: ReceiptTracker, hashes, node, timeout: float = 5):
+    try:
+        # The first poll only records the head block, so the transactions are mined afterwards.
+        tasks = asyncio.gather(*[tracker.track(transaction_hash, timeout=timeout) for transaction_hash in hashes])
+        while tracker.block_number is None:
+            await asyncio.sleep(0.01)
+        for transaction_hash in hashes:
+            node.pending[transaction_hash] = node.base_fee
+        return await tasks
+    finally:
+        await PROVIDERS.close()
+
+
+def test_null_block_receipts(node):
+    tracker = get_tracker(node)
+    hashes = get_hashes(5)
+    node._rpc_eth_getBlockReceipts = lambda block_identifier: None
+
+    receipts = asyncio.run(track_many(tracker, hashes, node))
+    assert [receipt.transaction_hash.lower() for receipt in receipts] == hashes
+    assert node.get_counters()['calls']['eth_getBlockReceipts'] > 0
+    assert not tracker._futures and not tracker._waiters
+
+
+def test_lagging_block_receipts(node):
+    tracker = get_tracker(node)
+    hashes = get_hashes(5, start=100)
+    get_block_receipts, get_transaction_receipt = node._rpc_eth_getBlockReceipts, node._rpc_eth_getTransactionReceipt
+    lagging = {'blocks': 3}
+
+    def lag(handler):
+        # The endpoint does not know the first blocks with the transactions yet.
+        def wrapper(*params):
+            if any(node.blocks.get(block) for block in range(node.block_number + 1)) and lagging['blocks'] > 0:
+                lagging['blocks'] -= handler is get_block_receipts
+                return None
+            return handler(*params)
+        return wrapper
+
+    node._rpc_eth_getBlockReceipts = lag(get_block_receipts)
+    node._rpc_eth_getTransactionReceipt = lag(get_transaction_receipt)
+
+    receipts = asyncio.run(track_many(tracker, hashes, node))
+    assert [receipt.transaction_hash.lower() for receipt in receipts] == hashes
+    assert lagging['blocks'] == 0
+    assert not tracker._futures and not tracker._waiters
+
+
+def test_short_timeout_keeps_shared_future(node):
+    tracker = get_tracker(node)
+    transaction_hash = get_hashes(1, start=200)[0]
+
+    async def main():
+        try:
+            waiter_long = asyncio.ensure_future(tracker.track(transaction_hash, timeout=5))
+            with pytest.raises(TimeExhausted):
+                await tracker.track(transaction_hash, timeout=0.05)
+            assert transaction_hash in tracker._futures
+            node.pending[transaction_hash] = node.base_fee
+            return await waiter_long
+        finally:
+            await PROVIDERS.close()
+
+    assert asyncio.run(main()).transaction_hash.lower() == transaction_hash
+    assert not tracker._futures and not tracker._waiters
@@ -0,0 +1,106 @@
+import json
+import socket
+import asyncio
+
+import pytest
+import aiohttp
+import requests
+
+from my_web3 import PROVIDERS
+from my_web3.router import RpcRouter, is_connect_error
+
+
+def get_closed_uri() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{sock.getsockname()[1]}'
+
+
+async def send_block_number(uri: str) -> int:
+    body = {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}
+    async with PROVIDERS.get_async_session().post(uri, json=body) as response:
+        return int((await response.json())['result'], 16)
+
+
+def test_write_fails_over_when_not_connected(node):
+    router = RpcRouter(uris=[get_closed_uri(), node.url])
+
+    async def main():
+        try:
+            return await router.request(send_block_number, write=True)
+        finally:
+            await PROVIDERS.close()
+
+    assert asyncio.run(main()) > 0
+    assert node.get_counters()['calls']['eth_blockNumber'] == 1
+
+
+def test_write_sync_fails_over_when_not_connected(node):
+    router = RpcRouter(uris=[get_closed_uri(), node.url])
+
+    def send(uri: str) -> dict:
+        return requests.post(uri, data=json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}), timeout=5).json()
+
+    assert router.request_sync(send, write=True)['result']
+    assert node.get_counters()['calls']['eth_blockNumber'] == 1
+
+
+def test_write_does_not_fail_over_after_timeout(node):
+    router = RpcRouter(uris=['http://first', node.url])
+    uris = []
+
+    async def send(uri: str) -> int:
+        uris.append(uri)
+        if uri == 'http://first':
+            # The request may have reached the node, so it must not be broadcast again.
+            raise asyncio.TimeoutError()
+        return await send_block_number(uri)
+
+    async def main(write: bool):
+        try:
+            return await router.request(send, write=write)
+        finally:
+            await PROVIDERS.close()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main(write=True))
+    assert uris == ['http://first']
+
+    assert asyncio.run(main(write=False)) > 0
+    assert node.url in uris
+
+
+@pytest.mark.parametrize('error, expected', [
+    (aiohttp.ConnectionTimeoutError('Connection timeout to host http://first'), True),
+    (aiohttp.ServerTimeoutError('Connection timeout to host http://first'), True),
+    (aiohttp.SocketTimeoutError('Timeout on reading data from socket'), False),
+    (requests.exceptions.ConnectTimeout(), True),
+    (requests.exceptions.ReadTimeout(), False),
+])
+def test_is_connect_error_timeouts(error, expected):
+    assert is_connect_error(error) is expected
+
+
+def test_write_fails_over_after_connect_timeout(node):
+    router = RpcRouter(uris=['http://first', node.url])
+
+    async def send(uri: str) -> int:
+        if uri == 'http://first':
+            raise aiohttp.ConnectionTimeoutError(f'Connection timeout to host {uri}')
+        return await send_block_number(uri)
+
+    async def main():
+        try:
+            return await router.request(send, write=True)
+        finally:
+            await PROVIDERS.close()
+
+    assert asyncio.run(main()) > 0
+
+    def send_sync(uri: str) -> dict:
+        if uri == 'http://first':
+            raise requests.exceptions.ConnectTimeout()
+        return requests.post(uri, data=json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_blockNumber', 'params': []}), timeout=5).json()
+
+    assert router.request_sync(send_sync, write=True)['result']
+    assert node.get_counters()['calls']['eth_blockNumber'] == 2
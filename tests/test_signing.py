@@ -0,0 +1,53 @@
+import asyncio
+
+import rlp
+from eth_account import Account
+
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559, SigningPool
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS = Account.from_key(PRIVATE_KEY).address
+ADDRESS_RECIPIENT = '0x' + '3c' * 20
+
+
+def get_nonce(raw_transaction: str) -> int:
+    return int.from_bytes(rlp.decode(bytes.fromhex(raw_transaction[2:])[1:])[1], 'big')
+
+
+def test_bulk_rejected_transaction_resyncs_nonce(node):
+    network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    my_web3 = MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True, nonce_manager=True)
+    node.nonces[ADDRESS.lower()] = 10
+    send_raw_transaction = node._rpc_eth_sendRawTransaction
+    sent = []
+    rejected = []
+
+    def send(raw_transaction: str) -> str:
+        # The pending transaction count of a real node stops at the first missing nonce.
+        nonce = get_nonce(raw_transaction)
+        if (nonce == 11) and not rejected:
+            rejected.append(nonce)
+            raise Exception('transaction rejected')
+        sent.append(nonce)
+        if nonce == node.nonces[ADDRESS.lower()]:
+            node.nonces[ADDRESS.lower()] += 1
+        return send_raw_transaction(raw_transaction)
+
+    node._rpc_eth_sendRawTransaction = send
+
+    async def main():
+        try:
+            with SigningPool(private_keys=[PRIVATE_KEY], workers=1) as signing_pool:
+                status, results = await my_web3.send_transactions_bulk([{'address_to': ADDRESS_RECIPIENT, 'value': 1}] * 3, signing_pool=signing_pool)
+            assert status == 0, results
+            status_next, result_next = await my_web3.send_transaction(address_to=ADDRESS_RECIPIENT, value=1)
+            assert status_next == 0, result_next
+            return results
+        finally:
+            await PROVIDERS.close()
+
+    results = asyncio.run(main())
+    assert [status for status, result in results] == [0, -1, 0]
+    # The next transaction fills the nonce of the rejected one instead of queueing behind it.
+    assert sorted(sent[:2]) == [10, 12]
+    assert sent[2:] == [11]
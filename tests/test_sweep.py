@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+import rlp
+
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559, LEGACY
+from my_web3.constants import ADDRESS_L1_FEE_ORACLE_OP_STACK, SWEEP_L1_FEE_MULTIPLIER
+from mock_node import BALANCE, GAS, L1_FEE
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS_RECIPIENT = '0x' + '3c' * 20
+
+
+def get_my_web3(node, tx_type=EIP_1559, address_l1_fee_oracle=None) -> MyWeb3:
+    network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=tx_type, address_l1_fee_oracle=address_l1_fee_oracle)
+    return MyWeb3(network=network, private_key=PRIVATE_KEY, async_provider=True)
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await PROVIDERS.close()
+
+    return asyncio.run(main())
+
+
+def get_tx(my_web3: MyWeb3, **fees) -> dict:
+    return {'from': my_web3.address, 'to': my_web3.w3.to_checksum_address(ADDRESS_RECIPIENT), 'nonce': 0, 'chainId': my_web3.network.chain_id, 'gas': 30000, **fees}
+
+
+def test_value_sweep_eip_1559_with_l1_fee(node):
+    my_web3 = get_my_web3(node, address_l1_fee_oracle=ADDRESS_L1_FEE_ORACLE_OP_STACK)
+    tx = get_tx(my_web3, maxFeePerGas=3 * 10 ** 9, maxPriorityFeePerGas=10 ** 8)
+    value = run(my_web3._get_value_sweep(tx=tx, balance=10 ** 18))
+    assert value == 10 ** 18 - 30000 * 3 * 10 ** 9 - int(L1_FEE * SWEEP_L1_FEE_MULTIPLIER)
+
+
+def test_value_sweep_legacy(node):
+    my_web3 = get_my_web3(node, tx_type=LEGACY)
+    tx = get_tx(my_web3, gasPrice=2 * 10 ** 9)
+    assert run(my_web3._get_value_sweep(tx=tx)) == BALANCE - 30000 * 2 * 10 ** 9
+
+
+def test_value_sweep_balance_too_low(node):
+    my_web3 = get_my_web3(node)
+    with pytest.raises(Exception, match='balance'):
+        run(my_web3._get_value_sweep(tx=get_tx(my_web3, gasPrice=10 ** 9), balance=30000 * 10 ** 9))
+
+
+def test_sweep_estimates_gas_with_value(node):
+    my_web3 = get_my_web3(node)
+    estimate_gas, send_raw_transaction = node._rpc_eth_estimateGas, node._rpc_eth_sendRawTransaction
+    estimates, sent = [], []
+
+    def estimate(tx: dict, block_identifier=None) -> str:
+        estimates.append(tx)
+        return estimate_gas(tx, block_identifier)
+
+    def send(raw_transaction: str) -> str:
+        sent.append(rlp.decode(bytes.fromhex(raw_transaction[4:])))
+        return send_raw_transaction(raw_transaction)
+
+    node._rpc_eth_estimateGas, node._rpc_eth_sendRawTransaction = estimate, send
+
+    status, result = run(my_web3.transfer_percent(address_recipient=ADDRESS_RECIPIENT, percent=100))
+    assert status == 0, result
+    assert [int(tx['value'], 16) for tx in estimates] == [BALANCE]
+    assert not any(key in estimates[0] for key in ('gasPrice', 'maxFeePerGas', 'maxPriorityFeePerGas'))
+    # Type 2 fields: [chainId, nonce, maxPriorityFee, maxFee, gas, to, value, ...]
+    max_fee, gas, value = (int.from_bytes(sent[0][i], 'big') for i in (3, 4, 6))
+    assert gas == GAS
+    assert value == BALANCE - gas * max_fee
+
+
+def test_deprecated_step_withdraw(node):
+    with pytest.warns(DeprecationWarning):
+        network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559, step_withdraw_min=0.001, step_withdraw_max=0.002)
+    with pytest.warns(DeprecationWarning):
+        assert 10 ** 15 <= network.get_step_withdraw() <= 2 * 10 ** 15
+    with pytest.warns(DeprecationWarning):
+        assert 'insufficient funds' in MyWeb3.insufficient_fund_errors_list
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from my_web3 import PROVIDERS, Network, ETH, EIP_1559
+from my_web3.ratelimit import RateLimitError, check_rate_limit
+from my_web3.transfers import TransferScanner, is_range_error
+
+ADDRESS_TOKEN = '0x' + '7a' * 20
+
+
+@pytest.mark.parametrize('error, expected', [
+    (ValueError({'code': -32005, 'message': 'query returned more than 10000 results'}), True),
+    (ValueError({'code': -32005, 'message': 'limit exceeded'}), True),
+    (ValueError({'code': -32602, 'message': 'Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range'}), True),
+    (ValueError({'code': -32614, 'message': 'eth_getLogs is limited to a 10,000 range'}), True),
+    (ValueError({'code': -32000, 'message': 'exceed maximum block range: 5000'}), True),
+    (ValueError({'code': -32000, 'message': 'query exceeds max results 20000, retry with the range 1-100'}), True),
+    (asyncio.TimeoutError(), True),
+    (ValueError({'code': -32000, 'message': 'gas required exceeds allowance (0)'}), False),
+    (ValueError({'code': -32000, 'message': 'request timeout on the upstream'}), False),
+    (ValueError({'code': -32000, 'message': 'too many open files'}), False),
+    (ValueError({'code': -32000, 'message': 'header not found'}), False),
+    (RateLimitError('{"error": {"code": -32005, "message": "daily request count exceeded, request rate limited"}}'), False),
+])
+def test_is_range_error(error, expected):
+    assert is_range_error(error) is expected
+
+
+def test_range_error_is_not_rate_limit():
+    content = b'{"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "query returned more than 10000 results"}}'
+    check_rate_limit(status=200, headers={}, content=content)
+    with pytest.raises(RateLimitError):
+        check_rate_limit(status=200, headers={}, content=content.replace(b'query returned more than 10000 results', b'request rate limited'))
+
+
+def test_scan_splits_rejected_ranges(node):
+    node.logs_per_block = 10
+    node.logs_results_max = 100
+    network = Network(name='Mock', rpc=node.url, coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    scanner = TransferScanner(network=network, addresses_tokens=[ADDRESS_TOKEN], chunk_size=64)
+
+    async def main():
+        try:
+            return [transfer async for transfer in scanner.scan(block_start=0, block_end=63)]
+        finally:
+            await PROVIDERS.close()
+
+    transfers = asyncio.run(main())
+    assert sorted({transfer.block_number for transfer in transfers}) == list(range(64))
+    assert scanner.chunk_size <= 10
@@ -0,0 +1,154 @@
+import socket
+import asyncio
+import threading
+
+import pytest
+from eth_abi import encode, decode
+from web3 import Web3
+
+from my_web3 import MyWeb3, PROVIDERS, Network, ETH, EIP_1559
+from my_web3.utils import afh, aah, encode_aggregate3, decode_aggregate3, encode_disperse
+from mock_node import decode_calls, encode_results
+
+ADDRESS = Web3.to_checksum_address('0x' + 'ab' * 20)
+
+
+def get_closed_uri() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'http://127.0.0.1:{sock.getsockname()[1]}'
+
+
+def test_afh_runs_sync_calls_off_the_loop():
+    threads = []
+
+    def call(value: int) -> int:
+        threads.append(threading.get_ident())
+        threading.Event().wait(0.2)
+        return value
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(tick())
+        result = await afh(call, False, 5)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result == 5
+    assert ticks >= 5
+    assert threads != [threading.get_ident()]
+
+
+def test_sync_provider_keeps_proxy(node):
+    # The RPC itself is unreachable, so the requests only succeed when they go through the proxy (the mock node).
+    network = Network(name='Mock', rpc=get_closed_uri(), coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    my_web3 = MyWeb3(network=network, proxy=node.url.replace('http://', ''))
+    node.latency = 0.1
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(tick())
+        balance = await afh(my_web3.w3.eth.get_balance, my_web3.async_provider, ADDRESS)
+        chain_id = await aah(my_web3.w3.eth, 'chain_id', my_web3.async_provider)
+        task.cancel()
+        return balance, chain_id, ticks
+
+    balance, chain_id, ticks = asyncio.run(main())
+    assert balance > 0
+    assert chain_id == node.chain_id
+    assert ticks >= 10
+    assert node.get_counters()['calls']['eth_getBalance'] == 1
+
+
+def test_async_provider_keeps_proxy(node):
+    network = Network(name='Mock', rpc=get_closed_uri(), coin=ETH, chain_id=node.chain_id, tx_type=EIP_1559)
+    my_web3 = MyWeb3(network=network, proxy=node.url.replace('http://', ''), async_provider=True)
+
+    async def main():
+        try:
+            return await aah(my_web3.w3.eth, 'chain_id', my_web3.async_provider)
+        finally:
+            await PROVIDERS.close()
+
+    assert asyncio.run(main()) == node.chain_id
+    assert node.get_counters()['calls']['eth_chainId'] == 1
+
+
+@pytest.mark.parametrize('data', [b'', b'\x01', bytes(range(5)), bytes(range(32)), bytes(range(33))])
+@pytest.mark.parametrize('allow_failure', [True, False])
+def test_encode_aggregate3(data: bytes, allow_failure: bool):
+    calls = [(ADDRESS, allow_failure, data), (Web3.to_checksum_address('0x' + '01' * 20), not allow_failure, data)]
+    encoded = encode_aggregate3(calls)
+    assert encoded == encode(['(address,bool,bytes)[]'], [calls])
+    assert [(Web3.to_checksum_address(address), allow_failure, data) for address, allow_failure, data in decode(['(address,bool,bytes)[]'], encoded)[0]] == calls
+    # Call data may be a hex string, with or without the prefix.
+    for data_hex in ('0x' + data.hex(), data.hex()):
+        assert encode_aggregate3([(address, allow_failure, data_hex) for address, allow_failure, data in calls]) == encoded
+
+
+def test_encode_aggregate3_empty():
+    assert encode_aggregate3([]) == encode(['(address,bool,bytes)[]'], [[]])
+
+
+def test_encode_aggregate3_invalid():
+    with pytest.raises(ValueError):
+        encode_aggregate3([(ADDRESS, True, '0x123')])
+    with pytest.raises(ValueError):
+        encode_aggregate3([('0x' + '01' * 19, True, b'')])
+
+
+@pytest.mark.parametrize('results', [
+    [],
+    [(True, b'')],
+    [(False, b'')],
+    [(True, (10 ** 18).to_bytes(32, 'big')), (False, bytes.fromhex('08c379a0') + encode(['string'], ['reverted'])), (True, bytes(range(5)))],
+])
+def test_decode_aggregate3(results):
+    assert decode_aggregate3(encode(['(bool,bytes)[]'], [results])) == results
+
+
+def test_decode_aggregate3_truncated():
+    data = encode(['(bool,bytes)[]'], [[(True, bytes(range(40)))]])
+    with pytest.raises(ValueError):
+        decode_aggregate3(data[:-32])
+
+
+def test_mock_node_aggregate3_codec():
+    # The mock node decodes with a codec of its own, which benchmarks rely on to catch encoding bugs.
+    calls = [(ADDRESS.lower(), True, b''), (ADDRESS.lower(), False, bytes(range(33)))]
+    assert decode_calls(encode(['(address,bool,bytes)[]'], [calls])) == calls
+    results = [(True, bytes(range(5))), (False, b'')]
+    assert list(decode(['(bool,bytes)[]'], encode_results(results))[0]) == results
+
+
+@pytest.mark.parametrize('recipients', [
+    [],
+    [(ADDRESS, 0)],
+    [(ADDRESS, 1), (Web3.to_checksum_address('0x' + '01' * 20), 2 ** 256 - 1), (ADDRESS.lower(), 10 ** 18)],
+])
+def test_encode_disperse(recipients):
+    addresses, amounts = [address for address, amount in recipients], [amount for address, amount in recipients]
+    assert encode_disperse(recipients) == encode(['address[]', 'uint256[]'], [addresses, amounts])
+    assert encode_disperse(recipients, address_token=ADDRESS) == encode(['address', 'address[]', 'uint256[]'], [ADDRESS, addresses, amounts])
+
+
+def test_encode_disperse_invalid():
+    with pytest.raises(ValueError):
+        encode_disperse([('0x' + '01' * 21, 1)])
+    with pytest.raises(ValueError):
+        encode_disperse([(ADDRESS, 1)], address_token='0x' + '01' * 19)